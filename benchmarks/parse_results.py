@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""
+Benchmark parse-results against a synthetic results directory.
+
+A corpus of logs for every test is generated in a temporary directory, each
+padded with lines the parsers ignore to reach a realistic size, and the full
+directory is parsed once for every requested number of jobs without the parse
+cache. The wall time of every pass is printed along with whether the results
+match the single-job pass.
+
+Usage:
+    python3 benchmarks/parse_results.py --logs 200 --jobs 1,2,4,8
+"""
+import os
+import sys
+import tempfile
+from argparse import ArgumentParser, Namespace
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from bobber.lib.analysis.catalog import LogCatalog  # noqa: E402
+from bobber.lib.analysis.parse_results import (aggregate_systems,  # noqa
+                                               get_files)
+
+# Lines which every parser ignores, similar to the NCCL and MPI output which
+# makes up most of real logs
+PADDING = 'node1:1234:1234 [0] NCCL INFO Channel 00 : 0[7000] -> 1[b000] ' \
+          'via P2P/IPC\n'
+LOGS = {
+    'stg_bw_iteration_{}_gpus_8_systems_2_version_6_3_1.log': """Command:
+/usr/bin/fio --rw=write --bs=1m --numjobs=80
+  WRITE: bw=38.2GiB/s (41.0GB/s), 38.2GiB/s-38.2GiB/s (41.0GB/s-41.0GB/s)
+  WRITE: bw=38.2GiB/s (40.0GB/s), 38.2GiB/s-38.2GiB/s (41.0GB/s-41.0GB/s)
+Command:
+/usr/bin/fio --rw=read --bs=1m --numjobs=80
+   READ: bw=50GiB/s (53.7GB/s), 50GiB/s-50GiB/s (53.7GB/s-53.7GB/s)
+   READ: bw=50GiB/s (52.5GB/s), 50GiB/s-50GiB/s (52.5GB/s-52.5GB/s)
+""",
+    'stg_iops_iteration_{}_gpus_8_systems_2_version_6_3_1.log': """Command:
+/usr/bin/fio --rw=randwrite --bs=4k
+  write: IOPS=100k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+  write: IOPS=120k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+  write: IOPS=220k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+Command:
+/usr/bin/fio --rw=randread --bs=4k
+  read: IOPS=1000k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+  read: IOPS=1200k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+  read: IOPS=2200k, BW=4822MiB/s (5056MB/s)(283GiB/60001msec)
+""",
+    'stg_meta_iteration_{}_gpus_8_systems_2_version_6_3_1.log': (
+        '-- started\n'
+        'SUMMARY rate:\n'
+        '   Operation                      Max            Min           Mean'
+        '        Std Dev\n'
+        '   ---------                      ---            ---           ----'
+        '        -------\n'
+        '   Directory creation        :      12345.678      11000.000'
+        '     11500.000        300.000\n'
+        '   File creation             :       2345.678       2000.000'
+        '      2100.000         30.000\n'
+        '-- finished\n'
+    ),
+    'nccl_iteration_{}_gpus_8_systems_2_version_6_3_1.log': (
+        '# nThread 1\n'
+        '     8388608       2097152     float     sum    100.1   83.80  157.13'
+        '  4e-07\n'
+        '  1073741824     268435456     float     sum   5000.0  214.7  402.6'
+        '  4e-07\n'
+    ),
+    'dali_iteration_{}_gpus_8_systems_2_version_6_3_1.log': ''.join(
+        f'First image size from /data/{size}/x.jpg\n'
+        ' in bytes: 1234 , dir in bytes: 99999\n'
+        for size in ['800x600', '3840x2160'] * 2
+    ) + ''.join(
+        'RUN 1/1\n' + ''.join(f'epoch {epoch} speed: {run + epoch}.5 '
+                              '[img/s]\n' for epoch in range(6)) + 'OK\n'
+        for run in range(100, 140, 10)
+    )
+}
+
+
+def parse_args() -> Namespace:
+    """
+    Returns a ``Namespace`` of the arguments passed to the benchmark.
+    """
+    parser = ArgumentParser('Benchmark parse-results')
+    parser.add_argument('--logs', help='Number of logs to generate per test. '
+                        'Defaults to 200.', type=int, default=200)
+    parser.add_argument('--padding', help='Number of ignored lines to add to '
+                        'every log. Defaults to 4000.', type=int, default=4000)
+    parser.add_argument('--jobs', help='Comma-separated list of the number of '
+                        'jobs to parse with. Defaults to 1 and the number of '
+                        'cores.', default=f'1,{os.cpu_count()}')
+    return parser.parse_args()
+
+
+def generate_corpus(directory: str, logs: int, padding: int) -> int:
+    """
+    Write the synthetic logs and return the total size of the corpus in bytes.
+    """
+    size = 0
+
+    for name, contents in LOGS.items():
+        # Interleave the results with the padding like real logs
+        half = PADDING * (padding // 2)
+        contents = half + contents + half
+        for iteration in range(1, logs + 1):
+            with open(os.path.join(directory, name.format(iteration)),
+                      'w') as log:
+                log.write(contents)
+            size += len(contents)
+    return size
+
+
+def main() -> None:
+    args = parse_args()
+    jobs = [int(count) for count in args.jobs.split(',')]
+
+    with tempfile.TemporaryDirectory() as directory:
+        size = generate_corpus(directory, args.logs, args.padding)
+        print(f'Generated {args.logs * len(LOGS)} logs totaling '
+              f'{round(size / 1e6, 1)} MB on {os.cpu_count()} core(s)')
+        expected = None
+        for count in jobs:
+            start = time()
+            catalog = LogCatalog(get_files(directory))
+            results = aggregate_systems(catalog, count)
+            elapsed = time() - start
+            results = {systems: aggregate.json
+                       for systems, aggregate in results.items()}
+            if expected is None:
+                expected = results
+            print(f'jobs={count}: {round(elapsed, 2)} seconds, results '
+                  f'{"match" if results == expected else "DIFFER"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,27 @@
 # SPDX-License-Identifier: MIT
-import bobber.lib.docker
 import json
 from argparse import ArgumentParser, ArgumentTypeError, Namespace
 from copy import copy
 from bobber import __version__
 from bobber.lib.constants import (
+    BACKENDS,
     BASELINES,
     BUILD,
     DGX_2,
     DGX_A100_DUAL,
     DGX_A100_SINGLE,
     EXPORT,
+    EXPORT_THREADS,
     CAST,
+    INVOCATION_FLAGS,
+    CAST_ALL,
+    CONTAINER_BACKENDS,
+    DOCKER,
+    KNEE_METRICS,
     LOAD,
+    LOAD_ALL,
     PARSE_RESULTS,
+    REPLAY,
     RUN_ALL,
     RUN_DALI,
     RUN_NCCL,
@@ -25,9 +33,12 @@ from bobber.lib.constants import (
     READ_PATTERNS,
     WRITE_PATTERNS
 )
+from bobber.lib import backends
 from bobber.lib.analysis import parse_results
+from bobber.lib.system import fanout
 from bobber.lib.system.file_handler import create_directory
-from bobber.lib.tests import run_tests
+from bobber.lib.system.log_sink import COMPRESSION_SUFFIXES
+from bobber.lib.tests import plan as run_plan, preflight, run_tests
 from typing import NoReturn
 
 
@@ -62,6 +73,47 @@ def unique_hosts(hosts: str) -> str:
     return hosts
 
 
+def sweep_steps(steps: str) -> str:
+    """
+    Verify the requested sweep steps are valid.
+
+    The sweep steps can either be a comma-separated list of system counts to
+    test, such as '1,2,4,8', or a geometric rule in the form of 'geometric' or
+    'geometric:R' where the system count is multiplied by R (2 by default) for
+    every step.
+
+    Parameters
+    ----------
+    steps : str
+        A ``string`` of the sweep steps requested by the user.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the original sweep steps if valid.
+
+    Raises
+    ------
+    ArgumentTypeError
+        Raises an ``ArgumentTypeError`` if the steps are not a list of unique
+        positive integers or a valid geometric rule.
+    """
+    if steps.startswith('geometric'):
+        ratio = steps.replace('geometric', '', 1)
+        if ratio and (not ratio.startswith(':') or
+                      not ratio[1:].isdigit() or int(ratio[1:]) < 2):
+            raise ArgumentTypeError('Geometric sweep ratio must be an integer '
+                                    'of at least 2, such as "geometric:2"')
+        return steps
+    step_list = steps.split(',')
+    if not all(step.isdigit() and int(step) > 0 for step in step_list):
+        raise ArgumentTypeError('Sweep steps must be a comma-separated list '
+                                'of positive integers or "geometric[:R]"')
+    if len(step_list) != len(set(int(step) for step in step_list)):
+        raise ArgumentTypeError('Sweep steps must be unique')
+    return steps
+
+
 def parse_args(version: str) -> Namespace:
     """
     Parse arguments passed to the application.
@@ -85,6 +137,13 @@ def parse_args(version: str) -> Namespace:
     # Required positional command subparser which should be specified first
     commands = parser.add_subparsers(dest='command', metavar='command')
     commands_parent = ArgumentParser(add_help=False)
+    container_parent = ArgumentParser(add_help=False)
+
+    # Options which apply to all commands managing the Bobber container
+    container_parent.add_argument('--backend', help='Container engine to '
+                                  'manage the Bobber image and container '
+                                  'with. Defaults to docker.',
+                                  choices=CONTAINER_BACKENDS, default=DOCKER)
 
     # More general options which apply to a majority of the running commands
     # Note that all arguments prepended with '--' are optional
@@ -95,8 +154,10 @@ def parse_args(version: str) -> Namespace:
                                  type=unique_hosts)
     commands_parent.add_argument('--config-path', help='Read a JSON config '
                                  'file with expected parameters and use those '
-                                 'values for testing. Ignores all other '
-                                 'optional flags')
+                                 'values for testing. Other optional flags '
+                                 'only provide settings missing from the '
+                                 'config, except --resume and --retries '
+                                 'which always apply')
     commands_parent.add_argument('--gpus', help='Number of GPUs contained '
                                  'within a system or systems under test '
                                  '(heterogeneous counts not supported)',
@@ -151,6 +212,19 @@ def parse_args(version: str) -> Namespace:
                                  ' execute per test - a seperate log file will'
                                  ' be generated for each iteration', type=int,
                                  default=10)
+    commands_parent.add_argument('--target-ci', help='Instead of running a '
+                                 'fixed number of iterations, run each test '
+                                 'until the 95%% confidence interval of its '
+                                 'main metric is within N percent of the '
+                                 'mean, such as 2 for +/-2%%.', type=float)
+    commands_parent.add_argument('--min-iterations', help='Minimum number of '
+                                 'iterations to run per test while using '
+                                 '--target-ci. Defaults to 3.', type=int,
+                                 default=3)
+    commands_parent.add_argument('--max-iterations', help='Maximum number of '
+                                 'iterations to run per test while using '
+                                 '--target-ci. Defaults to the value of '
+                                 '--iterations.', type=int)
     commands_parent.add_argument('--sweep', help='If present, will run all '
                                  'tests for all specified iterations from a '
                                  'single system to the number of systems '
@@ -158,6 +232,29 @@ def parse_args(version: str) -> Namespace:
                                  'of a single system (so, 3 systems specified '
                                  'would result in tests for 1, 2, and 3 '
                                  'systems)', action='store_true')
+    commands_parent.add_argument('--sweep-steps', help='Run a sweep with only '
+                                 'the specified system counts instead of '
+                                 'adding a single system at a time. Accepts '
+                                 'a comma-separated list of system counts, '
+                                 'such as 1,2,4,8, or "geometric:R" to '
+                                 'multiply the system count by R for every '
+                                 'step ("geometric" uses a ratio of 2). A '
+                                 'geometric sweep always ends with the total '
+                                 'number of hosts, while a list only tests '
+                                 'the listed counts. Implies --sweep.',
+                                 type=sweep_steps)
+    commands_parent.add_argument('--find-knee', help='Instead of a full '
+                                 'sweep, bisect the hosts list to find the '
+                                 'system count where the per-system '
+                                 'efficiency of the selected metric drops '
+                                 'below --knee-threshold. The metric must be '
+                                 'produced by the requested tests.',
+                                 choices=KNEE_METRICS.keys())
+    commands_parent.add_argument('--knee-threshold', help='The per-system '
+                                 'efficiency as a percentage of the '
+                                 'single-system result below which scaling is '
+                                 'considered broken while using --find-knee. '
+                                 'Defaults to 80.', type=int, default=80)
     commands_parent.add_argument('--system', help='If system is specified, '
                                  'iops-threads, 125k-threads, bw-threads, '
                                  'gpus, batch size, and network interface '
@@ -179,6 +276,103 @@ def parse_args(version: str) -> Namespace:
                                  'seconds to ensure any activity is finished '
                                  'before the next test begins. Defaults to 0 '
                                  '(no pause).', type=int, default=0)
+    commands_parent.add_argument('--test-timeout', help='Kill any single '
+                                 'test iteration which runs for longer than N '
+                                 'seconds and continue with the next test. '
+                                 'Defaults to no timeout.', type=int)
+    commands_parent.add_argument('--idle-timeout', help='Kill any single '
+                                 'test iteration which produces no output for '
+                                 'N seconds and continue with the next test. '
+                                 'Defaults to no timeout.', type=int)
+    commands_parent.add_argument('--retries', help='Run any test iteration '
+                                 'whose log is missing results again up to N '
+                                 'times. Defaults to 0.', type=int, default=0)
+    commands_parent.add_argument('--quiesce', help='Instead of pausing for '
+                                 'a fixed time, wait after each test until '
+                                 'storage and network activity on all hosts '
+                                 'stays below --quiesce-threshold for '
+                                 '--quiesce-window seconds. Overrides '
+                                 '--pause.', action='store_true')
+    commands_parent.add_argument('--quiesce-threshold', help='Combined '
+                                 'storage and network throughput per host in '
+                                 'MB/s below which the system is considered '
+                                 'idle while using --quiesce. Defaults to '
+                                 '10.', type=float, default=10.0)
+    commands_parent.add_argument('--quiesce-window', help='Number of seconds '
+                                 'activity needs to stay below the threshold '
+                                 'while using --quiesce. Defaults to 10.',
+                                 type=int, default=10)
+    commands_parent.add_argument('--quiesce-timeout', help='Maximum number of '
+                                 'seconds to wait for activity to settle '
+                                 'while using --quiesce. Defaults to 300.',
+                                 type=int, default=300)
+    commands_parent.add_argument('--resume', help='Resume an interrupted '
+                                 'run in the same log path, skipping all '
+                                 'tests recorded as completed in the journal '
+                                 'and re-running any partially written logs',
+                                 action='store_true')
+    commands_parent.add_argument('--skip-preflight', help='Skip checking '
+                                 'that all hosts are reachable and ready '
+                                 'before running any tests',
+                                 action='store_true')
+    commands_parent.add_argument('--plan', help='List every test that '
+                                 'would be run along with the estimated wall '
+                                 'time and peak capacity used on the '
+                                 'filesystem under test without running any '
+                                 'tests', action='store_true')
+    commands_parent.add_argument('--plan-history', help='Comma-separated list '
+                                 'of log paths from previous runs used to '
+                                 'refine the estimates from --plan. The '
+                                 'current log path is always included.')
+    commands_parent.add_argument('--no-overlap', help='While running all '
+                                 'tests, wait for the NCCL tests to finish '
+                                 'before generating the DALI datasets and '
+                                 'laying out the fio files instead of doing '
+                                 'both at the same time',
+                                 action='store_true')
+    commands_parent.add_argument('--log-compression', help='Compress the '
+                                 'log of every test while it is written. '
+                                 'zstd requires the zstandard package. '
+                                 'Compressed logs can be parsed as usual.',
+                                 choices=COMPRESSION_SUFFIXES.keys())
+    commands_parent.add_argument('--log-mirror', help='Comma-separated list '
+                                 'of additional directories to write a copy '
+                                 'of every log to')
+    commands_parent.add_argument('--log-flush-lines', help='Number of lines '
+                                 'of output to buffer before flushing the '
+                                 'logs to disk. Defaults to 1000.', type=int,
+                                 default=1000)
+    commands_parent.add_argument('--log-flush-interval', help='Maximum number '
+                                 'of seconds between flushing the logs to '
+                                 'disk. Defaults to 1.', type=float,
+                                 default=1.0)
+    commands_parent.add_argument('--progress', help='Show a single live '
+                                 'status line for each test with the current '
+                                 'phase, elapsed time, and latest result '
+                                 'instead of printing all test output. The '
+                                 'full output is still saved to the logs.',
+                                 action='store_true')
+    commands_parent.add_argument('--no-dataset-cache', help='Regenerate the '
+                                 'DALI datasets for every test instead of '
+                                 'generating them once and reusing them for '
+                                 'all iterations and system counts in the '
+                                 'run', action='store_true')
+    commands_parent.add_argument('--no-layout-reuse', help='Lay out new fio '
+                                 'files for every storage test instead of '
+                                 'reusing the files from earlier tests with '
+                                 'the same thread count and file size',
+                                 action='store_true')
+    commands_parent.add_argument('--backend', help='How to run the test '
+                                 'scripts: inside the Bobber container with '
+                                 'docker or podman, through the Bobber agent '
+                                 'in the container with agent, directly on '
+                                 'the host with native, or by replaying the '
+                                 'logs in --replay-path with replay. Defaults '
+                                 'to docker.', choices=BACKENDS,
+                                 default=DOCKER)
+    commands_parent.add_argument('--replay-path', help='Directory of logs '
+                                 'from a previous run to return as the output '
+                                 'of each test with the replay backend.')
 
     # Create the test initiation commands with the general options above
     commands.add_parser(RUN_ALL, help='Run all tests',
@@ -198,7 +392,15 @@ def parse_args(version: str) -> Namespace:
 
     # Options specific to exporting the containers
     export = commands.add_parser(EXPORT, help='Export the container for '
-                                 'multisystem tests')
+                                 'multisystem tests',
+                                 parents=[container_parent])
+    export.add_argument('--compression', help='Compress the exported image '
+                        'with gzip or zstd. zstd requires the zstandard '
+                        'package. Defaults to no compression.',
+                        choices=COMPRESSION_SUFFIXES.keys())
+    export.add_argument('--threads', help='Number of threads to compress the '
+                        f'image with. Defaults to {EXPORT_THREADS}.',
+                        type=int, default=EXPORT_THREADS)
 
     # Options specific to parsing the results
     parse = commands.add_parser(PARSE_RESULTS, help='Parse and display results'
@@ -231,26 +433,83 @@ def parse_args(version: str) -> Namespace:
                        'tolerance level. This value is ignored if not running '
                        'the baseline comparison. Defaults to 0 tolerance.',
                        type=int, default=0)
+    parse.add_argument('--jobs', help='The number of processes to parse the '
+                       'logs with. Parsing is spread across multiple cores '
+                       'for large results directories while producing the '
+                       'same results as a single process. Defaults to 1.',
+                       type=int, default=1)
+    parse.add_argument('--no-cache', help='Parse every log instead of '
+                       'loading the results for unchanged logs from the parse '
+                       'cache in the log directory.', action='store_true')
     parse.add_argument('--verbose', help='Display text-based information for '
                        'each system count in addition to the table.',
                        action='store_true')
 
     # Options specific to building the containers
-    build = commands.add_parser(BUILD, help='Build the container')
+    build = commands.add_parser(BUILD, help='Build the container',
+                                parents=[container_parent])
 
     # Options specific to casting the containers
-    cast = commands.add_parser(CAST, help='Start the container')
+    cast = commands.add_parser(CAST, help='Start the container',
+                               parents=[container_parent])
     cast.add_argument('storage_path', metavar='storage-path', help='Path at '
                       'which the filesystem under test is mounted')
     cast.add_argument('--ignore-gpu', help='Start the Bobber container '
                       'without GPUs', action='store_true')
+    cast.add_argument('--agent-iface', help='Network interface the Bobber '
+                      'agent accepts requests from other hosts on, such as '
+                      '"enp226s0". The agent only accepts requests from the '
+                      'local host when not set.')
 
     # Options specific to loading a Docker image from a local binary
     load = commands.add_parser(LOAD, help='Load a container from a local '
-                               'binary')
-    load.add_argument('filename', help='Filename of local *.tar file of '
-                      'the image to load')
-    return parser.parse_args()
+                               'binary', parents=[container_parent])
+    load.add_argument('filename', help='Filename of local *.tar, *.tar.gz, '
+                      'or *.tar.zst file of the image to load')
+
+    # Options specific to starting the containers on every host
+    cast_all = commands.add_parser(CAST_ALL, help='Start the container on '
+                                   'every host in parallel')
+    cast_all.add_argument('storage_path', metavar='storage-path', help='Path '
+                          'at which the filesystem under test is mounted on '
+                          'every host')
+    cast_all.add_argument('hosts', help='Comma-separated list of hosts to '
+                          'start the container on', type=unique_hosts)
+    cast_all.add_argument('--ignore-gpu', help='Start the Bobber containers '
+                          'without GPUs', action='store_true')
+    cast_all.add_argument('--agent-iface', help='Network interface the Bobber '
+                          'agents accept requests from other hosts on. The '
+                          'agent token is copied from this host to every '
+                          'host. The agents only accept requests from the '
+                          'local host when not set.')
+    cast_all.add_argument('--bobber-command', help='Command to run Bobber on '
+                          'every host. Defaults to "bobber".',
+                          default='bobber')
+
+    # Options specific to loading a Docker image on every host
+    load_all = commands.add_parser(LOAD_ALL, help='Copy a local binary of '
+                                   'the container to every host and load it')
+    load_all.add_argument('filename', help='Filename of local *.tar, '
+                          '*.tar.gz, or *.tar.zst file of the image to load. '
+                          'The file is copied to the same path on every host.')
+    load_all.add_argument('hosts', help='Comma-separated list of hosts to '
+                          'load the container on', type=unique_hosts)
+    load_all.add_argument('--bobber-command', help='Command to run Bobber on '
+                          'every host. Defaults to "bobber".',
+                          default='bobber')
+    args = parser.parse_args()
+    if getattr(args, 'backend', None) == REPLAY and not args.replay_path:
+        parser.error('--replay-path is required with the replay backend')
+    if getattr(args, 'jobs', 1) < 1:
+        parser.error('--jobs must be at least 1')
+    steps = getattr(args, 'sweep_steps', None)
+    if steps and not steps.startswith('geometric'):
+        host_count = len(args.hosts.split(','))
+        largest = max(int(step) for step in steps.split(','))
+        if largest > host_count:
+            parser.error(f'Cannot sweep to {largest} systems with only '
+                         f'{host_count} hosts specified')
+    return args
 
 
 def bobber_version() -> str:
@@ -268,18 +527,24 @@ def bobber_version() -> str:
     return __version__.strip()
 
 
-def load_from_config(config_path: str) -> Namespace:
+def load_from_config(config_path: str, args: Namespace) -> Namespace:
     """
     Load a JSON config file and use those values.
 
     If the --config-path flag is passed, the values should be read directly
-    from that file and used for a new test.
+    from that file and used for a new test. Configs saved by older versions of
+    Bobber don't include every setting, so any setting missing from the config
+    is taken from the arguments parsed from the CLI, which hold the default
+    value unless the flag was passed.
 
     Parameters
     ----------
     config_path : string
         A ``string`` pointing to the JSON config file used during a previous
         test.
+    args : Namespace
+        A ``Namespace`` of the arguments that were passed by the user from the
+        CLI.
 
     Returns
     -------
@@ -289,22 +554,40 @@ def load_from_config(config_path: str) -> Namespace:
     """
     with open(config_path, 'r') as config:
         settings = json.loads(config.read())
-        return Namespace(**settings)
+    defaults = vars(copy(args))
+    defaults.update(settings)
+    return Namespace(**defaults)
 
 
-def save_config(args: Namespace) -> NoReturn:
+def save_config(args: Namespace, cli_args: Namespace) -> NoReturn:
     """
     Save the settings as JSON.
 
     The settings should be saved in the log directory as a JSON object to allow
-    a test to be reproduced later on with identical parameters.
+    a test to be reproduced later on with identical parameters. Flags which
+    only apply to a single invocation, such as --resume and --plan, aren't
+    saved. A --retries flag passed on top of a config from --config-path only
+    applies to that invocation as well, so the value from the config is saved
+    instead.
 
     Parameters
     ----------
     args : Namespace
         A ``Namespace`` of all settings that are used for a test pass.
+    cli_args : Namespace
+        A ``Namespace`` of the arguments that were passed by the user from the
+        CLI.
     """
-    settings = vars(args)
+    settings = {key: value for key, value in vars(args).items()
+                if key not in INVOCATION_FLAGS}
+    if cli_args.config_path and cli_args.retries:
+        with open(cli_args.config_path, 'r') as config:
+            saved = json.loads(config.read())
+        # Older configs without the setting get the default when loaded
+        if 'retries' in saved:
+            settings['retries'] = saved['retries']
+        else:
+            del settings['retries']
     with open(f'{args.log_path}/command_parameters.json', 'w') as fp:
         fp.write(json.dumps(settings))
 
@@ -315,7 +598,10 @@ def load_settings(args: Namespace) -> Namespace:
 
     If the --config-path flag is specified pointing to a JSON file with
     settings used from a previous run, all values will be read directly from
-    that run and used for a new run.
+    that run and used for a new run. Flags which only apply to a single
+    invocation, such as --resume and --plan, are always taken from the CLI,
+    and the --retries flag still applies on top of the config, so an
+    interrupted run can be resumed with the config it was started with.
 
     If the --config-path flag is not specified, new settings will be puled from
     the CLI. While specifying the --system flag, several default parameters are
@@ -337,7 +623,12 @@ def load_settings(args: Namespace) -> Namespace:
         based on the system defaults and the user-specified values.
     """
     if args.config_path:
-        return load_from_config(args.config_path)
+        settings = load_from_config(args.config_path, args)
+        for flag in INVOCATION_FLAGS:
+            setattr(settings, flag, getattr(args, flag))
+        if args.retries:
+            settings.retries = args.retries
+        return settings
     # Create a copy of the arguments so they aren't lost while setting the
     # defaults from the --system flag.
     args_copy = copy(args)
@@ -375,21 +666,37 @@ def execute_command(args: Namespace, version: str) -> NoReturn:
         parse_results.main(args.log_path, args.compare_baseline,
                            args.custom_baseline, args.baseline_tolerance,
                            args.verbose, args.override_version_check,
-                           args.json_filename)
+                           args.json_filename, args.jobs,
+                           not args.no_cache)
     elif args.command == BUILD:
-        bobber.lib.docker.build(version)
+        backends.get_backend(args.backend).build(version)
     elif args.command == EXPORT:
-        bobber.lib.docker.export(version)
+        backends.get_backend(args.backend).export(version, args.compression,
+                                                  args.threads)
     elif args.command == CAST:
-        bobber.lib.docker.cast(args.storage_path, args.ignore_gpu, version)
+        backends.get_backend(args.backend).cast(args.storage_path,
+                                                args.ignore_gpu, version,
+                                                args.agent_iface)
     elif args.command == LOAD:
-        bobber.lib.docker.load(args.filename)
+        backends.get_backend(args.backend).load(args.filename)
+    elif args.command == CAST_ALL:
+        fanout.cast_all(args.hosts, args.storage_path, args.ignore_gpu,
+                        args.bobber_command, args.agent_iface)
+    elif args.command == LOAD_ALL:
+        fanout.load_all(args.hosts, args.filename, args.bobber_command)
     else:
         # Update the version to be used in filenames
         version_underscore = version.replace('.', '_')
+        cli_args = args
         args = load_settings(args)
+        if args.plan:
+            run_plan.print_plan(args)
+            return
+        backends.select(args.backend, args.replay_path)
         create_directory(args.log_path)
-        save_config(args)
+        save_config(args, cli_args)
+        if not args.skip_preflight:
+            preflight.preflight(args, version)
         run_tests.test_selector(args, version_underscore)
 
 
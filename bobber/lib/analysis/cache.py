@@ -0,0 +1,141 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+import sqlite3
+from bobber.__version__ import __version__ as version
+from typing import Any, Callable, NoReturn, Tuple
+
+# The name of the cache of parsed results inside the results directory
+PARSE_CACHE = 'parse_cache.sqlite'
+
+
+class ParseCache:
+    """
+    A persistent cache of the results parsed from every log in a directory.
+
+    The results parsed from each log are saved in a SQLite database inside the
+    results directory, so running parse-results again on the same directory,
+    such as while trying different baselines or tolerances, only parses the
+    logs which have changed. Each result is keyed by the path of the log
+    relative to the directory and is only used while the size and
+    modification time of the log, the parser, and the version of Bobber all
+    match. A directory which can't hold the cache, such as a read-only
+    directory, is parsed without it.
+
+    The cache can be used as a context manager which saves and closes the
+    cache when the context exits.
+
+    Parameters
+    ----------
+    directory : string
+        A ``string`` of the path to the results directory.
+    """
+    def __init__(self, directory: str) -> NoReturn:
+        self.directory = directory
+        self._connection = None
+
+        try:
+            self._connection = sqlite3.connect(os.path.join(directory,
+                                                            PARSE_CACHE))
+            self._connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                     'path TEXT PRIMARY KEY, '
+                                     'size INTEGER, '
+                                     'mtime INTEGER, '
+                                     'parser TEXT, '
+                                     'version TEXT, '
+                                     'results TEXT)')
+        except sqlite3.Error as e:
+            print(f'Warning: Unable to open the parse cache in {directory}: '
+                  f'{e}. Parsing without the cache.')
+            self.close()
+
+    def __enter__(self) -> 'ParseCache':
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+    def _identity(self, log: str) -> Tuple[str, int, int]:
+        """
+        Returns a ``tuple`` of the path to a log relative to the results
+        directory, the size of the log in bytes, and the modification time of
+        the log in nanoseconds.
+        """
+        status = os.stat(log)
+        return (os.path.relpath(log, self.directory), status.st_size,
+                status.st_mtime_ns)
+
+    def get(self, log: str,
+            parser: Callable[[str, int], Any]) -> Tuple[bool, Any]:
+        """
+        Find the cached results for a log.
+
+        Parameters
+        ----------
+        log : string
+            A ``string`` of the path to the log file.
+        parser : function
+            The function which parses the contents of the log, such as
+            `parse_nccl_log`.
+
+        Returns
+        -------
+        tuple
+            Returns a ``tuple`` of a ``boolean`` which is `True` when the
+            results were found in the cache, and the cached results.
+        """
+        if not self._connection:
+            return False, None
+        path, size, mtime = self._identity(log)
+        try:
+            row = self._connection.execute('SELECT size, mtime, parser, '
+                                           'version, results FROM results '
+                                           'WHERE path = ?',
+                                           (path,)).fetchone()
+        except sqlite3.Error:
+            return False, None
+        if row is None or \
+           tuple(row[:4]) != (size, mtime, parser.__name__, version):
+            return False, None
+        return True, json.loads(row[4])
+
+    def put(self, log: str, parser: Callable[[str, int], Any],
+            results: Any) -> NoReturn:
+        """
+        Save the results parsed from a log in the cache.
+
+        Parameters
+        ----------
+        log : string
+            A ``string`` of the path to the log file.
+        parser : function
+            The function which parsed the contents of the log, such as
+            `parse_nccl_log`.
+        results : Any
+            The results from the parser.
+        """
+        if not self._connection:
+            return
+        try:
+            self._connection.execute('INSERT OR REPLACE INTO results VALUES '
+                                     '(?, ?, ?, ?, ?, ?)',
+                                     self._identity(log) +
+                                     (parser.__name__, version,
+                                      json.dumps(results)))
+        except sqlite3.Error as e:
+            print(f'Warning: Unable to update the parse cache: {e}. Parsing '
+                  'without the cache.')
+            self.close()
+
+    def close(self) -> NoReturn:
+        """
+        Save all new results and close the cache.
+        """
+        if not self._connection:
+            return
+        try:
+            self._connection.commit()
+        except sqlite3.Error as e:
+            print(f'Warning: Unable to save the parse cache: {e}')
+        self._connection.close()
+        self._connection = None
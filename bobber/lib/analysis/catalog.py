@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+from collections import defaultdict
+from bobber.lib.analysis.common import (_bobber_version,
+                                        manifest_filename,
+                                        num_systems)
+from typing import NoReturn, Optional
+
+# The log name prefix of every test which can be parsed
+TESTS = ['stg_bw', 'stg_125k', 'stg_iops', 'stg_meta', 'nccl', 'dali']
+
+
+def _read_manifest(log: str) -> Optional[dict]:
+    """
+    Returns a ``dictionary`` of the contents of the manifest for a log, or
+    `None` if the log doesn't have a readable manifest.
+    """
+    try:
+        with open(manifest_filename(log), 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        return {
+            'test': manifest['test'],
+            'systems': int(manifest['systems']),
+            'version': manifest['version'],
+            'attempts': int(manifest.get('attempts', 1))
+        }
+    except (OSError, KeyError, TypeError, ValueError):
+        return None
+
+
+def catalog_entry(log: str) -> dict:
+    """
+    Describe a single log for the catalog.
+
+    The test, number of systems, and Bobber version are read from the
+    manifest written next to the log while the test was running. Logs without
+    a manifest, such as those from older versions of Bobber, are described
+    based on the name of the log instead.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the test, number of systems, Bobber
+        version, and number of attempts of the log. The test is `None` for
+        logs which don't belong to any test.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if the log has no manifest and the version
+        cannot be parsed from the name of the log.
+    """
+    manifest = _read_manifest(log)
+    if manifest:
+        return manifest
+    name = os.path.basename(log)
+    test = None
+
+    for prefix in TESTS:
+        if name.startswith(f'{prefix}_iteration'):
+            test = prefix
+            break
+    return {
+        'test': test,
+        'systems': num_systems(name) if test else None,
+        'version': _bobber_version(name),
+        'attempts': 1
+    }
+
+
+class LogCatalog:
+    """
+    An index of every log in a results directory.
+
+    Every log is described once, and the logs are grouped by test and number
+    of systems so each parser is only given the logs it needs instead of
+    filtering the full list of logs again. Logs from iterations which were
+    retried are tracked along with the number of attempts.
+
+    Parameters
+    ----------
+    log_files : list
+        A ``list`` of ``strings`` of the paths to each log file in the results
+        directory.
+    """
+    def __init__(self, log_files: list) -> NoReturn:
+        self.versions = []
+        self.retried = {}
+        self._index = defaultdict(lambda: defaultdict(list))
+
+        for log in log_files:
+            entry = catalog_entry(log)
+            self.versions.append(entry['version'])
+            if entry['attempts'] > 1:
+                self.retried[log] = entry['attempts']
+            if entry['test']:
+                self._index[entry['test']][entry['systems']].append(log)
+
+    def logs(self, test: str) -> dict:
+        """
+        Returns a ``dictionary`` of the logs for a test, where the key is the
+        number of systems tested and the value is a ``list`` of the paths to
+        every log for that system count.
+        """
+        return self._index.get(test, {})
@@ -1,7 +1,52 @@
 # SPDX-License-Identifier: MIT
+import json
+import os
 import re
-from collections import defaultdict
-from typing import Tuple
+from bobber.lib.system.log_sink import COMPRESSION_SUFFIXES, read_log_lines
+from typing import Any, Callable, NoReturn, Optional, Tuple
+
+# The suffix appended to the name of a log, excluding any suffix for the
+# compression, for the JSON sidecar holding the results parsed from the log
+SIDECAR_SUFFIX = '.json'
+# The suffix appended to the name of a log, excluding any suffix for the
+# compression, for the JSON manifest describing the test which wrote the log
+MANIFEST_SUFFIX = '.manifest.json'
+
+# The members of the fio JSON output the parsers need, as the path to every
+# object whose values are kept, where `None` stands for any element of an
+# array. Only the result of each client, or each job when fio isn't run in
+# client/server mode, is needed, dropping the latency percentiles and other
+# details which make up most of the output.
+FIO_JSON = (
+    ('client_stats', None),
+    ('client_stats', None, 'read'),
+    ('client_stats', None, 'write'),
+    ('jobs', None),
+    ('jobs', None, 'read'),
+    ('jobs', None, 'write')
+)
+# The lines of output each parser needs from a log, as a tuple of patterns
+# for the lines to keep, the lines whose following line is kept as well, the
+# line after which every line is kept, and the members of any JSON output to
+# keep. Keeping every line any parser pattern could match guarantees the
+# results are identical to parsing the full log.
+FIO_LINES = (re.compile(r'/usr/bin/fio --rw|(READ|WRITE): bw=|'
+                        r'(read|write): IOPS='), None, None, FIO_JSON)
+NCCL_LINES = (re.compile(r'float     sum'), None, None, None)
+DALI_LINES = (re.compile(r'RUN 1/1|img/s|OK'),
+              re.compile(r'First image size from '), None, None)
+META_LINES = (None, None, re.compile(r'---------                      '),
+              None)
+# The name of a member of pretty-printed JSON output at the start of a line
+JSON_KEY = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:')
+# The lines of output needed by each parser, keyed by the name of the parser
+PARSER_LINES = {
+    'parse_fio_bw_log': FIO_LINES,
+    'parse_fio_iops_log': FIO_LINES,
+    'parse_meta_log': META_LINES,
+    'parse_nccl_log': NCCL_LINES,
+    'parse_dali_log': DALI_LINES
+}
 
 
 class bcolors:
@@ -15,6 +60,111 @@ class bcolors:
     ENDC = '\033[0m'
 
 
+class LineFilter:
+    """
+    Keep only the lines of a log which a parser needs.
+
+    Every line is checked against the patterns of the parser as it is read,
+    so the memory used is proportional to the lines containing results
+    instead of the size of the log. The kept lines can be passed to the
+    parser in place of the full contents of the log.
+
+    JSON output, which starts with a line containing only an opening brace
+    and ends with a line containing only a closing brace, is followed one
+    line at a time to track the path to the current member. Only the
+    requested members are kept, and the output is only added to the kept
+    lines once it is complete, so output from an interrupted run is dropped
+    as it can't be parsed.
+
+    Parameters
+    ----------
+    lines : tuple
+        A ``tuple`` of the patterns for the lines to keep, the lines whose
+        following line is kept as well, the line after which every line is
+        kept, and the members of any JSON output to keep, such as
+        `FIO_LINES`.
+    """
+    def __init__(self, lines: tuple) -> NoReturn:
+        self._keep, self._keep_next, self._keep_rest, json_paths = lines
+        self._lines = []
+        self._next = False
+        self._rest = False
+        # Every path leading to a kept JSON object, including the objects
+        # themselves, so the members containing them are kept as well
+        self._json_paths = set(json_paths or [])
+        self._json_parents = {path[:length] for path in self._json_paths
+                              for length in range(len(path) + 1)}
+        # The kept lines of the current JSON output and the path to the
+        # current member, starting with the outermost object
+        self._json = None
+        self._path = []
+
+    def _add_json(self, line: str) -> NoReturn:
+        """
+        Follow a single line of JSON output and keep it if it is needed.
+
+        Parameters
+        ----------
+        line : string
+            A ``string`` of a single line of the JSON output without the
+            newline.
+        """
+        stripped = line.strip()
+        key = JSON_KEY.match(line)
+        key = key.group(1) if key else None
+
+        if stripped.startswith(('}', ']')):
+            path = tuple(self._path[1:])
+            self._path.pop()
+            if path in self._json_parents:
+                # Drop the separator left behind by any members which weren't
+                # kept after the last kept member
+                if self._json and not self._json[-1].endswith(('{', '[')):
+                    self._json[-1] = self._json[-1].rstrip(',')
+                self._json.append(line)
+            if not self._path:
+                self._lines.extend(self._json)
+                self._json = None
+        elif stripped.endswith(('{', '[')):
+            self._path.append(key)
+            if tuple(self._path[1:]) in self._json_parents:
+                self._json.append(line)
+        elif tuple(self._path[1:]) in self._json_paths:
+            self._json.append(line)
+
+    def add(self, line: str) -> NoReturn:
+        """
+        Keep a single line if the parser needs it.
+
+        Parameters
+        ----------
+        line : string
+            A ``string`` of a single line of the log without the newline.
+        """
+        if self._json_paths and line == '{':
+            # Restart after any output which was interrupted
+            self._json = []
+            self._path = []
+        if self._json is not None:
+            self._add_json(line)
+            return
+        keep_next = bool(self._keep_next and self._keep_next.search(line))
+        if self._keep_rest and self._keep_rest.search(line):
+            self._rest = True
+        if self._rest or self._next or keep_next or \
+           (self._keep and self._keep.search(line)):
+            self._lines.append(line)
+        self._next = keep_next
+
+    @property
+    def contents(self) -> str:
+        """
+        Returns a ``string`` of every kept line, in the same format as the
+        contents of a log.
+        """
+        return '\n'.join(self._lines) + '\n'
+
+
 def num_systems(log: str) -> int:
     """
     Returns an ``integer`` of the number of systems that were tested during a
@@ -67,7 +217,7 @@ def _bobber_version(log: str) -> str:
     return version.replace('_', '.')
 
 
-def check_bobber_version(logs: list, override: bool) -> str:
+def check_bobber_version(versions: list, override: bool) -> str:
     """
     Ensure the Bobber version matches in all logs being parsed.
 
@@ -79,9 +229,9 @@ def check_bobber_version(logs: list, override: bool) -> str:
 
     Parameters
     ----------
-    logs : list
-        A ``list`` of strings of all of the log filenames in the directory that
-        was passed.
+    versions : list
+        A ``list`` of strings of the Bobber version of every log in the
+        directory that was passed, such as '6.3.1'.
     override : bool
         A ``boolean`` which evaluates to ``True`` when the version-checking
         should be skipped.
@@ -98,8 +248,7 @@ def check_bobber_version(logs: list, override: bool) -> str:
     """
     last_version = None
 
-    for log in logs:
-        version = _bobber_version(log)
+    for version in versions:
         if override:
             return version
         if last_version and version != last_version:
@@ -244,7 +393,7 @@ def fio_command_details(log_contents: str, old_reads: dict,
     """
     commands = re.findall(r'/usr/bin/fio --rw.*', log_contents)
     if len(commands) < 2:
-        raise ValueError(f'FIO command not found in {log} file!')
+        raise ValueError('FIO command not found in log file!')
 
     for command in commands:
         if '--rw=read' in command:
@@ -262,45 +411,114 @@ def fio_command_details(log_contents: str, old_reads: dict,
         else:
             raise ValueError('Unexpected FIO test type. Expected '
                              'read, write, randread, or randwrite.')
+    compare_fio_params(old_reads, old_writes, read_params, write_params)
+    return read_params, write_params
+
+
+def compare_fio_params(old_reads: dict, old_writes: dict, new_reads: dict,
+                       new_writes: dict) -> NoReturn:
+    """
+    Ensure the fio parameters match the previous log.
+
+    Parameters
+    ----------
+    old_reads : dict
+        A ``dictionary`` of the previous read test parameters that were parsed.
+    old_writes : dict
+        A ``dictionary`` of the previous write test parameters that were
+        parsed.
+    new_reads : dict
+        A ``dictionary`` of the read test parameters from the current log.
+    new_writes : dict
+        A ``dictionary`` of the write test parameters from the current log.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if the parameters differ between the logs.
+    """
     if old_reads and old_writes:
-        if not _compare_dicts(old_reads, read_params) or \
-           not _compare_dicts(old_writes, write_params):
+        if not _compare_dicts(old_reads, new_reads) or \
+           not _compare_dicts(old_writes, new_writes):
             raise ValueError('Parameters differ between tests. Ensure only '
                              'tests with the same parameters are used.')
-    return read_params, write_params
 
 
-def divide_logs_by_systems(log_files: list, log_to_match: str) -> dict:
+def _uncompressed_name(log: str) -> str:
+    """
+    Returns a ``string`` of the path to a log without any suffix for the
+    compression.
     """
-    Extract logs on a per-system basis.
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if log.endswith(suffix):
+            log = log[:-len(suffix)]
+    return log
 
-    Given a list of all logs in a directory and a string to match for the log
-    files, extract all of the requested logs and group them together on a
-    per-system basis. For example, matching 'stg_iops' will pull all of the
-    IOPS test logs and combine all of the one-node IOPS logs in a list, then
-    all of the two-node IOPS logs in another list, and so on.
+
+def sidecar_filename(log: str) -> str:
+    """
+    Returns a ``string`` of the path to the JSON sidecar for a log, such as
+    '/logs/nccl_systems_1_version_6_1_1.log.json' for the log
+    '/logs/nccl_systems_1_version_6_1_1.log.gz'.
+    """
+    return _uncompressed_name(log) + SIDECAR_SUFFIX
+
+
+def manifest_filename(log: str) -> str:
+    """
+    Returns a ``string`` of the path to the JSON manifest for a log, such as
+    '/logs/nccl_systems_1_version_6_1_1.log.manifest.json' for the log
+    '/logs/nccl_systems_1_version_6_1_1.log.gz'.
+    """
+    return _uncompressed_name(log) + MANIFEST_SUFFIX
+
+
+def parse_log(log: str, parser: Callable[[str, int], Any], systems: int,
+              parsed: Optional[dict] = None) -> Any:
+    """
+    Parse the results from a single log.
+
+    Results which were already parsed ahead of time, such as in parallel by
+    parse-results, are returned directly. Results which were extracted while
+    the test was running are loaded from the JSON sidecar next to the log, as
+    long as the sidecar was written by the same parser and is at least as new
+    as the log. Otherwise, the log is read one line at a time and only the
+    lines the parser needs are kept and parsed, so logs of any size can be
+    parsed without reading the full log into memory.
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of log filenames from the passed directory to parse.
-    log_to_match : str
-        A ``string`` of the logs to match in the directory. 'stg_iops' will
-        match all logs that begin with 'stg_iops'.
+    log : str
+        A ``string`` of the path to the log file.
+    parser : function
+        The function which parses the contents of a single log, such as
+        `parse_nccl_log`.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
-    dict
-        Returns a ``dictionary`` of all results where the key is the number of
-        nodes being tested and the value is a list of all of the logs that
-        match the filter for that system count.
+    Any
+        Returns the results from the parser.
     """
-    # Divide the results based on the number of systems tested.
-    num_systems_dict = defaultdict(list)
+    if parsed and log in parsed:
+        return parsed[log]
+    sidecar = sidecar_filename(log)
 
-    for log in log_files:
-        if log_to_match not in log:
-            continue
-        systems = num_systems(log)
-        num_systems_dict[systems].append(log)
-    return num_systems_dict
+    try:
+        if os.path.getmtime(sidecar) >= os.path.getmtime(log):
+            with open(sidecar, 'r') as sidecar_file:
+                contents = json.load(sidecar_file)
+            if contents.get('parser') == parser.__name__:
+                return contents['results']
+    # A missing or unreadable sidecar is ignored and the log is parsed instead
+    except (OSError, KeyError, ValueError):
+        pass
+    line_filter = LineFilter(PARSER_LINES[parser.__name__])
+
+    for line in read_log_lines(log):
+        line_filter.add(line.rstrip('\n'))
+    return parser(line_filter.contents, systems)
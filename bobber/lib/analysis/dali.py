@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: MIT
 import re
+from bobber.lib.analysis.common import parse_log
+from typing import Optional
 
 
 def _clean_sizes(sizes: list) -> list:
@@ -139,8 +141,8 @@ def _update_results(image_type_match: dict, results: list) -> dict:
     return image_type_match
 
 
-def _result_parsing(log_contents: str, systems: int, image_results: dict,
-                    log_file: str) -> dict:
+def _result_parsing(log_contents: str, systems: int,
+                    image_results: dict) -> dict:
     """
     Parse the throughput results from the log file.
 
@@ -164,14 +166,13 @@ def _result_parsing(log_contents: str, systems: int, image_results: dict,
     image_results : dict
         A ``dictionary`` of image size information for all image sizes and
         formats.
-    log_file : str
-        A ``string`` of the name of the log file being parsed.
 
     Returns
     -------
     dict
         Returns an updated ``dictionary`` of image size information for all
-        image sizes and formats.
+        image sizes and formats, or an empty ``dictionary`` if the log doesn't
+        contain all four test runs.
     """
     # The result sections are in a strict order, allowing us to
     # deterministically match results with the corresponding image size and
@@ -189,8 +190,6 @@ def _result_parsing(log_contents: str, systems: int, image_results: dict,
 
     test_sections = re.findall(r'RUN 1/1.*?OK', log_contents, re.DOTALL)
     if len(test_sections) != 4:
-        print(f'Warning: Invalid number of results found in {log_file} log '
-              'file. Skipping...')
         return {}
 
     for num, section in enumerate(test_sections):
@@ -221,6 +220,28 @@ def _result_parsing(log_contents: str, systems: int, image_results: dict,
     return image_results
 
 
+def parse_dali_log(log_contents: str, systems: int) -> dict:
+    """
+    Parse the image sizes and throughput from a single DALI log.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents from a DALI log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of image size and throughput information for
+        all image sizes and formats, or an empty ``dictionary`` if the results
+        are invalid.
+    """
+    image_results = _size_parsing(log_contents)
+    return _result_parsing(log_contents, systems, image_results)
+
+
 def _combine_results(results: list, systems: int) -> dict:
     """
     Aggregate all results for N-systems.
@@ -278,13 +299,15 @@ def _combine_results(results: list, systems: int) -> dict:
     return system_results
 
 
-def parse_dali_file(log_files: list, systems: int, results_dict: dict) -> dict:
+def parse_dali_file(log_files: list, systems: int, results_dict: dict,
+                    parsed: Optional[dict] = None) -> dict:
     """
     Parse the aggregate DALI results for N-systems.
 
     Search through each DALI log for N-systems and find the minimum and average
     throughput and bandwidth for all four of the DALI tests of various image
-    sizes and formats.
+    sizes and formats. Results extracted while the tests were running are
+    loaded from the JSON sidecar next to each log instead where available.
 
     Parameters
     ----------
@@ -296,6 +319,9 @@ def parse_dali_file(log_files: list, systems: int, results_dict: dict) -> dict:
         for.
     results_dict : dict
         A ``dictionary`` of the aggregate test results for all system counts.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -306,12 +332,10 @@ def parse_dali_file(log_files: list, systems: int, results_dict: dict) -> dict:
     results = []
 
     for log in log_files:
-        with open(log, 'r') as f:
-            log_contents = f.read()
-        image_results = _size_parsing(log_contents)
-        results.append(_result_parsing(log_contents,
-                                       systems,
-                                       image_results,
-                                       log))
+        image_results = parse_log(log, parse_dali_log, systems, parsed)
+        if image_results == {}:
+            print(f'Warning: Invalid number of results found in {log} log '
+                  'file. Skipping...')
+        results.append(image_results)
     results_dict[systems] = _combine_results(results, systems)
     return results_dict
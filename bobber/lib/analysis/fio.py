@@ -1,7 +1,14 @@
 # SPDX-License-Identifier: MIT
+import json
 import re
-from bobber.lib.analysis.common import fio_command_details
-from typing import Tuple
+from bobber.lib.analysis.common import (compare_fio_params,
+                                        fio_command_details,
+                                        parse_log)
+from typing import NoReturn, Optional, Tuple
+
+# The name fio gives the aggregate results of every client in client/server
+# mode
+ALL_CLIENTS = 'All clients'
 
 
 def clean_iops(iops: str) -> float:
@@ -21,7 +28,7 @@ def clean_iops(iops: str) -> float:
     float
         Returns a ``float`` of the final IOPS value in operations/second.
     """
-    number = float(re.findall(r'\d+', iops)[0])
+    number = float(re.findall(r'\d+(?:\.\d+)?', iops)[0])
     if 'G' in iops:
         ops_per_second = number * 1e9
     elif 'M' in iops:
@@ -62,13 +69,14 @@ def clean_bw(bandwidth: str) -> float:
     return bytes_per_second
 
 
-def fio_bw_results(log_contents: str, systems: int, string_to_match: str,
-                   log: str) -> list:
+def fio_bw_results(log_contents: str, systems: int,
+                   string_to_match: str) -> list:
     """
     Capture the bandwidth results from the log files.
 
     Search the log for any lines containing a bandwidth value and return a
-    final list of all of the parsed values.
+    final list of all of the parsed values. An empty list is returned if the
+    log doesn't contain a result for every system.
 
     Parameters
     ----------
@@ -79,8 +87,6 @@ def fio_bw_results(log_contents: str, systems: int, string_to_match: str,
     string_to_match : str
         A regex ``string`` of the line to pull from the log file to match any
         bandwidth lines.
-    log : str
-        A ``string`` of the name of the log file being parsed.
 
     Returns
     -------
@@ -98,8 +104,6 @@ def fio_bw_results(log_contents: str, systems: int, string_to_match: str,
 
     match = re.findall(string_to_match, log_contents)
     if len(match) != systems:
-        print(f'Warning: Invalid number of results found in {log} log file. '
-              'Skipping...')
         return []
     for result in match:
         bw = re.findall(r'\(\d+[kMG]B/s\)', result)
@@ -112,14 +116,15 @@ def fio_bw_results(log_contents: str, systems: int, string_to_match: str,
     return final_bw
 
 
-def fio_iops_results(log_contents: str, systems: int, string_to_match: str,
-                     log: str) -> list:
+def fio_iops_results(log_contents: str, systems: int,
+                     string_to_match: str) -> list:
     """
     Capture the IOPS results from the log files.
 
     Search the log for any lines containing IOPS values and return a final list
     of all of the parsed values. The FIO IOPS tests print an extra line for
-    multi-node tests and are subsequently dropped.
+    multi-node tests and are subsequently dropped. An empty list is returned
+    if the log doesn't contain a result for every system.
 
     Parameters
     ----------
@@ -130,8 +135,6 @@ def fio_iops_results(log_contents: str, systems: int, string_to_match: str,
     string_to_match : str
         A regex ``string`` of the line to pull from the log file to match any
         IOPS lines.
-    log : str
-        A ``string`` of the name of the log file being parsed.
 
     Returns
     -------
@@ -150,8 +153,6 @@ def fio_iops_results(log_contents: str, systems: int, string_to_match: str,
     match = re.findall(string_to_match, log_contents)
     if (systems == 1 and len(match) != systems) or \
        (systems != 1 and len(match) != systems + 1):
-        print(f'Warning: Invalid number of results found in {log} log file. '
-              'Skipping...')
         return []
     for result in match:
         iops = re.findall(r'[-+]?\d*\.\d+[kMG]|\d+[kMG]|\d+', result)
@@ -167,14 +168,199 @@ def fio_iops_results(log_contents: str, systems: int, string_to_match: str,
     return final_iops
 
 
+def fio_json_outputs(log_contents: str) -> list:
+    """
+    Find the JSON output of every fio run in a log.
+
+    fio prints its JSON output after the human-readable output when run with
+    '--output-format=normal,json'. Every JSON output starts with a line
+    containing only an opening brace and ends with a line containing only a
+    closing brace, which are the only unindented braces in the output.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents from an FIO log file.
+
+    Returns
+    -------
+    list
+        Returns a ``list`` of ``dictionaries`` of the JSON output of every fio
+        run in the order they were run. The list is empty for logs from older
+        versions of Bobber which don't include the JSON output.
+    """
+    outputs = []
+    lines = None
+
+    for line in log_contents.split('\n'):
+        if line == '{':
+            lines = []
+        if lines is None:
+            continue
+        lines.append(line)
+        if line == '}':
+            try:
+                outputs.append(json.loads('\n'.join(lines)))
+            # Output from an interrupted run is incomplete and ignored
+            except ValueError:
+                pass
+            lines = None
+    return outputs
+
+
+def fio_json_results(outputs: list, systems: int, direction: str,
+                     metric: str) -> list:
+    """
+    Capture the results of every client from the fio JSON output.
+
+    The results are taken from the last run which did any I/O in the
+    requested direction, which skips the run laying out the files before the
+    write test. Only the results of each client are included while the
+    aggregate results of all clients are dropped. An empty list is returned
+    if the output doesn't contain a result for every system.
+
+    Parameters
+    ----------
+    outputs : list
+        A ``list`` of ``dictionaries`` of the JSON output of every fio run in
+        a log.
+    systems : int
+        An ``integer`` of the number of systems used during the current test.
+    direction : str
+        A ``string`` of the direction of the results, either 'read' or
+        'write'.
+    metric : str
+        A ``string`` of the name of the result in the fio JSON output, such as
+        'bw_bytes' or 'iops'.
+
+    Returns
+    -------
+    list
+        Returns a ``list`` of ``floats`` of the results of every client.
+    """
+    for output in reversed(outputs):
+        # Only client/server runs include the results as client_stats
+        clients = [client for client in
+                   output.get('client_stats', output.get('jobs', []))
+                   if client.get('jobname') != ALL_CLIENTS]
+        if not any(client.get(direction, {}).get('io_bytes')
+                   for client in clients):
+            continue
+        if len(clients) != systems:
+            return []
+        return [float(client[direction][metric]) for client in clients]
+    return []
+
+
+def _invalid_results(log: str) -> NoReturn:
+    """
+    Warn that a log doesn't contain a result for every system.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the name of the log file being parsed.
+    """
+    print(f'Warning: Invalid number of results found in {log} log file. '
+          'Skipping...')
+
+
+def parse_fio_bw_log(log_contents: str, systems: int) -> dict:
+    """
+    Parse the bandwidth results and test parameters from a single FIO log.
+
+    The results are parsed from the fio JSON output where available. Logs
+    from older versions of Bobber are parsed from the human-readable output
+    instead. The read results are only parsed when the write results are
+    valid.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents from an FIO bandwidth log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the read and write parameters and a
+        ``list`` of the read and write bandwidth of each system in
+        bytes/second. The bandwidth lists are empty when the results are
+        invalid.
+    """
+    read_params, write_params = fio_command_details(log_contents, None, None)
+    outputs = fio_json_outputs(log_contents)
+    read_bw = []
+
+    if outputs:
+        write_bw = fio_json_results(outputs, systems, 'write', 'bw_bytes')
+        if write_bw != []:
+            read_bw = fio_json_results(outputs, systems, 'read', 'bw_bytes')
+    else:
+        write_bw = fio_bw_results(log_contents, systems, 'WRITE: bw=.*')
+        if write_bw != []:
+            read_bw = fio_bw_results(log_contents, systems, 'READ: bw=.*')
+    return {
+        'read params': read_params,
+        'write params': write_params,
+        'read': read_bw,
+        'write': write_bw
+    }
+
+
+def parse_fio_iops_log(log_contents: str, systems: int) -> dict:
+    """
+    Parse the IOPS results and test parameters from a single FIO log.
+
+    The results are parsed from the fio JSON output where available. Logs
+    from older versions of Bobber are parsed from the human-readable output
+    instead.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents from an FIO IOPS log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the read and write parameters and a
+        ``list`` of the read and write IOPS of each system in
+        operations/second. The IOPS lists are empty when the results are
+        invalid.
+    """
+    read_params, write_params = fio_command_details(log_contents, None, None)
+    outputs = fio_json_outputs(log_contents)
+
+    if outputs:
+        read_iops = fio_json_results(outputs, systems, 'read', 'iops')
+        write_iops = fio_json_results(outputs, systems, 'write', 'iops')
+    else:
+        read_iops = fio_iops_results(log_contents, systems, 'read: IOPS=.*')
+        write_iops = fio_iops_results(log_contents, systems,
+                                      'write: IOPS=.*')
+    return {
+        'read params': read_params,
+        'write params': write_params,
+        'read': read_iops,
+        'write': write_iops
+    }
+
+
 def parse_fio_bw_file(log_files: list, systems: int, read_system_results: dict,
-                      write_system_results: dict) -> Tuple[dict, dict, dict,
-                                                           dict]:
+                      write_system_results: dict,
+                      parsed: Optional[dict] = None) -> Tuple[dict, dict,
+                                                              dict, dict]:
     """
     Parse the FIO bandwidth results and test parameters.
 
     Search all log files for read and write parameters used to initiate the
-    test and the final results and return the resulting objects.
+    test and the final results and return the resulting objects. Results
+    extracted while the tests were running are loaded from the JSON sidecar
+    next to each log instead where available.
 
     Parameters
     ----------
@@ -187,6 +373,9 @@ def parse_fio_bw_file(log_files: list, systems: int, read_system_results: dict,
         A ``dictionary`` of the final read results for N-systems.
     write_system_results : dict
         A ``dictionary`` of the final write results for N-systems.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -197,29 +386,33 @@ def parse_fio_bw_file(log_files: list, systems: int, read_system_results: dict,
     read_params, write_params = None, None
 
     for log in log_files:
-        with open(log, 'r') as f:
-            log_contents = f.read()
-        read_params, write_params = fio_command_details(log_contents,
-                                                        read_params,
-                                                        write_params)
-        write_bw = fio_bw_results(log_contents, systems, 'WRITE: bw=.*', log)
-        if write_bw == []:
+        results = parse_log(log, parse_fio_bw_log, systems, parsed)
+        compare_fio_params(read_params, write_params, results['read params'],
+                           results['write params'])
+        read_params = results['read params']
+        write_params = results['write params']
+        if results['write'] == []:
+            _invalid_results(log)
             continue
-        read_bw = fio_bw_results(log_contents, systems, 'READ: bw=.*', log)
-        write_system_results[systems].append(sum(write_bw))
-        read_system_results[systems].append(sum(read_bw))
+        if results['read'] == []:
+            _invalid_results(log)
+        write_system_results[systems].append(sum(results['write']))
+        read_system_results[systems].append(sum(results['read']))
     return read_system_results, write_system_results, read_params, write_params
 
 
 def parse_fio_iops_file(log_files: list, systems: int,
                         read_system_results: dict,
-                        write_system_results: dict) -> Tuple[dict, dict, dict,
-                                                             dict]:
+                        write_system_results: dict,
+                        parsed: Optional[dict] = None) -> Tuple[dict, dict,
+                                                                dict, dict]:
     """
     Parse the FIO IOPS results and test parameters.
 
     Search all log files for read and write parameters used to initiate the
-    test and the final results and return the resulting objects.
+    test and the final results and return the resulting objects. Results
+    extracted while the tests were running are loaded from the JSON sidecar
+    next to each log instead where available.
 
     Parameters
     ----------
@@ -232,6 +425,9 @@ def parse_fio_iops_file(log_files: list, systems: int,
         A ``dictionary`` of the final read results for N-systems.
     write_system_results : dict
         A ``dictionary`` of the final write results for N-systems.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -242,15 +438,14 @@ def parse_fio_iops_file(log_files: list, systems: int,
     read_params, write_params = None, None
 
     for log in log_files:
-        with open(log, 'r') as f:
-            log_contents = f.read()
-        read_params, write_params = fio_command_details(log_contents,
-                                                        read_params,
-                                                        write_params)
-        write_iops = fio_iops_results(log_contents, systems, 'write: IOPS=.*',
-                                      log)
-        read_iops = fio_iops_results(log_contents, systems, 'read: IOPS=.*',
-                                     log)
-        write_system_results[systems].append(sum(write_iops))
-        read_system_results[systems].append(sum(read_iops))
+        results = parse_log(log, parse_fio_iops_log, systems, parsed)
+        compare_fio_params(read_params, write_params, results['read params'],
+                           results['write params'])
+        read_params = results['read params']
+        write_params = results['write params']
+        for result in ['write', 'read']:
+            if results[result] == []:
+                _invalid_results(log)
+        write_system_results[systems].append(sum(results['write']))
+        read_system_results[systems].append(sum(results['read']))
     return read_system_results, write_system_results, read_params, write_params
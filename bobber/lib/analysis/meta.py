@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: MIT
 import re
+from bobber.lib.analysis.common import parse_log
+from typing import Optional
 
 
 def avg(stats: list) -> float:
@@ -129,12 +131,38 @@ def aggregate_results(combined_results: list) -> dict:
     return final_aggregate
 
 
-def parse_meta_file(log_files: list, systems: int, results: dict) -> dict:
+def parse_meta_log(log_contents: str, systems: int) -> Optional[dict]:
+    """
+    Parse the summary table from a single metadata log.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents of a metadata log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the stats for each operation in the
+        summary table, or `None` if the log doesn't contain a summary.
+    """
+    summary = parse_summary(log_contents)
+    if not summary:
+        return None
+    return pull_stats(summary)
+
+
+def parse_meta_file(log_files: list, systems: int, results: dict,
+                    parsed: Optional[dict] = None) -> dict:
     """
     Parse the metadata results from the metadata logs.
 
     Search through each metadata log and extract the operations in the summary
-    table, saving the aggregate results in a dictionary.
+    table, saving the aggregate results in a dictionary. Results extracted
+    while the tests were running are loaded from the JSON sidecar next to each
+    log instead where available.
 
     Parameters
     ----------
@@ -146,6 +174,9 @@ def parse_meta_file(log_files: list, systems: int, results: dict) -> dict:
     results : dict
         A ``dictionary`` of the aggregate metadata results for each system
         count.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -156,14 +187,11 @@ def parse_meta_file(log_files: list, systems: int, results: dict) -> dict:
     combined_results = []
 
     for log in log_files:
-        with open(log, 'r') as f:
-            log_contents = f.read()
-        summary = parse_summary(log_contents)
-        if not summary:
+        stats = parse_log(log, parse_meta_log, systems, parsed)
+        if not stats:
             print(f'Warning: Invalid results found in {log} log file.')
             print('Skipping...')
             continue
-        stats = pull_stats(summary)
         combined_results.append(stats)
     results[systems] = aggregate_results(combined_results)
     return results
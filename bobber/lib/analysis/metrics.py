@@ -0,0 +1,177 @@
+# SPDX-License-Identifier: MIT
+import math
+from collections import defaultdict
+from bobber.lib.analysis.dali import parse_dali_file
+from bobber.lib.analysis.fio import parse_fio_bw_file, parse_fio_iops_file
+from bobber.lib.analysis.meta import parse_meta_file
+from bobber.lib.analysis.nccl import parse_nccl_file
+from typing import Optional
+
+
+# Two-sided critical values of the t-distribution at a 95% confidence level
+# for 1 to 30 degrees of freedom. Larger samples use the normal distribution.
+T_CRITICAL_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306,
+                 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120,
+                 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064,
+                 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+Z_CRITICAL_95 = 1.96
+
+
+def confidence_interval(values: list) -> float:
+    """
+    Find the relative width of the 95% confidence interval of the mean.
+
+    Calculate the half-width of the 95% confidence interval for the mean of
+    the values using the t-distribution and return it as a percentage of the
+    mean. For example, a result of 2.0 indicates the true mean is expected to
+    be within 2% of the sample mean.
+
+    Parameters
+    ----------
+    values : list
+        A ``list`` of ``floats`` of the results from each iteration.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the half-width of the confidence interval as a
+        percentage of the mean. Returns infinity if fewer than two values are
+        passed or the mean is zero.
+    """
+    count = len(values)
+    if count < 2:
+        return math.inf
+    mean = sum(values) / count
+    if mean == 0:
+        return math.inf
+    stdev = math.sqrt(sum((value - mean) ** 2 for value in values) /
+                      (count - 1))
+    if count - 1 <= len(T_CRITICAL_95):
+        critical = T_CRITICAL_95[count - 2]
+    else:
+        critical = Z_CRITICAL_95
+    return critical * stdev / math.sqrt(count) / abs(mean) * 100.0
+
+
+def dali_metric(log: str, systems: int) -> Optional[float]:
+    """
+    Find the main metric of a single DALI log.
+
+    Returns the aggregate average throughput for the 800x600 standard JPEG
+    images in images/second, or `None` if the log is invalid.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the metric, or `None` if not found.
+    """
+    results = parse_dali_file([log], systems, {})
+    value = results[systems]['800x600 standard jpg']['average images/second']
+    return value or None
+
+
+def fio_bw_metric(log: str, systems: int) -> Optional[float]:
+    """
+    Find the main metric of a single FIO bandwidth or 125k bandwidth log.
+
+    Returns the aggregate read bandwidth in bytes/second, or `None` if the log
+    is invalid.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the metric, or `None` if not found.
+    """
+    read, _, _, _ = parse_fio_bw_file([log], systems, defaultdict(list),
+                                      defaultdict(list))
+    if not read[systems]:
+        return None
+    return read[systems][0] or None
+
+
+def fio_iops_metric(log: str, systems: int) -> Optional[float]:
+    """
+    Find the main metric of a single FIO IOPS log.
+
+    Returns the aggregate read IOPS in operations/second, or `None` if the log
+    is invalid.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the metric, or `None` if not found.
+    """
+    read, _, _, _ = parse_fio_iops_file([log], systems, defaultdict(list),
+                                        defaultdict(list))
+    if not read[systems]:
+        return None
+    return read[systems][0] or None
+
+
+def meta_metric(log: str, systems: int) -> Optional[float]:
+    """
+    Find the main metric of a single metadata log.
+
+    Returns the mean file creation rate in operations/second, or `None` if the
+    log is invalid.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the metric, or `None` if not found.
+    """
+    results = parse_meta_file([log], systems, {})
+    if 'File creation' not in results[systems]:
+        return None
+    return results[systems]['File creation']['mean'] or None
+
+
+def nccl_metric(log: str, systems: int) -> Optional[float]:
+    """
+    Find the main metric of a single NCCL log.
+
+    Returns the maximum bus bandwidth in GB/s, or `None` if the log is
+    invalid.
+
+    Parameters
+    ----------
+    log : str
+        A ``string`` of the path to the log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the metric, or `None` if not found.
+    """
+    max_bus_bw, _ = parse_nccl_file([log], systems)
+    return max_bus_bw[0] or None
@@ -1,16 +1,48 @@
 # SPDX-License-Identifier: MIT
 import re
-from typing import Tuple
+from bobber.lib.analysis.common import parse_log
+from typing import Optional, Tuple
 
 
-def parse_nccl_file(log_files: list, systems: int) -> Tuple[list, list]:
+def parse_nccl_log(log_contents: str, systems: int) -> dict:
+    """
+    Find the maximum bus bandwidth and bus bytes from a single NCCL log.
+
+    Parameters
+    ----------
+    log_contents : str
+        A ``string`` of the contents from a NCCL log file.
+    systems : int
+        An ``integer`` of the number of systems used during the test.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the maximum bus bandwidth and the
+        corresponding bus bytes.
+    """
+    out_of_place_results = re.findall('.*float     sum.*', log_contents)
+    results = [line.split() for line in out_of_place_results]
+    bytes_array = [float(result[0]) for result in results]
+    bus_bw_array = [float(result[6]) for result in results]
+    max_index = bus_bw_array.index(max(bus_bw_array))
+    return {
+        'max bus bw': max(bus_bw_array),
+        'bus bytes': bytes_array[max_index]
+    }
+
+
+def parse_nccl_file(log_files: list, systems: int,
+                    parsed: Optional[dict] = None) -> Tuple[list, list]:
     """
     Find the maximum bus bandwidth and bus bytes from NCCL tests.
 
     Parse the bandwidth at all byte sizes achieved during NCCL tests and match
     the maximum bus bandwidth with the corresponding byte size from the
     results. Only the maximum and corresponding byte size from each log are
-    returned to later find the overall average.
+    returned to later find the overall average. Results extracted while the
+    tests were running are loaded from the JSON sidecar next to each log
+    instead where available.
 
     Parameters
     ----------
@@ -19,6 +51,9 @@ def parse_nccl_file(log_files: list, systems: int) -> Tuple[list, list]:
         the results directory.
     systems : int
         An ``integer`` of the number of systems used during the current test.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -30,13 +65,7 @@ def parse_nccl_file(log_files: list, systems: int) -> Tuple[list, list]:
     bus_bytes_list = []
 
     for log in log_files:
-        with open(log, 'r') as f:
-            log_contents = f.read()
-        out_of_place_results = re.findall('.*float     sum.*', log_contents)
-        results = [line.split() for line in out_of_place_results]
-        bytes_array = [float(result[0]) for result in results]
-        bus_bw_array = [float(result[6]) for result in results]
-        max_bus_bw_list.append(max(bus_bw_array))
-        max_index = bus_bw_array.index(max(bus_bw_array))
-        bus_bytes_list.append(bytes_array[max_index])
+        results = parse_log(log, parse_nccl_log, systems, parsed)
+        max_bus_bw_list.append(results['max bus bw'])
+        bus_bytes_list.append(results['bus bytes'])
     return max_bus_bw_list, bus_bytes_list
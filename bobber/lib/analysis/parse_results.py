@@ -2,28 +2,47 @@
 import json
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
-from os.path import join
+from os.path import basename, join
 from bobber.lib.exit_codes import MISSING_LOG_FILES, SUCCESS
 from bobber.lib.analysis.aggregate_results import AggregateResults
-from bobber.lib.analysis.common import (check_bobber_version,
-                                        divide_logs_by_systems)
+from bobber.lib.analysis.cache import ParseCache
+from bobber.lib.analysis.catalog import LogCatalog
+from bobber.lib.analysis.common import check_bobber_version, parse_log
 from bobber.lib.analysis.compare_baseline import compare_baseline
-from bobber.lib.analysis.dali import parse_dali_file
-from bobber.lib.analysis.fio import parse_fio_bw_file, parse_fio_iops_file
-from bobber.lib.analysis.meta import parse_meta_file
-from bobber.lib.analysis.nccl import parse_nccl_file
+from bobber.lib.analysis.dali import parse_dali_file, parse_dali_log
+from bobber.lib.analysis.fio import (parse_fio_bw_file,
+                                     parse_fio_bw_log,
+                                     parse_fio_iops_file,
+                                     parse_fio_iops_log)
+from bobber.lib.analysis.meta import parse_meta_file, parse_meta_log
+from bobber.lib.analysis.nccl import parse_nccl_file, parse_nccl_log
 from bobber.lib.analysis.table import display_table
 from bobber.lib.system.file_handler import write_file
+from bobber.lib.system.log_sink import COMPRESSION_SUFFIXES
 from typing import NoReturn, Optional, Tuple
 
+# The parser for the logs of each test
+PARSERS = {
+    'stg_bw': parse_fio_bw_log,
+    'stg_125k': parse_fio_bw_log,
+    'stg_iops': parse_fio_iops_log,
+    'stg_meta': parse_meta_log,
+    'nccl': parse_nccl_log,
+    'dali': parse_dali_log
+}
+# The number of chunks of logs to split the work of each process into
+CHUNKS_PER_JOB = 4
+
 
 def get_files(directory: str) -> list:
     """
     Read all log files.
 
     Given an input directory as a string, read all log files and return the
-    filenames including the directory as a list.
+    filenames including the directory as a list. Logs compressed with gzip or
+    zstd are included.
 
     Parameters
     ----------
@@ -36,10 +55,77 @@ def get_files(directory: str) -> list:
         Returns a ``list`` of ``strings`` of the paths to each log file in the
         results directory.
     """
-    return glob(join(directory, '*.log'))
+    logs = glob(join(directory, '*.log'))
+    for suffix in COMPRESSION_SUFFIXES.values():
+        logs += glob(join(directory, f'*.log{suffix}'))
+    return logs
 
 
-def parse_fio_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
+def parse_logs(catalog: LogCatalog, jobs: int,
+               cache: Optional[ParseCache] = None) -> dict:
+    """
+    Parse every log ahead of time.
+
+    Results for logs which haven't changed since they were last parsed are
+    loaded from the parse cache where available, and only the remaining logs
+    are parsed. Parsing every log is independent of the other logs, so with
+    multiple jobs the logs are spread across a pool of processes to parse
+    large results directories on multiple cores. Only the parsing is done in
+    parallel; the results are combined afterwards in the same order as
+    parsing serially, so the final results are identical regardless of the
+    number of processes.
+
+    Parameters
+    ----------
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    jobs : int
+        An ``integer`` of the number of processes to parse the logs with.
+    cache : ParseCache (optional)
+        A ``ParseCache`` of the results previously parsed from the logs in the
+        results directory. Every log is parsed if `None`.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` where the key is the path to each log and the
+        value is the results from the parser for the log.
+    """
+    parsed = {}
+    logs, parsers, systems = [], [], []
+
+    for test, parser in PARSERS.items():
+        for system_count, files in catalog.logs(test).items():
+            for log in files:
+                if cache:
+                    found, results = cache.get(log, parser)
+                    if found:
+                        parsed[log] = results
+                        continue
+                logs.append(log)
+                parsers.append(parser)
+                systems.append(system_count)
+    if jobs > 1 and len(logs) > 1:
+        # Sending several logs to each process at a time reduces the overhead
+        # of communicating with the processes for directories with many small
+        # logs
+        chunksize = max(1, len(logs) // (jobs * CHUNKS_PER_JOB))
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(parse_log, logs, parsers, systems,
+                                        chunksize=chunksize))
+    else:
+        results = map(parse_log, logs, parsers, systems)
+    for log, parser, result in zip(logs, parsers, results):
+        parsed[log] = result
+        if cache:
+            cache.put(log, parser, result)
+    return parsed
+
+
+def parse_fio_bw(catalog: LogCatalog,
+                 parsed: Optional[dict] = None) -> \
+        Tuple[dict, dict, dict, dict]:
     """
     Parse all FIO bandwidth logs.
 
@@ -48,9 +134,11 @@ def parse_fio_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -63,18 +151,19 @@ def parse_fio_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
     write_sys_results = defaultdict(list)
     read_params, write_params = None, None
 
-    fio_logs_by_systems = divide_logs_by_systems(log_files, 'stg_bw_iteration')
-
-    for systems, files in fio_logs_by_systems.items():
+    for systems, files in catalog.logs('stg_bw').items():
         read_sys_results, write_sys_results, read_params, write_params = \
             parse_fio_bw_file(files,
                               systems,
                               read_sys_results,
-                              write_sys_results)
+                              write_sys_results,
+                              parsed)
     return read_sys_results, write_sys_results, read_params, write_params
 
 
-def parse_fio_iops(log_files: list) -> Tuple[dict, dict, dict, dict]:
+def parse_fio_iops(catalog: LogCatalog,
+                   parsed: Optional[dict] = None) -> \
+        Tuple[dict, dict, dict, dict]:
     """
     Parse all FIO IOPS logs.
 
@@ -83,9 +172,11 @@ def parse_fio_iops(log_files: list) -> Tuple[dict, dict, dict, dict]:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -98,19 +189,19 @@ def parse_fio_iops(log_files: list) -> Tuple[dict, dict, dict, dict]:
     write_sys_results = defaultdict(list)
     read_params, write_params = None, None
 
-    fio_logs_by_systems = divide_logs_by_systems(log_files,
-                                                 'stg_iops_iteration')
-
-    for systems, files in fio_logs_by_systems.items():
+    for systems, files in catalog.logs('stg_iops').items():
         read_sys_results, write_sys_results, read_params, write_params = \
             parse_fio_iops_file(files,
                                 systems,
                                 read_sys_results,
-                                write_sys_results)
+                                write_sys_results,
+                                parsed)
     return read_sys_results, write_sys_results, read_params, write_params
 
 
-def parse_fio_125k_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
+def parse_fio_125k_bw(catalog: LogCatalog,
+                      parsed: Optional[dict] = None) -> \
+        Tuple[dict, dict, dict, dict]:
     """
     Parse all FIO 125k bandwidth logs.
 
@@ -119,9 +210,11 @@ def parse_fio_125k_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -134,19 +227,18 @@ def parse_fio_125k_bw(log_files: list) -> Tuple[dict, dict, dict, dict]:
     write_sys_results = defaultdict(list)
     read_params, write_params = None, None
 
-    fio_logs_by_systems = divide_logs_by_systems(log_files,
-                                                 'stg_125k_iteration')
-
-    for systems, files in fio_logs_by_systems.items():
+    for systems, files in catalog.logs('stg_125k').items():
         read_sys_results, write_sys_results, read_params, write_params = \
             parse_fio_bw_file(files,
                               systems,
                               read_sys_results,
-                              write_sys_results)
+                              write_sys_results,
+                              parsed)
     return read_sys_results, write_sys_results, read_params, write_params
 
 
-def parse_nccl(log_files: list) -> Tuple[dict, dict]:
+def parse_nccl(catalog: LogCatalog,
+               parsed: Optional[dict] = None) -> Tuple[dict, dict]:
     """
     Parse all NCCL logs.
 
@@ -155,9 +247,11 @@ def parse_nccl(log_files: list) -> Tuple[dict, dict]:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -168,16 +262,15 @@ def parse_nccl(log_files: list) -> Tuple[dict, dict]:
     bw_results = defaultdict(list)
     bytes_results = defaultdict(list)
 
-    nccl_logs_by_systems = divide_logs_by_systems(log_files, 'nccl')
-
-    for systems, files in nccl_logs_by_systems.items():
-        max_bw, byte_size = parse_nccl_file(files, systems)
+    for systems, files in catalog.logs('nccl').items():
+        max_bw, byte_size = parse_nccl_file(files, systems, parsed)
         bw_results[systems] = max_bw
         bytes_results[systems] = byte_size
     return bw_results, bytes_results
 
 
-def parse_dali(log_files: list) -> dict:
+def parse_dali(catalog: LogCatalog,
+               parsed: Optional[dict] = None) -> dict:
     """
     Parse all DALI logs.
 
@@ -186,9 +279,11 @@ def parse_dali(log_files: list) -> dict:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -198,14 +293,14 @@ def parse_dali(log_files: list) -> dict:
     """
     results_dict = {}
 
-    dali_logs_by_systems = divide_logs_by_systems(log_files, 'dali')
-
-    for systems, files in dali_logs_by_systems.items():
-        results_dict = parse_dali_file(files, systems, results_dict)
+    for systems, files in catalog.logs('dali').items():
+        results_dict = parse_dali_file(files, systems, results_dict,
+                                       parsed)
     return results_dict
 
 
-def parse_meta(log_files: list) -> dict:
+def parse_meta(catalog: LogCatalog,
+               parsed: Optional[dict] = None) -> dict:
     """
     Parse all metadata logs.
 
@@ -214,9 +309,11 @@ def parse_meta(log_files: list) -> dict:
 
     Parameters
     ----------
-    log_files : list
-        A ``list`` of ``strings`` of the paths to each log file in the results
-        directory.
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    parsed : dict (optional)
+        A ``dictionary`` of results which were already parsed, where the key
+        is the path to the log and the value is the results from the parser.
 
     Returns
     -------
@@ -226,10 +323,9 @@ def parse_meta(log_files: list) -> dict:
     """
     results_dict = {}
 
-    meta_logs_by_systems = divide_logs_by_systems(log_files, 'stg_meta')
-
-    for systems, files in meta_logs_by_systems.items():
-        results_dict = parse_meta_file(files, systems, results_dict)
+    for systems, files in catalog.logs('stg_meta').items():
+        results_dict = parse_meta_file(files, systems, results_dict,
+                                       parsed)
     return results_dict
 
 
@@ -304,13 +400,98 @@ def save_yaml_baseline(final_dictionary_output: dict,
     write_file(f'{directory}/baseline.yaml', contents)
 
 
+def aggregate_systems(catalog: LogCatalog, jobs: int = 1,
+                      cache: Optional[ParseCache] = None) -> dict:
+    """
+    Aggregate the results for all system counts.
+
+    Parse all of the logs for every test and combine the results for each
+    system count that was tested.
+
+    Parameters
+    ----------
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log file in the results directory.
+    jobs : int (optional)
+        An ``integer`` of the number of processes to parse the logs with.
+        Defaults to parsing every log in the current process.
+    cache : ParseCache (optional)
+        A ``ParseCache`` of the results previously parsed from the logs in the
+        results directory. Every log is parsed if `None`.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` where the key is the number of systems tested
+        and the value is the ``AggregateResults`` for that system count.
+    """
+    aggregates = {}
+
+    parsed = parse_logs(catalog, jobs, cache)
+    bw_results = parse_fio_bw(catalog, parsed)
+    read_bw, write_bw, read_bw_params, write_bw_params = bw_results
+    bw_125k_results = parse_fio_125k_bw(catalog, parsed)
+    read_125k_bw, write_125k_bw, read_125k_bw_params, write_125k_bw_params = \
+        bw_125k_results
+    iops_results = parse_fio_iops(catalog, parsed)
+    read_iops, write_iops, read_iops_params, write_iops_params = iops_results
+    metadata = parse_meta(catalog, parsed)
+    max_bw, bytes_sizes = parse_nccl(catalog, parsed)
+    dali_results = parse_dali(catalog, parsed)
+    # Tests can be run with different system counts, such as sweeps with
+    # custom steps, so all system counts found for any test are included.
+    systems = set()
+
+    for result in [read_bw, read_iops, read_125k_bw, max_bw, dali_results,
+                   metadata]:
+        systems.update(result.keys())
+
+    for system_num in sorted(systems):
+        aggregates[system_num] = AggregateResults(read_bw,
+                                                  write_bw,
+                                                  read_bw_params,
+                                                  write_bw_params,
+                                                  read_iops,
+                                                  write_iops,
+                                                  read_iops_params,
+                                                  write_iops_params,
+                                                  read_125k_bw,
+                                                  write_125k_bw,
+                                                  read_125k_bw_params,
+                                                  write_125k_bw_params,
+                                                  max_bw,
+                                                  bytes_sizes,
+                                                  dali_results,
+                                                  metadata,
+                                                  system_num)
+    return aggregates
+
+
+def display_retries(catalog: LogCatalog) -> NoReturn:
+    """
+    Print every log which came from a retried test iteration.
+
+    Parameters
+    ----------
+    catalog : LogCatalog
+        A ``LogCatalog`` of every log in the results directory.
+    """
+    if not catalog.retried:
+        return
+    print(f'{len(catalog.retried)} log(s) are from retried test iterations:')
+    for log, attempts in sorted(catalog.retried.items()):
+        print(f'    {basename(log)}: attempt {attempts}')
+
+
 def main(directory: str,
          baseline: Optional[str] = None,
          custom_baseline: Optional[str] = None,
          tolerance: Optional[int] = 0,
          verbose: Optional[bool] = False,
          override_version_check: Optional[bool] = False,
-         json_filename: Optional[str] = None) -> NoReturn:
+         json_filename: Optional[str] = None,
+         jobs: Optional[int] = 1,
+         use_cache: Optional[bool] = True) -> NoReturn:
     """
     Parse all results on a per-system level.
 
@@ -342,6 +523,12 @@ def main(directory: str,
         `True`.
     json_filename : str (optional)
         A ``string`` of the filename to save JSON data to.
+    jobs : int (optional)
+        An ``integer`` of the number of processes to parse the logs with.
+    use_cache : bool (optional)
+        A ``boolean`` which loads results for unchanged logs from the parse
+        cache in the results directory and saves new results to it when
+        `True`.
     """
     final_dictionary_output = {'systems': {}}
 
@@ -351,53 +538,22 @@ def main(directory: str,
               'valid logs.')
         print('Exiting...')
         sys.exit(MISSING_LOG_FILES)
-    bobber_version = check_bobber_version(log_files,
+    catalog = LogCatalog(log_files)
+    bobber_version = check_bobber_version(catalog.versions,
                                           override_version_check)
-    bw_results = parse_fio_bw(log_files)
-    read_bw, write_bw, read_bw_params, write_bw_params = bw_results
-    bw_125k_results = parse_fio_125k_bw(log_files)
-    read_125k_bw, write_125k_bw, read_125k_bw_params, write_125k_bw_params = \
-        bw_125k_results
-    iops_results = parse_fio_iops(log_files)
-    read_iops, write_iops, read_iops_params, write_iops_params = iops_results
-    metadata = parse_meta(log_files)
-    max_bw, bytes_sizes = parse_nccl(log_files)
-    dali_results = parse_dali(log_files)
-    total_systems = 0
-    systems = []
-
-    for result in [read_bw, read_iops, read_125k_bw, max_bw, dali_results,
-                   metadata]:
-        try:
-            total_systems = max(result.keys())
-            systems = sorted(result.keys())
-        except ValueError:
-            continue
-        else:
-            break
-
-    for system_num in systems:
-        aggregate = AggregateResults(read_bw,
-                                     write_bw,
-                                     read_bw_params,
-                                     write_bw_params,
-                                     read_iops,
-                                     write_iops,
-                                     read_iops_params,
-                                     write_iops_params,
-                                     read_125k_bw,
-                                     write_125k_bw,
-                                     read_125k_bw_params,
-                                     write_125k_bw_params,
-                                     max_bw,
-                                     bytes_sizes,
-                                     dali_results,
-                                     metadata,
-                                     system_num)
+    display_retries(catalog)
+    if use_cache:
+        with ParseCache(directory) as cache:
+            aggregates = aggregate_systems(catalog, jobs, cache)
+    else:
+        aggregates = aggregate_systems(catalog, jobs)
+
+    for system_num, aggregate in aggregates.items():
         final_dictionary_output['systems'][str(system_num)] = aggregate.json
         if verbose:
             print(aggregate)
 
+    total_systems = max(aggregates.keys(), default=0)
     final_dictionary_output['total_systems'] = total_systems
     final_dictionary_output['bobber_version'] = bobber_version
     display_table(final_dictionary_output)
@@ -0,0 +1,148 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+from bobber.lib.analysis.common import (PARSER_LINES,
+                                        LineFilter,
+                                        num_systems,
+                                        parse_log,
+                                        sidecar_filename)
+from bobber.lib.analysis.dali import parse_dali_log
+from bobber.lib.analysis.fio import parse_fio_bw_log, parse_fio_iops_log
+from bobber.lib.analysis.meta import parse_meta_log
+from bobber.lib.analysis.nccl import parse_nccl_log
+from bobber.lib.system.file_handler import write_file
+from typing import Any, Callable, NoReturn, Optional, Tuple
+
+
+# The log name prefix of each test and the parser for its results
+EXTRACTORS = [
+    ('stg_bw', parse_fio_bw_log),
+    ('stg_125k', parse_fio_bw_log),
+    ('stg_iops', parse_fio_iops_log),
+    ('stg_meta', parse_meta_log),
+    ('nccl', parse_nccl_log),
+    ('dali', parse_dali_log)
+]
+
+
+def _extractor(log_file: str) -> \
+        Optional[Tuple[Callable[[str, int], Any], tuple]]:
+    """
+    Returns a ``tuple`` of the parser and the lines of output the parser needs
+    for a log based on the name of the log, or `None` if the log has no parser.
+    """
+    for prefix, parser in EXTRACTORS:
+        if os.path.basename(log_file).startswith(prefix):
+            return parser, PARSER_LINES[parser.__name__]
+    return None
+
+
+def valid_log(log: str) -> bool:
+    """
+    Determine if a log contains a complete set of results.
+
+    The log is checked with the same parser used by parse-results, which
+    loads the results from the sidecar for the log where available. Logs
+    which would be skipped by parse-results, or which can't be parsed at all,
+    are invalid.
+
+    Parameters
+    ----------
+    log : string
+        A ``string`` of the path to the log file.
+
+    Returns
+    -------
+    bool
+        Returns `True` when the log contains a complete set of results and
+        `False` when not. Logs without a parser are always valid.
+    """
+    extractor = _extractor(log)
+    if not extractor:
+        return True
+    parser, _ = extractor
+    try:
+        results = parse_log(log, parser, num_systems(log))
+    # The parsers raise a variety of errors for incomplete logs.
+    except (IndexError, KeyError, ValueError):
+        return False
+    if parser in [parse_fio_bw_log, parse_fio_iops_log]:
+        return results['read'] != [] and results['write'] != []
+    return bool(results)
+
+
+class ResultExtractor:
+    """
+    Extract the results of a test from its output while the test is running.
+
+    Only the lines of output which contain results or test parameters are
+    kept as the output is written, keeping the memory used to a minimum. Once
+    the test completes, the kept lines are parsed with the same parser used
+    by parse-results and saved as a JSON sidecar next to the log, allowing
+    parse-results to load the sidecar instead of reading the full log.
+
+    Parameters
+    ----------
+    log_file : string
+        A ``string`` of the path to the log file for the test, excluding any
+        suffix for the compression.
+    """
+    def __init__(self, log_file: str) -> NoReturn:
+        self.systems = None
+        self.parser = None
+        self._filter = None
+
+        extractor = _extractor(log_file)
+        if extractor:
+            self.systems = num_systems(log_file)
+            self.parser, lines = extractor
+            self._filter = LineFilter(lines)
+
+    def write(self, text: str) -> NoReturn:
+        """
+        Keep any lines the parser needs from the latest output of the test.
+
+        Parameters
+        ----------
+        text : string
+            A ``string`` of one or more complete lines of output from the test.
+        """
+        if not self.parser:
+            return
+        lines = text.split('\n')
+        if text.endswith('\n'):
+            lines.pop()
+        for line in lines:
+            self._filter.add(line)
+
+    def save(self, log_files: list, attempt: int = 1) -> NoReturn:
+        """
+        Parse the kept output and save the results next to every log.
+
+        Output which can't be parsed, such as from a test that was killed
+        before it finished, isn't saved and is reported by parse-results
+        while parsing the log itself instead.
+
+        Parameters
+        ----------
+        log_files : list
+            A ``list`` of ``strings`` of the paths to every log the output was
+            written to.
+        attempt : int
+            An ``int`` of the attempt number of the test iteration, which is
+            larger than 1 when the iteration was retried. Defaults to 1.
+        """
+        if not self.parser:
+            return
+        try:
+            results = self.parser(self._filter.contents, self.systems)
+        # The parsers raise a variety of errors for incomplete output.
+        except (IndexError, KeyError, ValueError):
+            return
+        contents = json.dumps({
+            'parser': self.parser.__name__,
+            'attempts': attempt,
+            'results': results
+        })
+        for log_file in log_files:
+            write_file(sidecar_filename(log_file), contents)
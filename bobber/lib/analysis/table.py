@@ -65,27 +65,31 @@ def iops_to_kiops(number: float) -> float:
     return round(number * 1e-3, 3)
 
 
-def scale(values: list) -> float:
+def scale(values: list, systems: list) -> float:
     """
     Calculate the scaling factor of results.
 
     Calculate the scale by determining the slope of the line of best fit and
-    dividing by the first value in the results, plus 1.
+    dividing by the per-system value of the first result, plus 1. The line is
+    fit against the actual system counts so sweeps with unevenly spaced system
+    counts, such as 1, 2, 4, and 8 nodes, are weighted correctly.
 
     Parameters
     ----------
     values : list
         A ``list`` of ``floats`` to calculate the scale factor for.
+    systems : list
+        A ``list`` of ``ints`` of the system count for each value.
 
     Returns
     -------
     float
         Returns a ``float`` of the scaling factor.
     """
-    x = np.array(range(1, len(values) + 1))
+    x = np.array(systems)
     y = np.array(values)
     slope, _ = np.polyfit(x, y, 1)
-    return slope / values[0] + 1.0
+    return slope / (values[0] / systems[0]) + 1.0
 
 
 def fio_bw(results: list) -> Tuple[list, list]:
@@ -264,7 +268,7 @@ def dali(results: list) -> Tuple[list, list, list, list, list, list, list,
                 tf_lg_bw]
 
 
-def add_scale(data: list) -> NoReturn:
+def add_scale(data: list, systems: list) -> NoReturn:
     """
     Add the scaling factor to results.
 
@@ -277,6 +281,8 @@ def add_scale(data: list) -> NoReturn:
     ----------
     data : list
         A ``list`` of ``lists`` of all categories of results.
+    systems : list
+        A sorted ``list`` of ``ints`` of the system counts in the results.
     """
     for subset in data:
         # No results in the data - just the test category name
@@ -290,7 +296,7 @@ def add_scale(data: list) -> NoReturn:
             subset += ['N/A']
             continue
         values = subset[1:]
-        scale_val = round(scale(values), 2)
+        scale_val = round(scale(values, systems), 2)
         if scale_val > 1.9:
             scale_text = f'{bcolors.PASS}{scale_val}X{bcolors.ENDC}'
         elif scale_val > 1.5:
@@ -314,11 +320,15 @@ def display_table(json_results: dict) -> NoReturn:
         results directory.
     """
     data = []
+    # The system counts are saved as strings in the JSON output and need to be
+    # sorted numerically to keep sweeps of 10 or more systems in order.
+    results = sorted(json_results['systems'].items(),
+                     key=lambda result: int(result[0]))
+    systems = [int(num) for num, _ in results]
     headers = [f'{bcolors.BOLD}Test{bcolors.ENDC}'] + \
               [f'{bcolors.BOLD}{num} Node(s){bcolors.ENDC}'
-               for num in sorted(json_results['systems'])] + \
+               for num in systems] + \
               [f'{bcolors.BOLD}Scale{bcolors.ENDC}']
-    results = sorted(json_results['systems'].items())
 
     data += fio_bw(results)
     data += fio_iops(results)
@@ -326,7 +336,7 @@ def display_table(json_results: dict) -> NoReturn:
     data += nccl(results)
     data += dali(results)
 
-    add_scale(data)
+    add_scale(data, systems)
 
     print(tabulate(data, headers=headers, tablefmt='grid', numalign='right'))
     print()
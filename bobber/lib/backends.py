@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+from bobber.lib.constants import AGENT, DOCKER, NATIVE, PODMAN, REPLAY
+from bobber.lib.docker import manager, podman
+from bobber.lib.system.agent import AgentBackend
+from bobber.lib.system.execution import ExecutionBackend
+from bobber.lib.system.native import NativeBackend
+from bobber.lib.system.replay import ReplayBackend
+from typing import NoReturn, Optional
+
+# The backend used to run every test command, defaulting to Docker
+_backend = manager
+
+
+def get_backend(name: str,
+                replay_path: Optional[str] = None) -> ExecutionBackend:
+    """
+    Create an execution backend.
+
+    Parameters
+    ----------
+    name : string
+        A ``string`` of the name of the backend, such as 'docker'.
+    replay_path : string (Optional)
+        A ``string`` of the path to the directory of logs to replay for the
+        replay backend.
+
+    Returns
+    -------
+    ExecutionBackend
+        Returns an ``ExecutionBackend`` for running test commands. The Docker
+        and Podman backends also manage the Bobber image and container.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if the backend is unknown or the replay
+        backend is requested without a replay directory.
+    """
+    if name == DOCKER:
+        return manager
+    if name == PODMAN:
+        return podman
+    if name == NATIVE:
+        return NativeBackend()
+    if name == REPLAY:
+        if not replay_path:
+            raise ValueError('Error: The replay backend requires a directory '
+                             'of logs to replay with --replay-path.')
+        return ReplayBackend(replay_path)
+    if name == AGENT:
+        return AgentBackend()
+    raise ValueError(f'Error: Unknown execution backend "{name}".')
+
+
+def select(name: str, replay_path: Optional[str] = None) -> NoReturn:
+    """
+    Select the backend used to run every test command.
+
+    See `get_backend` for a description of all parameters.
+    """
+    global _backend
+    _backend = get_backend(name, replay_path)
+
+
+def selected() -> ExecutionBackend:
+    """
+    Returns the ``ExecutionBackend`` used to run every test command.
+    """
+    return _backend
+
+
+def capture(*args, **kwargs) -> tuple:
+    """
+    Capture the output of a command with the selected backend. See
+    `ExecutionBackend.capture` for a description of all parameters.
+    """
+    return _backend.capture(*args, **kwargs)
+
+
+def execute(*args, **kwargs) -> Optional[int]:
+    """
+    Execute a command with the selected backend. See
+    `ExecutionBackend.execute` for a description of all parameters.
+    """
+    return _backend.execute(*args, **kwargs)
@@ -3,6 +3,18 @@ BUILD = 'build'
 EXPORT = 'export'
 CAST = 'cast'
 LOAD = 'load'
+CAST_ALL = 'cast-all'
+LOAD_ALL = 'load-all'
+
+# Execution backends for running the test scripts
+DOCKER = 'docker'
+PODMAN = 'podman'
+NATIVE = 'native'
+REPLAY = 'replay'
+AGENT = 'agent'
+BACKENDS = [DOCKER, PODMAN, NATIVE, REPLAY, AGENT]
+# Backends which run the test scripts in the Bobber container
+CONTAINER_BACKENDS = [DOCKER, PODMAN]
 PARSE_RESULTS = 'parse-results'
 RUN_ALL = 'run-all'
 RUN_DALI = 'run-dali'
@@ -65,6 +77,81 @@ WRITE_PATTERNS = {
     'randwrite'
 }
 
+# Metrics which can be used to find where scaling breaks down with the
+# --find-knee flag, mapped to the keys of the parsed results for N-systems.
+KNEE_METRICS = {
+    'fio-read-bw': ('bandwidth', 'read'),
+    'fio-write-bw': ('bandwidth', 'write'),
+    'fio-read-iops': ('iops', 'read'),
+    'fio-write-iops': ('iops', 'write'),
+    'fio-125k-read-bw': ('125k_bandwidth', 'read'),
+    'fio-125k-write-bw': ('125k_bandwidth', 'write'),
+    'dali-800x600-jpg': ('dali', '800x600 standard jpg',
+                         'average images/second'),
+    'dali-3840x2160-jpg': ('dali', '3840x2160 standard jpg',
+                           'average images/second'),
+    'dali-800x600-tfrecord': ('dali', '800x600 tfrecord',
+                              'average images/second'),
+    'dali-3840x2160-tfrecord': ('dali', '3840x2160 tfrecord',
+                                'average images/second')
+}
+
+# Fixed fio timing from STDOPTS in setup_fio.sh, in seconds. Every fio test
+# runs one write and one read pass.
+FIO_START_DELAY = 5
+FIO_RAMP_TIME = 3
+FIO_RUNTIME = 180
+FIO_PASSES = 2
+# Size of the file written by every fio job, matching SIZE in setup_fio.sh
+FIO_FILE_SIZE = 4096 * 1024 * 1024
+# Number of fio jobs used when no thread count is set, matching fio_multi.sh
+FIO_DEFAULT_THREADS = 80
+
+# Epochs run by call_dali_multi.sh for each of the DALI pipelines
+DALI_EPOCHS = 11
+DALI_PIPELINES = 4
+# Images generated per GPU for each DALI dataset, matching dali_dataset.sh
+DALI_IMAGES_PER_GPU = 1000
+DALI_RESOLUTIONS = [(800, 600), (3840, 2160)]
+# Number of GPUs used when no GPU count is set, matching dali_dataset.sh
+DALI_DEFAULT_GPUS = 8
+
+# Rough durations in seconds for the parts of a test which depend entirely on
+# the hardware under test, used by --plan when no previous run is available.
+PLAN_DEFAULT_SECONDS = {
+    'nccl': 120,
+    'stg_meta': 900,
+    'fio_layout': 600,
+    'dali_epoch': 30,
+    'dali_datasets': 900
+}
+
+# Written to the log of any test which is killed after a timeout
+TIMEOUT_MESSAGE = 'BOBBER TIMEOUT'
+
+# Flags which only apply to a single invocation of Bobber and are never saved
+# in the config of a run
+INVOCATION_FLAGS = ['resume', 'plan']
+
+# Size of the uncompressed blocks an exported image is split into. Every block
+# is compressed independently, allowing them to be compressed in parallel and
+# an interrupted export to resume after the last complete block.
+EXPORT_BLOCK_SIZE = 32 * 1024 * 1024
+# Number of blocks compressed at once while exporting an image by default
+EXPORT_THREADS = 8
+# Image label holding the SHA-256 checksum of the build context and build
+# arguments the image was built from
+CONTEXT_HASH_LABEL = 'com.nvidia.bobber.context-sha256'
+
+# Directory shared between the host and the Bobber container for the socket of
+# the Bobber agent
+AGENT_DIRECTORY = '/run/bobber'
+# Socket the Bobber agent listens on for commands from the local host
+AGENT_SOCKET = f'{AGENT_DIRECTORY}/agent.sock'
+# Token shared by the Bobber agents on every host to authenticate requests
+# from other hosts, created by "bobber cast"
+AGENT_TOKEN = f'{AGENT_DIRECTORY}/agent_token'
+
 # Baseline Results
 # This is considered a minimum value that tests should hit in order to be
 # verified the system has been configured properly for HPC and AI workloads.
@@ -1,12 +1,14 @@
 # SPDX-License-Identifier: MIT
 import docker
-from bobber.lib.docker.management import DockerManager
+from bobber.lib.docker.management import DockerManager, PodmanManager
 
 manager = DockerManager()
+podman = PodmanManager()
 
 # Map the instance methods to allow importing as "bobber.docker.<instance>"
 # in other modules.
 build = manager.build
+capture = manager.capture
 cast = manager.cast
 execute = manager.execute
 export = manager.export
@@ -0,0 +1,376 @@
+# SPDX-License-Identifier: MIT
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from bobber.lib.constants import EXPORT_BLOCK_SIZE
+from bobber.lib.system.log_sink import COMPRESSION_SUFFIXES, _zstandard
+from typing import Any, Iterator, NoReturn, Optional
+
+
+# The suffix appended to the archive filename for its checksum manifest
+MANIFEST_SUFFIX = '.manifest.json'
+# Number of bytes to read from an archive at a time while loading it
+READ_SIZE = 1024 * 1024
+
+
+class _HashingReader:
+    """
+    Read a file while calculating the SHA-256 checksum of everything read.
+
+    Parameters
+    ----------
+    filename : string
+        A ``string`` of the path to the file to read.
+    """
+    def __init__(self, filename: str) -> NoReturn:
+        self.digest = hashlib.sha256()
+        self._file = open(filename, 'rb')
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self.digest.update(data)
+        return data
+
+    def close(self) -> NoReturn:
+        self._file.close()
+
+
+def archive_filename(tag: str, compression: Optional[str] = None) -> str:
+    """
+    Returns a ``string`` of the filename to export an image to, such as
+    'nvidia_bobber_5.0.0.tar.zst' for 'nvidia/bobber:5.0.0' with zstd
+    compression.
+    """
+    filename = tag.replace('/', '_').replace(':', '_') + '.tar'
+    return filename + COMPRESSION_SUFFIXES.get(compression, '')
+
+
+def manifest_filename(archive: str) -> str:
+    """
+    Returns a ``string`` of the filename of the checksum manifest for an
+    archive, such as 'nvidia_bobber_5.0.0.tar.zst.manifest.json'.
+    """
+    return archive + MANIFEST_SUFFIX
+
+
+def _read_manifest(archive: str) -> Optional[dict]:
+    """
+    Returns a ``dictionary`` of the checksum manifest for an archive, or
+    `None` if the archive doesn't have a valid manifest.
+    """
+    try:
+        with open(manifest_filename(archive), 'r') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(archive: str, manifest: dict) -> NoReturn:
+    """
+    Save the checksum manifest for an archive.
+
+    The manifest is written to a temporary file first and moved into place so
+    an interrupted export never leaves a partially written manifest.
+
+    Parameters
+    ----------
+    archive : string
+        A ``string`` of the path to the archive.
+    manifest : dict
+        A ``dictionary`` of the checksum manifest to save.
+    """
+    temporary = manifest_filename(archive) + '.tmp'
+    with open(temporary, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(temporary, manifest_filename(archive))
+
+
+def _blocks(stream: Iterator[bytes], block_size: int) -> Iterator[bytes]:
+    """
+    Split a stream of chunks of any size into blocks of a fixed size.
+
+    Parameters
+    ----------
+    stream : generator
+        A ``generator`` of ``bytes`` of any size.
+    block_size : int
+        An ``int`` of the number of bytes in every block. The final block may
+        be smaller.
+
+    Returns
+    -------
+    generator
+        Returns a ``generator`` of ``bytes`` of every block.
+    """
+    buffered = []
+    length = 0
+
+    for chunk in stream:
+        buffered.append(chunk)
+        length += len(chunk)
+        if length < block_size:
+            continue
+        data = b''.join(buffered)
+        while len(data) >= block_size:
+            yield data[:block_size]
+            data = data[block_size:]
+        buffered = [data]
+        length = len(data)
+    if length:
+        yield b''.join(buffered)
+
+
+def _compress(block: bytes, compression: Optional[str]) -> bytes:
+    """
+    Compress a single block as a standalone gzip member or zstd frame.
+
+    Parameters
+    ----------
+    block : bytes
+        A ``bytes`` object of the uncompressed block.
+    compression : string (Optional)
+        A ``string`` of the compression type, either 'gzip' or 'zstd'. The
+        block is returned as-is if `None`.
+
+    Returns
+    -------
+    bytes
+        Returns a ``bytes`` object of the compressed block.
+    """
+    if compression == 'gzip':
+        # gzip.compress only accepts an mtime on Python 3.8 and newer
+        compressed = io.BytesIO()
+        with gzip.GzipFile(fileobj=compressed, mode='wb', compresslevel=6,
+                           mtime=0) as member:
+            member.write(block)
+        return compressed.getvalue()
+    if compression == 'zstd':
+        return _zstandard().ZstdCompressor().compress(block)
+    return block
+
+
+def _completed_blocks(archive: str, manifest: dict,
+                      digest: Any) -> int:
+    """
+    Verify the blocks written by an interrupted export.
+
+    Every block listed in the manifest is compared against its checksum. The
+    archive and the manifest are truncated after the last valid block and the
+    contents of all valid blocks are added to the checksum of the archive.
+
+    Parameters
+    ----------
+    archive : string
+        A ``string`` of the path to the archive.
+    manifest : dict
+        A ``dictionary`` of the checksum manifest of the archive.
+    digest : hash
+        The ``hashlib`` SHA-256 checksum of the full archive to update.
+
+    Returns
+    -------
+    int
+        Returns an ``int`` of the number of valid blocks.
+    """
+    offset = 0
+    completed = 0
+
+    with open(archive, 'r+b') as archive_file:
+        for block in manifest['blocks']:
+            data = archive_file.read(block['size'])
+            if len(data) != block['size'] or \
+               hashlib.sha256(data).hexdigest() != block['sha256']:
+                break
+            digest.update(data)
+            offset += len(data)
+            completed += 1
+        archive_file.truncate(offset)
+    manifest['blocks'] = manifest['blocks'][:completed]
+    return completed
+
+
+def _append_block(archive: str, archive_file: io.BufferedWriter,
+                  manifest: dict, digest: Any,
+                  data: bytes) -> NoReturn:
+    """
+    Write a compressed block to the archive and list it in the manifest.
+
+    The block is flushed to disk before the manifest is updated so the
+    manifest never lists a block which wasn't fully written.
+
+    Parameters
+    ----------
+    archive : string
+        A ``string`` of the path to the archive.
+    archive_file : BufferedWriter
+        The open archive to append the block to.
+    manifest : dict
+        A ``dictionary`` of the checksum manifest of the archive.
+    digest : hash
+        The ``hashlib`` SHA-256 checksum of the full archive to update.
+    data : bytes
+        A ``bytes`` object of the compressed block.
+    """
+    archive_file.write(data)
+    archive_file.flush()
+    os.fsync(archive_file.fileno())
+    digest.update(data)
+    manifest['blocks'].append({
+        'size': len(data),
+        'sha256': hashlib.sha256(data).hexdigest()
+    })
+    _write_manifest(archive, manifest)
+
+
+def write_archive(stream: Iterator[bytes], archive: str, image_id: str,
+                  compression: Optional[str] = None,
+                  threads: int = 1) -> NoReturn:
+    """
+    Save an image to a compressed, checksummed archive.
+
+    The image is split into fixed-size blocks which are compressed in
+    parallel and written to the archive in order. Every compressed block is a
+    standalone gzip member or zstd frame, so the archive can be decompressed
+    by standard tools, including "docker load" for gzip archives. The size and
+    checksum of every block is saved in a manifest next to the archive as soon
+    as the block is written, followed by the checksum of the full archive once
+    the export completes.
+
+    If the manifest belongs to an interrupted export of the same image with
+    the same compression, all valid blocks are kept and the export resumes
+    after the last one.
+
+    Parameters
+    ----------
+    stream : generator
+        A ``generator`` of ``bytes`` of the uncompressed image.
+    archive : string
+        A ``string`` of the path to save the archive to.
+    image_id : string
+        A ``string`` of the ID of the image being exported.
+    compression : string (Optional)
+        A ``string`` of the compression type, either 'gzip' or 'zstd'. The
+        archive is not compressed if `None`.
+    threads : int
+        An ``int`` of the number of blocks to compress at once. Defaults to 1.
+    """
+    digest = hashlib.sha256()
+    manifest = _read_manifest(archive)
+    skip = 0
+
+    if manifest and os.path.exists(archive) and \
+       manifest.get('image id') == image_id and \
+       manifest.get('compression') == compression and \
+       manifest.get('block size') == EXPORT_BLOCK_SIZE:
+        if manifest.get('complete') and \
+           os.path.getsize(archive) == manifest.get('size'):
+            print(f'{archive} is already complete')
+            return
+        manifest['complete'] = False
+        skip = _completed_blocks(archive, manifest, digest)
+        print(f'Resuming the interrupted export after {skip} block(s)')
+    else:
+        manifest = {
+            'image id': image_id,
+            'compression': compression,
+            'block size': EXPORT_BLOCK_SIZE,
+            'blocks': [],
+            'complete': False
+        }
+        open(archive, 'wb').close()
+        _write_manifest(archive, manifest)
+
+    blocks = islice(_blocks(stream, EXPORT_BLOCK_SIZE), skip, None)
+    with open(archive, 'ab') as archive_file, \
+            ThreadPoolExecutor(max_workers=threads) as executor:
+        # Limit the number of blocks held in memory at once
+        pending = deque()
+        for block in blocks:
+            pending.append(executor.submit(_compress, block, compression))
+            if len(pending) >= threads:
+                _append_block(archive, archive_file, manifest, digest,
+                              pending.popleft().result())
+        while pending:
+            _append_block(archive, archive_file, manifest, digest,
+                          pending.popleft().result())
+
+    manifest['complete'] = True
+    manifest['size'] = sum(block['size'] for block in manifest['blocks'])
+    manifest['sha256'] = digest.hexdigest()
+    _write_manifest(archive, manifest)
+
+
+def _read_blocks(archive: str, manifest: Optional[dict]) -> Iterator[bytes]:
+    """
+    Read and decompress an archive, verifying its checksum.
+
+    See `read_archive` for a description of all parameters.
+    """
+    raw = _HashingReader(archive)
+    errors = (EOFError, OSError)
+
+    if archive.endswith(COMPRESSION_SUFFIXES['gzip']):
+        reader = gzip.GzipFile(fileobj=raw, mode='rb')
+    elif archive.endswith(COMPRESSION_SUFFIXES['zstd']):
+        zstandard = _zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw, read_across_frames=True)
+        errors += (zstandard.ZstdError,)
+    else:
+        reader = raw
+    try:
+        while True:
+            data = reader.read(READ_SIZE)
+            if not data:
+                break
+            yield data
+        # Include anything left after the compressed data in the checksum
+        while raw.read(READ_SIZE):
+            pass
+    except errors as e:
+        raise ValueError(f'Error: {archive} is corrupt: {e}')
+    finally:
+        raw.close()
+    if manifest and raw.digest.hexdigest() != manifest['sha256']:
+        raise ValueError(f'Error: The checksum of {archive} does not match '
+                         'its manifest. Copy the archive again.')
+
+
+def read_archive(archive: str) -> Iterator[bytes]:
+    """
+    Read an image from an archive.
+
+    Archives ending in '.gz' or '.zst' are decompressed while they are read,
+    without writing an uncompressed copy to disk. If the archive has a
+    manifest, the checksum of the archive is verified while it is read and an
+    error is raised once the end is reached if it doesn't match.
+
+    Parameters
+    ----------
+    archive : string
+        A ``string`` of the path to the archive.
+
+    Returns
+    -------
+    generator
+        Returns a ``generator`` of ``bytes`` of the uncompressed image.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if the export of the archive was interrupted,
+        the archive can't be decompressed, or the checksum doesn't match.
+    """
+    manifest = _read_manifest(archive)
+    if manifest and not manifest.get('complete'):
+        raise ValueError(f'Error: The export to {archive} was interrupted. '
+                         'Run "bobber export" again with the same options to '
+                         'finish it.')
+    return _read_blocks(archive, manifest)
@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: MIT
+import hashlib
+import io
+import os
+import tarfile
+from typing import Tuple
+
+
+# The directory containing the Bobber package, such as '.../bobber'
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+# The Dockerfile, relative to the package directory
+DOCKERFILE = os.path.join('lib', 'docker', 'Dockerfile')
+# The directory of scripts copied into the image, relative to the package
+# directory
+TEST_SCRIPTS = 'test_scripts'
+# Directories and file extensions inside the test scripts which are generated
+# on the local host, such as by running agent.py, and are never copied
+IGNORED_DIRECTORIES = ['__pycache__']
+IGNORED_EXTENSIONS = ('.pyc', '.pyo')
+
+
+def context_files() -> list:
+    """
+    Find every file in the build context.
+
+    The build context only contains the Dockerfile and the test scripts which
+    are copied into the image, keeping the context small and ensuring changes
+    to any other file in the package don't alter the image. Python bytecode
+    generated on the local host is skipped so the context is the same on
+    every host.
+
+    Returns
+    -------
+    list
+        Returns a sorted ``list`` of ``tuples`` of (``string``, ``string``)
+        of the path of each file inside the build context and the absolute
+        path to the file on disk.
+    """
+    files = [('Dockerfile', os.path.join(PACKAGE_PATH, DOCKERFILE))]
+    scripts = os.path.join(PACKAGE_PATH, TEST_SCRIPTS)
+
+    for directory, directories, filenames in os.walk(scripts):
+        directories[:] = [name for name in directories
+                          if name not in IGNORED_DIRECTORIES]
+        for filename in filenames:
+            if filename.endswith(IGNORED_EXTENSIONS):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, PACKAGE_PATH)
+            files.append((name.replace(os.sep, '/'), path))
+    return sorted(files)
+
+
+def build_context(buildargs: dict) -> Tuple[io.BytesIO, str]:
+    """
+    Create the build context for the image and its checksum.
+
+    The context is a tarball of the Dockerfile and the test scripts with all
+    metadata other than the executable bit removed, so the same inputs always
+    produce the same context. The checksum covers the name, mode, and
+    contents of every file along with the build arguments, so any change to
+    the inputs of the image changes the checksum.
+
+    Parameters
+    ----------
+    buildargs : dict
+        A ``dictionary`` of the build arguments passed to the Dockerfile.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``BytesIO``, ``string``) of the tarball of the
+        build context and the SHA-256 checksum of the inputs.
+    """
+    digest = hashlib.sha256()
+    context = io.BytesIO()
+
+    for name, value in sorted(buildargs.items()):
+        digest.update(f'ARG {name}={value}\n'.encode('utf-8'))
+    with tarfile.open(fileobj=context, mode='w') as tarball:
+        for name, path in context_files():
+            with open(path, 'rb') as context_file:
+                contents = context_file.read()
+            info = tarfile.TarInfo(name)
+            info.size = len(contents)
+            # Only keep the executable bit so the checksum doesn't depend on
+            # the umask of the host
+            info.mode = 0o755 if os.access(path, os.X_OK) else 0o644
+            tarball.addfile(info, io.BytesIO(contents))
+            digest.update(f'FILE {name} {info.mode:o} {info.size}\n'
+                          .encode('utf-8'))
+            digest.update(contents)
+    context.seek(0)
+    return context, digest.hexdigest()
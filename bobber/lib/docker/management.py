@@ -1,19 +1,35 @@
 # SPDX-License-Identifier: MIT
 import docker
 import os
+import shlex
 import sys
 from bobber.__version__ import __version__ as version
+from bobber.lib.constants import (AGENT_DIRECTORY,
+                                  CONTEXT_HASH_LABEL,
+                                  EXPORT_THREADS)
+from bobber.lib.docker.archive import (archive_filename,
+                                       manifest_filename,
+                                       read_archive,
+                                       write_archive)
+from bobber.lib.docker.context import build_context
+from bobber.lib.system.agent import create_agent_token
 from bobber.lib.exit_codes import (CONTAINER_NOT_RUNNING,
                                    CONTAINER_VERSION_MISMATCH,
                                    DOCKER_BUILD_FAILURE,
                                    DOCKER_COMMUNICATION_ERROR,
+                                   IMAGE_ARCHIVE_ERROR,
                                    NVIDIA_RUNTIME_ERROR)
-from bobber.lib.system.file_handler import update_log
+from bobber.lib.system.execution import ExecutionBackend
 from docker.models.containers import Container
-from typing import NoReturn, Optional
+from typing import Callable, Iterator, NoReturn, Optional, Tuple
+from uuid import uuid4
 
 
-class DockerManager:
+# The API socket of the system-wide Podman service
+PODMAN_SOCKET = 'unix:///run/podman/podman.sock'
+
+
+class DockerManager(ExecutionBackend):
     """
     Build, launch, and execute commands for Docker containers.
 
@@ -24,37 +40,89 @@ class DockerManager:
     execute commands inside the launched container to run tests. An instance
     of this class is created in the bobber.lib.docker.__init__.py module which
     can be access from other modules without re-instantiating the class.
+
+    The connection to the Docker daemon is only opened once it is first
+    needed, allowing Bobber to run on hosts without Docker when using another
+    execution backend.
+
+    Parameters
+    ----------
+    base_url : string (Optional)
+        A ``string`` of the URL of the Docker API to connect to, such as
+        'unix:///var/run/docker.sock'. Defaults to the Docker environment
+        settings.
     """
-    def __init__(self) -> NoReturn:
+    # The name of the container engine displayed in errors
+    engine = 'Docker'
+    # The command to start the container engine displayed in errors
+    start_command = 'systemctl start docker'
+
+    def __init__(self, base_url: Optional[str] = None) -> NoReturn:
+        self.base_url = base_url
+        self._client = None
+        self._cli = None
+
+    def _connect(self) -> NoReturn:
+        """
+        Connect to the container engine, exiting if it isn't running.
+        """
         try:
-            self.client = docker.from_env()
-            self.cli = docker.APIClient(timeout=600)
+            if self.base_url:
+                self._client = docker.DockerClient(base_url=self.base_url)
+            else:
+                self._client = docker.from_env()
+            self._cli = docker.APIClient(base_url=self.base_url, timeout=600)
         except docker.errors.DockerException as e:
             if 'error while fetching server api version' in str(e).lower():
-                print('Error: Could not communicate with the Docker daemon.')
-                print('Ensure Docker is running with "systemctl start docker"')
+                print('Error: Could not communicate with the '
+                      f'{self.engine} daemon.')
+                print(f'Ensure {self.engine} is running with '
+                      f'"{self.start_command}"')
                 sys.exit(DOCKER_COMMUNICATION_ERROR)
+            raise
 
-    def _build_if_not_built(self, tag: str, bobber_version: str) -> NoReturn:
+    @property
+    def client(self) -> docker.DockerClient:
+        """
+        Returns the high-level ``DockerClient`` for the container engine,
+        connecting on first use.
         """
-        Build the image if not built already.
+        if not self._client:
+            self._connect()
+        return self._client
 
-        Check if an image exists for the local version of Bobber. If not, build
-        the image immediately.
+    @property
+    def cli(self) -> docker.APIClient:
+        """
+        Returns the low-level ``APIClient`` for the container engine,
+        connecting on first use.
+        """
+        if not self._cli:
+            self._connect()
+        return self._cli
+
+    def _context_hash(self, tag: str) -> Optional[str]:
+        """
+        Find the checksum of the inputs an image was built from.
 
         Parameters
         ----------
         tag : string
             A ``string`` of the Bobber image name, such as
             'nvidia/bobber:5.0.0'.
-        bobber_version : string
-            A ``string`` of the local version of Bobber, such as '5.0.0'.
+
+        Returns
+        -------
+        string
+            Returns a ``string`` of the SHA-256 checksum saved in the image
+            label while building, or `None` if the image doesn't exist or
+            wasn't labeled.
         """
         try:
-            self.client.images.get(tag)
+            image = self.client.images.get(tag)
         except docker.errors.ImageNotFound:
-            print(f'Image {tag} not built, building now...')
-            self.build(bobber_version)
+            return None
+        return image.labels.get(CONTEXT_HASH_LABEL)
 
     def get_tag(self, bobber_version: str) -> str:
         """
@@ -77,19 +145,20 @@ class DockerManager:
         return f'nvidia/bobber:{bobber_version}'
 
     def cast(self, storage_path: str, ignore_gpu: bool,
-             bobber_version: str) -> NoReturn:
+             bobber_version: str,
+             agent_iface: Optional[str] = None) -> NoReturn:
         """
         Launch a container with necessary settings.
 
         Launch a Bobber image with various settings required to initiate the
-        testing framework, including attaching GPUs, starting an SSH daemon,
-        setting the container to privileged mode, and attaching a filesystem
-        to be accessible inside the container.
+        testing framework, including attaching GPUs, starting an SSH daemon and
+        the Bobber agent, setting the container to privileged mode, and
+        attaching a filesystem to be accessible inside the container.
 
         The launched container will be based off of the Bobber image for the
-        current version of the application. If the image does not yet exist,
-        it will be built automatically. The launched container is named
-        'bobber'.
+        current version of the application. If the image does not yet exist
+        or was built from a different Dockerfile or test scripts, it will be
+        built automatically. The launched container is named 'bobber'.
 
         Parameters
         ----------
@@ -101,18 +170,27 @@ class DockerManager:
             to `False`.
         bobber_version : string
             A ``string`` of the local version of Bobber, such as '5.0.0'.
+        agent_iface : string (Optional)
+            A ``string`` of the network interface the Bobber agent accepts
+            requests from other hosts on, such as 'enp226s0'. The agent only
+            accepts requests from the local host if `None`.
         """
         tag = self.get_tag(bobber_version)
-        self._build_if_not_built(tag, bobber_version)
+        self.build(bobber_version)
         runtime = None
+        environment = {}
         if not ignore_gpu:
             runtime = 'nvidia'
+        if agent_iface and create_agent_token():
+            environment['AGENT_INTERFACE'] = agent_iface
         try:
             self.client.containers.run(
                 tag,
-                'bash -c "/usr/sbin/sshd; sleep infinity"',
+                'bash -c "/usr/sbin/sshd; python3 /tests/agent.py serve > '
+                '/var/log/bobber_agent.log 2>&1 & sleep infinity"',
                 detach=True,
                 auto_remove=True,
+                environment=environment,
                 ipc_mode='host',
                 name='bobber',
                 network_mode='host',
@@ -131,6 +209,10 @@ class DockerManager:
                     f'{storage_path}': {
                         'bind': '/mnt/fs_under_test',
                         'mode': 'rw'
+                    },
+                    AGENT_DIRECTORY: {
+                        'bind': AGENT_DIRECTORY,
+                        'mode': 'rw'
                     }
                 }
             )
@@ -141,7 +223,8 @@ class DockerManager:
                       'installed.')
                 sys.exit(NVIDIA_RUNTIME_ERROR)
 
-    def export(self, bobber_version: str) -> NoReturn:
+    def export(self, bobber_version: str, compression: Optional[str] = None,
+               threads: int = EXPORT_THREADS) -> NoReturn:
         """
         Save an image as a tarball.
 
@@ -150,27 +233,40 @@ class DockerManager:
         device. On the other device, run the "load" command to load the copied
         tarball.
 
+        The tarball can optionally be compressed using multiple threads. A
+        checksum manifest is saved next to the tarball, and an interrupted
+        export resumes where it left off when run again with the same options.
+        The image is built first if it is missing or out of date.
+
         Parameters
         ----------
         bobber_version : string
             A ``string`` of the local version of Bobber, such as '5.0.0'.
+        compression : string (Optional)
+            A ``string`` of the compression type, either 'gzip' or 'zstd'. The
+            tarball is not compressed if `None`.
+        threads : int
+            An ``int`` of the number of threads to compress with.
         """
         tag = self.get_tag(bobber_version)
-        self._build_if_not_built(tag, bobber_version)
-        filename = tag.replace('/', '_').replace(':', '_')
-        print(f'Exporting {tag} to "{filename}.tar". This may take a while...')
+        self.build(bobber_version)
+        filename = archive_filename(tag, compression)
+        print(f'Exporting {tag} to "{filename}". This may take a while...')
+        image_id = self.client.images.get(tag).id
         image = self.cli.get_image(tag)
-        with open(f'{filename}.tar', 'wb') as image_file:
-            for chunk in image:
-                image_file.write(chunk)
-        print(f'{tag} saved to {filename}.tar')
+        write_archive(image, filename, image_id, compression, threads)
+        print(f'{tag} saved to {filename} with checksums in '
+              f'{manifest_filename(filename)}')
 
     def build(self, bobber_version: str) -> NoReturn:
         """
         Build the image on the Dockerfile.
 
         Build a new image based on the Dockerfile named
-        'nvidia/bobber:{version}'.
+        'nvidia/bobber:{version}'. The build context only contains the
+        Dockerfile and the test scripts, and the image is labeled with a
+        checksum of them. If an image with the same name was already built
+        from identical inputs, the build is skipped.
 
         Parameters
         ----------
@@ -178,13 +274,21 @@ class DockerManager:
             A ``string`` of the local version of Bobber, such as '5.0.0'.
         """
         tag = self.get_tag(bobber_version)
+        buildargs = {'BOBBER_VERSION': bobber_version}
+        context, context_hash = build_context(buildargs)
+        existing_hash = self._context_hash(tag)
+        if existing_hash == context_hash:
+            print(f'{tag} is up to date, skipping the build')
+            return
+        if existing_hash:
+            print(f'{tag} was built from a different Dockerfile or test '
+                  'scripts, rebuilding now...')
         print('Building a new image. This may take a while...')
-        # Set the path to the repository's parent directory.
-        path = os.path.dirname(os.path.abspath(__file__))
-        path = '/'.join(path.split('/')[:-2])
-        output = self.cli.build(path=path,
-                                dockerfile='lib/docker/Dockerfile',
+        output = self.cli.build(fileobj=context,
+                                custom_context=True,
                                 tag=tag,
+                                buildargs=buildargs,
+                                labels={CONTEXT_HASH_LABEL: context_hash},
                                 decode=True)
         for line in output:
             if 'error' in line.keys():
@@ -200,7 +304,10 @@ class DockerManager:
         Load a Docker image from a tarball.
 
         If a Bobber image was saved as a tarball using the "export" command, it
-        can be loaded on the system using the "load" command.
+        can be loaded on the system using the "load" command. Compressed
+        tarballs are decompressed while they are streamed to Docker and the
+        checksum is verified against the manifest from the export, if it was
+        copied alongside the tarball.
 
         Parameters
         ----------
@@ -209,29 +316,24 @@ class DockerManager:
             './nvidia_bobber_5.0.0.tar'.
         """
         print(f'Importing {filename}. This may take a while...')
-        with open(filename, 'rb') as image_file:
-            self.client.images.load(image_file)
+        try:
+            self.client.images.load(read_archive(filename))
+        except ValueError as e:
+            print(e)
+            sys.exit(IMAGE_ARCHIVE_ERROR)
 
-    def execute(self, command: str, environment: Optional[dict] = None,
-                log_file: Optional[str] = None) -> NoReturn:
+    def _container(self) -> Container:
         """
-        Execute a command against the running container.
+        Find the running Bobber container.
 
-        Assuming the Bobber container is already launched from the "cast"
-        command, execute a specific command and stream the output to the
-        terminal. Optionally specify a dictionary with any necessary
-        environment variables and a log file to save the output to.
+        Ensure the Bobber container is running and matches the local version
+        of Bobber before any commands are run inside it, exiting otherwise.
 
-        Parameters
-        ----------
-        command : string
-            A ``string`` of the command to run inside the container.
-        environment : dict (Optional)
-            A ``dictionary`` of environment variables to use where the keys are
-            the name of the variable and the values are the corresponding value
-            to set.
-        log_file : string (Optional)
-            A ``string`` of the path and filename to optionally save output to.
+        Returns
+        -------
+        Container
+            Returns a ``Container`` object representing the running Bobber
+            image.
         """
         if not self.running:
             print('Bobber container not running. Launch a container with '
@@ -244,25 +346,94 @@ class DockerManager:
                   ' and re-cast a new container with "bobber cast" prior to '
                   'running any tests.')
             sys.exit(CONTAINER_VERSION_MISMATCH)
+        return bobber
+
+    def capture(self, command: str,
+                environment: Optional[dict] = None) -> Tuple[int, str]:
+        """
+        Execute a command against the running container and capture output.
+
+        Unlike `execute`, the output is not streamed to the terminal and is
+        instead returned once the command completes, allowing multiple
+        commands to be run concurrently from separate threads.
+
+        Parameters
+        ----------
+        command : string
+            A ``string`` of the command to run inside the container.
+        environment : dict (Optional)
+            A ``dictionary`` of environment variables to use where the keys are
+            the name of the variable and the values are the corresponding value
+            to set.
+
+        Returns
+        -------
+        tuple
+            Returns a ``tuple`` of (``int``, ``string``) of the exit code of
+            the command and all output from STDOUT and STDERR.
+        """
+        bobber = self._container()
         result = bobber.exec_run(
             command,
             demux=False,
-            environment=environment,
-            stream=True
+            environment=environment
         )
-        # Continually print STDOUT and STDERR until there is nothing left
-        while True:
-            try:
-                output = next(result.output).decode('ascii')
-                print(output.rstrip())
-                if log_file:
-                    update_log(log_file, output)
-            # Usually only happens for terminating characters at the end of
-            # streams
-            except UnicodeDecodeError:
-                print(result.output)
-            except StopIteration:
-                break
+        return result.exit_code, result.output.decode('ascii',
+                                                      errors='replace')
+
+    def _kill_session(self, container: Container, pidfile: str) -> NoReturn:
+        """
+        Kill a command and all of its child processes inside the container.
+
+        Commands run with a timeout are started in a new session whose process
+        group ID is saved to the pidfile, allowing every process started by
+        the command, such as mpirun and ssh, to be killed at once.
+
+        Parameters
+        ----------
+        container : Container
+            A ``Container`` object representing the running Bobber image.
+        pidfile : string
+            A ``string`` of the path inside the container to the file holding
+            the process group ID of the command.
+        """
+        container.exec_run(['bash', '-c', f'kill -KILL -- -$(cat {pidfile}); '
+                            f'rm -f {pidfile}'])
+
+    def _start(self, command: str, environment: Optional[dict],
+               killable: bool, log_file: Optional[str]) -> \
+            Tuple[Iterator[bytes], Callable[[], NoReturn], Callable[[], int]]:
+        """
+        Start a command against the running container.
+
+        Assuming the Bobber container is already launched from the "cast"
+        command, start a specific command inside the container. Killable
+        commands are started in a new session so every process they start can
+        be killed at once. The exit code is read by inspecting the exec once
+        its output ends. See `ExecutionBackend._start` for a description of
+        all parameters.
+        """
+        bobber = self._container()
+        pidfile = None
+        exec_command = command
+        if killable:
+            pidfile = f'/tmp/bobber_{uuid4().hex}.pid'
+            exec_command = shlex.quote(f'echo $$ > {pidfile}; exec {command}')
+            exec_command = f'setsid -w bash -c {exec_command}'
+        exec_id = self.client.api.exec_create(
+            bobber.id,
+            exec_command,
+            environment=environment
+        )['Id']
+        stream = self.client.api.exec_start(exec_id, demux=False, stream=True)
+
+        def output() -> Iterator[bytes]:
+            yield from stream
+            if pidfile:
+                bobber.exec_run(f'rm -f {pidfile}')
+
+        return output(), lambda: self._kill_session(bobber, pidfile), \
+            lambda: self.client.api.exec_inspect(exec_id)['ExitCode']
 
     def version_match(self, container: Container) -> bool:
         """
@@ -306,3 +477,20 @@ class DockerManager:
             return False
         else:
             return True
+
+
+class PodmanManager(DockerManager):
+    """
+    Build, launch, and execute commands for Podman containers.
+
+    Podman provides a Docker-compatible API, so containers are managed
+    identically to Docker by connecting to the Podman API socket instead of
+    the Docker daemon. The socket is read from the CONTAINER_HOST environment
+    variable, falling back to the socket of the system-wide Podman service.
+    """
+    engine = 'Podman'
+    start_command = 'systemctl start podman.socket'
+
+    def __init__(self) -> NoReturn:
+        super().__init__(os.environ.get('CONTAINER_HOST',
+                                        PODMAN_SOCKET))
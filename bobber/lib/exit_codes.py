@@ -3,8 +3,13 @@
 SUCCESS = 0  # Successful termination
 BASELINE_FAILURE = 10  # Performance did not meet criteria
 MISSING_LOG_FILES = 20  # Parsing directory with no logs
+MISSING_KNEE_RESULTS = 21  # No single-system results for the knee metric
 DOCKER_BUILD_FAILURE = 30  # Failure building Docker image
 DOCKER_COMMUNICATION_ERROR = 31  # Unable to communicate with Docker
 CONTAINER_NOT_RUNNING = 32  # Bobber container not running
 NVIDIA_RUNTIME_ERROR = 33  # NVIDIA container runtime not found
 CONTAINER_VERSION_MISMATCH = 34  # Container different from application
+IMAGE_ARCHIVE_ERROR = 35  # Exported image incomplete or corrupt
+AGENT_NOT_RUNNING = 36  # Bobber agent not reachable on the local host
+PREFLIGHT_FAILURE = 40  # Hosts failed checks prior to running tests
+FANOUT_FAILURE = 41  # Command failed on one or more hosts
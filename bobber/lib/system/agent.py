@@ -0,0 +1,208 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+import secrets
+import socket
+import sys
+from bobber.__version__ import __version__ as version
+from bobber.lib.constants import AGENT_DIRECTORY, AGENT_SOCKET, AGENT_TOKEN
+from bobber.lib.exit_codes import AGENT_NOT_RUNNING, CONTAINER_VERSION_MISMATCH
+from bobber.lib.system.execution import ExecutionBackend
+from typing import Callable, Iterator, NoReturn, Optional, Tuple
+
+
+def create_agent_token(filename: str = AGENT_TOKEN) -> bool:
+    """
+    Create the token the Bobber agents use to authenticate each other.
+
+    The token is created on the host with a new random value if it doesn't
+    exist yet, readable only by its owner, and is shared with the container
+    through the agent directory. Every host needs the same token, which
+    "bobber cast-all" copies from the head node to every host.
+
+    Parameters
+    ----------
+    filename : string
+        A ``string`` of the path to the token. Defaults to the token in the
+        directory shared with the Bobber container.
+
+    Returns
+    -------
+    bool
+        Returns `True` when the token exists and `False` when it couldn't be
+        created.
+    """
+    try:
+        os.makedirs(AGENT_DIRECTORY, mode=0o700, exist_ok=True)
+        descriptor = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                             0o600)
+    except FileExistsError:
+        return True
+    except OSError as e:
+        print(f'Warning: Unable to create the Bobber agent token at '
+              f'{filename}: {e}. The agent will only accept requests from the '
+              'local host.')
+        return False
+    with os.fdopen(descriptor, 'w') as token:
+        token.write(secrets.token_hex(32) + '\n')
+    return True
+
+
+class AgentBackend(ExecutionBackend):
+    """
+    Execute commands through the Bobber agent on the local host.
+
+    The Bobber agent is started inside the container by "bobber cast" and
+    listens on a Unix socket shared with the host. Sending commands over the
+    socket avoids the overhead of a new Docker exec for every command, and
+    the agent handles dropping caches and the fio servers on every host for
+    the test scripts without new SSH sessions or MPI jobs.
+
+    Parameters
+    ----------
+    socket_path : string
+        A ``string`` of the path to the socket of the agent. Defaults to the
+        socket shared with the Bobber container.
+    """
+    def __init__(self, socket_path: str = AGENT_SOCKET) -> NoReturn:
+        self.socket_path = socket_path
+        self._verified = False
+
+    def _request(self, message: dict) -> socket.socket:
+        """
+        Send a request to the agent.
+
+        The version of the agent is verified against the local version of
+        Bobber before the first request, exiting if the agent isn't running or
+        the versions don't match.
+
+        Parameters
+        ----------
+        message : dict
+            A ``dictionary`` of the request to send.
+
+        Returns
+        -------
+        socket
+            Returns the ``socket`` connected to the agent to read the
+            responses from.
+        """
+        if not self._verified:
+            self._verified = True
+            _, agent_version = self._exchange({'operation': 'version'})
+            if agent_version.strip() != version:
+                print('Bobber agent version mismatch.')
+                print('Kill the running Bobber container with "docker kill '
+                      'bobber" and re-cast a new container with "bobber cast" '
+                      'prior to running any tests.')
+                sys.exit(CONTAINER_VERSION_MISMATCH)
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.socket_path)
+        except OSError:
+            connection.close()
+            print(f'Bobber agent not reachable at {self.socket_path}. Launch '
+                  'a container with "bobber cast" prior to running any tests.')
+            sys.exit(AGENT_NOT_RUNNING)
+        connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        return connection
+
+    def _responses(self, connection: socket.socket) -> Iterator[dict]:
+        """
+        Read every response to a request until the exit code is received.
+
+        Parameters
+        ----------
+        connection : socket
+            The ``socket`` connected to the agent.
+
+        Returns
+        -------
+        generator
+            Returns a ``generator`` of ``dictionaries`` of every response.
+        """
+        with connection, connection.makefile('rb') as responses:
+            for line in responses:
+                response = json.loads(line)
+                yield response
+                if 'exit_code' in response:
+                    return
+
+    def _exchange(self, message: dict) -> Tuple[int, str]:
+        """
+        Send a request to the agent and wait for it to complete.
+
+        Parameters
+        ----------
+        message : dict
+            A ``dictionary`` of the request to send.
+
+        Returns
+        -------
+        tuple
+            Returns a ``tuple`` of (``int``, ``string``) of the exit code and
+            all output of the request.
+        """
+        exit_code = 1
+        output = []
+
+        for response in self._responses(self._request(message)):
+            output.append(response.get('output', ''))
+            if 'error' in response:
+                output.append(response['error'] + '\n')
+            exit_code = response.get('exit_code', exit_code)
+        return exit_code, ''.join(output)
+
+    def capture(self, command: str,
+                environment: Optional[dict] = None) -> Tuple[int, str]:
+        """
+        Execute a command through the agent and capture output.
+
+        See `ExecutionBackend.capture` for a description of all parameters.
+        """
+        return self._exchange({
+            'operation': 'run',
+            'command': command,
+            'environment': environment
+        })
+
+    def _start(self, command: str, environment: Optional[dict],
+               killable: bool, log_file: Optional[str]) -> \
+            Tuple[Iterator[bytes], Callable[[], NoReturn], Callable[[], int]]:
+        """
+        Start a command through the agent.
+
+        The agent runs every command in a new session and kills the command
+        and all of its child processes once the connection is closed. See
+        `ExecutionBackend._start` for a description of all parameters.
+        """
+        connection = self._request({
+            'operation': 'run',
+            'command': command,
+            'environment': environment
+        })
+        # The last exit code sent by the agent, or 1 if the connection was
+        # closed before the command finished
+        status = {'exit_code': 1}
+
+        def output() -> Iterator[bytes]:
+            try:
+                for response in self._responses(connection):
+                    status['exit_code'] = response.get('exit_code',
+                                                       status['exit_code'])
+                    if response.get('output'):
+                        yield response['output'].encode('ascii',
+                                                        errors='replace')
+                    if 'error' in response:
+                        yield f'{response["error"]}\n'.encode('ascii')
+            # The connection was closed to kill the command
+            except (OSError, ValueError):
+                return
+
+        def kill() -> NoReturn:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        return output(), kill, lambda: status['exit_code']
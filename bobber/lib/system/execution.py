@@ -0,0 +1,235 @@
+# SPDX-License-Identifier: MIT
+from bobber.lib.constants import TIMEOUT_MESSAGE
+from bobber.lib.system.log_sink import LogSink
+from bobber.lib.system.progress import Progress
+from queue import Empty, Queue
+from threading import Thread
+from time import time
+from typing import Callable, Iterator, NoReturn, Optional, Tuple
+
+
+def _read_stream(stream: Iterator[bytes], output_queue: Queue) -> NoReturn:
+    """
+    Copy every chunk from a stream into a queue.
+
+    Once the stream ends, `None` is put in the queue to signal the end of the
+    output. If reading the stream fails, the exception is put in the queue
+    before `None` so it can be raised by the consumer instead of being lost in
+    the background thread.
+
+    Parameters
+    ----------
+    stream : generator
+        A ``generator`` of ``bytes`` of the output from a command.
+    output_queue : Queue
+        A ``Queue`` to put every chunk of output in.
+    """
+    try:
+        for chunk in stream:
+            output_queue.put(chunk)
+    except Exception as e:
+        output_queue.put(e)
+    finally:
+        output_queue.put(None)
+
+
+class ExecutionBackend:
+    """
+    Run test commands and stream their output.
+
+    An execution backend runs the test scripts for Bobber, either inside the
+    Bobber container or directly on the host. Every backend implements
+    `capture` and `_start`, while streaming the output to the terminal, log
+    sinks, and progress status, and enforcing timeouts is shared by all
+    backends in `execute`.
+    """
+    def capture(self, command: str,
+                environment: Optional[dict] = None) -> Tuple[int, str]:
+        """
+        Execute a command and capture output.
+
+        Unlike `execute`, the output is not streamed to the terminal and is
+        instead returned once the command completes, allowing multiple
+        commands to be run concurrently from separate threads.
+
+        Parameters
+        ----------
+        command : string
+            A ``string`` of the command to run.
+        environment : dict (Optional)
+            A ``dictionary`` of environment variables to use where the keys are
+            the name of the variable and the values are the corresponding value
+            to set.
+
+        Returns
+        -------
+        tuple
+            Returns a ``tuple`` of (``int``, ``string``) of the exit code of
+            the command and all output from STDOUT and STDERR.
+        """
+        raise NotImplementedError
+
+    def _start(self, command: str, environment: Optional[dict],
+               killable: bool, log_file: Optional[str]) -> \
+            Tuple[Iterator[bytes], Callable[[], NoReturn], Callable[[], int]]:
+        """
+        Start a command in the background.
+
+        Parameters
+        ----------
+        command : string
+            A ``string`` of the command to run.
+        environment : dict (Optional)
+            A ``dictionary`` of environment variables to pass to the command.
+        killable : boolean
+            When `True`, the command needs to be killable along with all of
+            its child processes.
+        log_file : string (Optional)
+            A ``string`` of the path to the log the output is saved to, if
+            any.
+
+        Returns
+        -------
+        tuple
+            Returns a ``tuple`` of a ``generator`` of ``bytes`` of the output
+            from the command, a function which kills the command and all of
+            its child processes, and a function which returns the ``int`` exit
+            code of the command once all of its output has been read.
+        """
+        raise NotImplementedError
+
+    def execute(self, command: str, environment: Optional[dict] = None,
+                log_file: Optional[str] = None,
+                timeout: Optional[int] = None,
+                idle_timeout: Optional[int] = None,
+                quiet: bool = False,
+                log_sink: Optional[LogSink] = None,
+                progress: Optional[Progress] = None) -> Optional[int]:
+        """
+        Execute a command and stream the output.
+
+        Execute a specific command and stream the output to the terminal.
+        Optionally specify a dictionary with any necessary environment
+        variables and a log file to save the output to.
+
+        If a timeout is specified, the command and all of its child processes
+        are killed once it has been running for longer than the timeout, or
+        once it hasn't produced any output for longer than the idle timeout.
+        A message is written to the log whenever a command is killed.
+
+        Parameters
+        ----------
+        command : string
+            A ``string`` of the command to run.
+        environment : dict (Optional)
+            A ``dictionary`` of environment variables to use where the keys are
+            the name of the variable and the values are the corresponding value
+            to set.
+        log_file : string (Optional)
+            A ``string`` of the path and filename to optionally save output to.
+        timeout : int (Optional)
+            An ``int`` of the maximum number of seconds the command can run.
+        idle_timeout : int (Optional)
+            An ``int`` of the maximum number of seconds the command can run
+            without producing any output.
+        quiet : boolean
+            When `True`, output is only saved to the log file and not printed
+            to the terminal. Defaults to `False`.
+        log_sink : LogSink (Optional)
+            A ``LogSink`` to save output to instead of the log file. The sink
+            is left open once the command completes.
+        progress : Progress (Optional)
+            A ``Progress`` status to update with the output instead of printing
+            the output to the terminal. The status is left open once the
+            command completes.
+
+        Returns
+        -------
+        int
+            Returns an ``int`` of the exit code of the command when it finished
+            on its own, or `None` when it was killed after a timeout.
+        """
+        sink = log_sink
+        if not sink and log_file:
+            sink = LogSink([log_file])
+        try:
+            killable = bool(timeout or idle_timeout)
+            log = sink.filenames[0] if sink else None
+            stream, kill, exit_code = self._start(command, environment,
+                                                  killable, log)
+            if not self._stream(stream, kill, command, sink, timeout,
+                                idle_timeout, quiet, progress):
+                return None
+            return exit_code()
+        finally:
+            if sink and not log_sink:
+                sink.close()
+
+    def _stream(self, stream: Iterator[bytes], kill: Callable[[], NoReturn],
+                command: str, sink: Optional[LogSink],
+                timeout: Optional[int], idle_timeout: Optional[int],
+                quiet: bool, progress: Optional[Progress]) -> bool:
+        """
+        Stream the output of a command to the terminal and a log sink.
+
+        See `execute` for a description of all parameters.
+
+        Returns
+        -------
+        bool
+            Returns `True` when the command finished on its own and `False`
+            when it was killed after a timeout.
+
+        Raises
+        ------
+        Exception
+            Raises any ``Exception`` from reading the output of the command.
+        """
+        # Read the output in the background so the timeouts can be checked
+        # while waiting on a command which isn't producing any output
+        output_queue = Queue()
+        reader = Thread(target=_read_stream, args=(stream, output_queue),
+                        daemon=True)
+        reader.start()
+        start = time()
+
+        # Continually print STDOUT and STDERR until there is nothing left
+        while True:
+            waits = []
+            if timeout:
+                waits.append(start + timeout - time())
+            if idle_timeout:
+                waits.append(idle_timeout)
+            try:
+                chunk = output_queue.get(timeout=max(min(waits), 0)
+                                         if waits else None)
+            except Empty:
+                break
+            if chunk is None:
+                return True
+            if isinstance(chunk, Exception):
+                raise chunk
+            try:
+                output = chunk.decode('ascii')
+                if progress:
+                    progress.write(output)
+                elif not quiet:
+                    print(output.rstrip())
+                if sink:
+                    sink.write(output)
+            # Usually only happens for terminating characters at the end of
+            # streams
+            except UnicodeDecodeError:
+                print(chunk)
+
+        if timeout and time() - start >= timeout:
+            reason = f'ran for longer than {timeout} seconds'
+        else:
+            reason = f'produced no output for {idle_timeout} seconds'
+        message = f'{TIMEOUT_MESSAGE}: "{command}" {reason} and was killed\n'
+        if not progress:
+            print(message.rstrip())
+        if sink:
+            sink.write(message)
+        kill()
+        return False
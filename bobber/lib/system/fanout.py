@@ -0,0 +1,248 @@
+# SPDX-License-Identifier: MIT
+import os
+import shlex
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from bobber.lib.constants import AGENT_TOKEN
+from bobber.lib.docker.archive import manifest_filename
+from bobber.lib.exit_codes import FANOUT_FAILURE
+from bobber.lib.system.agent import create_agent_token
+from typing import NoReturn, Optional, Tuple
+
+
+# Hosts which refer to the head node itself and are reached without SSH
+LOCAL_HOSTS = ['localhost', '127.0.0.1']
+# Options for every SSH and SCP connection between nodes
+SSH_OPTIONS = ['-o', 'BatchMode=yes', '-o', 'ConnectTimeout=10']
+
+
+def _local(host: Optional[str]) -> bool:
+    """
+    Returns a ``boolean`` which evaluates to `True` when the host refers to
+    the head node itself, represented by `None` or a local hostname.
+    """
+    return host is None or host in LOCAL_HOSTS
+
+
+def run_on_host(host: Optional[str], command: str) -> Tuple[int, str]:
+    """
+    Run a shell command on a host.
+
+    Commands for remote hosts are run over SSH from the head node while
+    commands for the head node itself are run directly.
+
+    Parameters
+    ----------
+    host : string (Optional)
+        A ``string`` of the hostname or IP address to run the command on, or
+        `None` for the head node.
+    command : string
+        A ``string`` of the shell command to run.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``int``, ``string``) of the exit code of the
+        command and all output from STDOUT and STDERR.
+    """
+    if _local(host):
+        argv = ['bash', '-c', command]
+    else:
+        argv = ['ssh'] + SSH_OPTIONS + [host, command]
+    result = subprocess.run(argv, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT)
+    return result.returncode, result.stdout.decode('utf-8', errors='replace')
+
+
+def copy_to_host(source: Optional[str], target: str,
+                 filenames: list) -> Tuple[int, str]:
+    """
+    Copy files from one host to the same paths on another host.
+
+    The files are copied directly from the source to the target with SCP,
+    which requires the source to be able to SSH to the target.
+
+    Parameters
+    ----------
+    source : string (Optional)
+        A ``string`` of the hostname or IP address which has the files, or
+        `None` for the head node.
+    target : string
+        A ``string`` of the hostname or IP address to copy the files to.
+    filenames : list
+        A ``list`` of ``strings`` of the absolute paths of the files to copy.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``int``, ``string``) of the exit code of the
+        copy and all output from STDOUT and STDERR.
+    """
+    # A local target already has the files from the head node
+    if _local(target):
+        return 0, ''
+    directory = os.path.dirname(filenames[0])
+    exit_code, output = run_on_host(target,
+                                    f'mkdir -p {shlex.quote(directory)}')
+    if exit_code != 0:
+        return exit_code, output
+    command = ['scp'] + SSH_OPTIONS + filenames + [f'{target}:{directory}/']
+    return run_on_host(source, ' '.join(shlex.quote(arg) for arg in command))
+
+
+def report(results: dict, action: str) -> NoReturn:
+    """
+    Display the status of an action on every host.
+
+    Print a single line per host with the result of the action along with
+    any output from hosts where it failed, and exit if it failed on any host.
+
+    Parameters
+    ----------
+    results : dict
+        A ``dictionary`` mapping each host to a ``tuple`` of (``int``,
+        ``string``) of the exit code and output of the action on the host.
+    action : string
+        A ``string`` of the action which was run, such as 'cast'.
+    """
+    failures = []
+
+    for host, (exit_code, output) in results.items():
+        if exit_code == 0:
+            print(f'{host}: {action} succeeded')
+            continue
+        print(f'{host}: {action} failed with exit code {exit_code}')
+        for line in output.strip().splitlines():
+            print(f'    {line}')
+        failures.append(host)
+    if failures:
+        print(f'{action} failed on {len(failures)} host(s): '
+              f'{", ".join(failures)}')
+        sys.exit(FANOUT_FAILURE)
+    print(f'{action} succeeded on all {len(results)} host(s)')
+
+
+def _cast_on_host(host: str, command: str,
+                  share_token: bool) -> Tuple[int, str]:
+    """
+    Copy the agent token from the head node to a host, readable only by its
+    owner, then launch the container on the host.
+    """
+    if share_token:
+        exit_code, output = copy_to_host(None, host, [AGENT_TOKEN])
+        if exit_code == 0:
+            exit_code, output = run_on_host(host, 'chmod 600 '
+                                            f'{shlex.quote(AGENT_TOKEN)}')
+        if exit_code != 0:
+            return exit_code, output
+    return run_on_host(host, command)
+
+
+def cast_all(hosts: str, storage_path: str, ignore_gpu: bool,
+             bobber_command: str,
+             agent_iface: Optional[str] = None) -> NoReturn:
+    """
+    Launch the Bobber container on every host in parallel.
+
+    Run "bobber cast" on every host at the same time and report the status of
+    each host once all of them finish. The image must already be loaded on
+    every host, such as with "bobber load-all".
+
+    Parameters
+    ----------
+    hosts : string
+        A comma-separated list of hostnames to launch the container on, such
+        as 'host1,host2,host3,host4'.
+    storage_path : string
+        A ``string`` of the absolute path to the storage location to test
+        against on every host, such as `/mnt/storage`.
+    ignore_gpu : boolean
+        When `True`, launches the containers without GPU resources.
+    bobber_command : string
+        A ``string`` of the command to run Bobber on every host.
+    agent_iface : string (Optional)
+        A ``string`` of the network interface the Bobber agents accept
+        requests from other hosts on. When set, the agent token is created on
+        the head node and copied to every host before launching the
+        containers so every agent shares the same token.
+    """
+    host_list = hosts.split(',')
+    command = f'{bobber_command} cast {shlex.quote(storage_path)}'
+    if ignore_gpu:
+        command += ' --ignore-gpu'
+    share_token = False
+    if agent_iface:
+        command += f' --agent-iface {shlex.quote(agent_iface)}'
+        share_token = create_agent_token()
+
+    print(f'Launching the Bobber container on {len(host_list)} host(s)...')
+    with ThreadPoolExecutor(max_workers=len(host_list)) as executor:
+        results = executor.map(lambda host: _cast_on_host(host, command,
+                                                          share_token),
+                               host_list)
+        report(dict(zip(host_list, results)), 'cast')
+
+
+def load_all(hosts: str, filename: str, bobber_command: str) -> NoReturn:
+    """
+    Copy an exported image to every host and load it.
+
+    The image is distributed over a tree: the head node copies the image to
+    the first host, and every host which has received the image copies it to
+    another host which hasn't, doubling the number of copies in flight each
+    round. Every host starts loading the image as soon as it has received it.
+    The checksum manifest is copied along with the image when present so
+    every host verifies its copy while loading.
+
+    Parameters
+    ----------
+    hosts : string
+        A comma-separated list of hostnames to load the image on, such as
+        'host1,host2,host3,host4'.
+    filename : string
+        A ``string`` of the path to the image exported with "bobber export".
+        The image is copied to the same absolute path on every host.
+    bobber_command : string
+        A ``string`` of the command to run Bobber on every host.
+    """
+    filename = os.path.abspath(filename)
+    filenames = [filename]
+    if os.path.exists(manifest_filename(filename)):
+        filenames.append(manifest_filename(filename))
+    host_list = hosts.split(',')
+    pending = deque(host_list)
+    # The head node is represented by `None`
+    sources = deque([None])
+    copies = {}
+    loads = {}
+    results = {}
+
+    print(f'Distributing {filename} to {len(host_list)} host(s)...')
+    with ThreadPoolExecutor(max_workers=len(host_list)) as copy_executor, \
+            ThreadPoolExecutor(max_workers=len(host_list)) as load_executor:
+        while pending or copies:
+            while pending and sources:
+                source, target = sources.popleft(), pending.popleft()
+                future = copy_executor.submit(copy_to_host, source, target,
+                                              filenames)
+                copies[future] = (source, target)
+            done, _ = wait(copies, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, target = copies.pop(future)
+                exit_code, output = future.result()
+                sources.append(source)
+                if exit_code != 0:
+                    results[target] = (exit_code, f'Copy from '
+                                       f'{source or "head node"} failed:\n'
+                                       f'{output}')
+                    continue
+                print(f'{target}: received image, loading...')
+                sources.append(target)
+                loads[target] = load_executor.submit(
+                    run_on_host, target,
+                    f'{bobber_command} load {shlex.quote(filename)}')
+        for target, future in loads.items():
+            results[target] = future.result()
+    report({host: results[host] for host in host_list}, 'load')
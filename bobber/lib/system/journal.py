@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: MIT
+import json
+import os
+from typing import NoReturn, Optional
+
+
+JOURNAL_FILE = 'journal.jsonl'
+# The status of a test which finished on its own and one which was killed
+# after a timeout
+COMPLETED = 'completed'
+TIMED_OUT = 'timed out'
+
+
+def _journal_path(log_path: str) -> str:
+    """
+    Returns a ``string`` of the full path to the journal in the log directory.
+    """
+    return os.path.join(log_path, JOURNAL_FILE)
+
+
+def read_journal(log_path: str) -> list:
+    """
+    Read all entries from the journal.
+
+    Each line in the journal is a JSON object representing a single finished
+    test. Lines that can't be parsed, such as a line that was only partially
+    written while the application was terminated, are ignored.
+
+    Parameters
+    ----------
+    log_path : string
+        A ``string`` of the directory where logs and the journal are saved.
+
+    Returns
+    -------
+    list
+        Returns a ``list`` of ``dictionaries`` of all valid journal entries in
+        the order they were written.
+    """
+    entries = []
+
+    if not os.path.exists(_journal_path(log_path)):
+        return entries
+    with open(_journal_path(log_path), 'r') as journal:
+        for line in journal:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def completed_entry(log_path: str, test: str, iteration: int,
+                    hosts: str) -> Optional[dict]:
+    """
+    Find the journal entry for a completed test.
+
+    A test is considered complete if the journal contains an entry for the
+    same test, iteration, and set of hosts which completed without timing out
+    and the log file from that entry still exists.
+
+    Parameters
+    ----------
+    log_path : string
+        A ``string`` of the directory where logs and the journal are saved.
+    test : string
+        A ``string`` of the name of the test, such as 'stg_bw'.
+    iteration : int
+        An ``int`` of the local test number, starting at 1.
+    hosts : string
+        A comma-separated list of hostnames the test was run against, such as
+        'host1,host2,host3,host4'.
+
+    Returns
+    -------
+    dict
+        Returns a ``dictionary`` of the journal entry if the test was
+        completed, otherwise `None`.
+    """
+    for entry in read_journal(log_path):
+        if entry.get('test') == test and \
+           entry.get('iteration') == iteration and \
+           entry.get('hosts') == hosts and \
+           entry.get('status') == COMPLETED and \
+           os.path.exists(entry.get('log', '')):
+            return entry
+    return None
+
+
+def record_entry(log_path: str, test: str, iteration: int, hosts: str,
+                 start: float, end: float, log: str,
+                 attempts: int = 1, status: str = COMPLETED) -> NoReturn:
+    """
+    Append a finished test to the journal.
+
+    The entry is flushed to disk immediately so the journal is up to date even
+    if the application is terminated during the next test.
+
+    Parameters
+    ----------
+    log_path : string
+        A ``string`` of the directory where logs and the journal are saved.
+    test : string
+        A ``string`` of the name of the test, such as 'stg_bw'.
+    iteration : int
+        An ``int`` of the local test number, starting at 1.
+    hosts : string
+        A comma-separated list of hostnames the test was run against, such as
+        'host1,host2,host3,host4'.
+    start : float
+        A ``float`` of the time the final attempt of the test started in
+        seconds since the epoch.
+    end : float
+        A ``float`` of the time the test ended in seconds since the epoch.
+    log : string
+        A ``string`` of the path to the log file for the test.
+    attempts : int
+        An ``int`` of the number of times the test was run before it produced
+        a valid log, or the number of times it was run in total if it never
+        did. Defaults to 1.
+    status : string
+        A ``string`` of the status of the final attempt, either 'completed'
+        or 'timed out'. Defaults to 'completed'.
+    """
+    entry = {
+        'test': test,
+        'iteration': iteration,
+        'hosts': hosts,
+        'start': start,
+        'end': end,
+        'log': log,
+        'attempts': attempts,
+        'status': status
+    }
+    with open(_journal_path(log_path), 'a') as journal:
+        journal.write(json.dumps(entry) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
@@ -0,0 +1,227 @@
+# SPDX-License-Identifier: MIT
+import gzip
+import io
+from time import time
+from types import ModuleType
+from typing import Iterator, NoReturn, Optional
+
+
+# The suffix appended to the log filename for each compression type
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+
+def _zstandard() -> ModuleType:
+    """
+    Returns the ``zstandard`` module which is only required for zstd
+    compressed logs.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if the zstandard package is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError('Error: zstd compression requires the zstandard '
+                         'package. Install it with "pip install zstandard".')
+    return zstandard
+
+
+def log_filename(filename: str, compression: Optional[str] = None) -> str:
+    """
+    Returns a ``string`` of the filename of a log including the suffix for the
+    requested compression type, such as 'nccl.log.gz'.
+    """
+    return filename + COMPRESSION_SUFFIXES.get(compression, '')
+
+
+def _open_log(filename: str, compression: Optional[str]) -> io.TextIOBase:
+    """
+    Open a log for appending text with the requested compression.
+
+    Parameters
+    ----------
+    filename : string
+        A ``string`` of the full path to the log including any suffix.
+    compression : string (Optional)
+        A ``string`` of the compression type, either 'gzip' or 'zstd'. The log
+        is not compressed if `None`.
+
+    Returns
+    -------
+    TextIOBase
+        Returns a text handle to write to the log.
+    """
+    if compression == 'gzip':
+        return gzip.open(filename, 'at')
+    if compression == 'zstd':
+        zstandard = _zstandard()
+        raw = open(filename, 'ab')
+        writer = zstandard.ZstdCompressor().stream_writer(raw)
+        return io.TextIOWrapper(writer, encoding='utf-8')
+    return open(filename, 'a')
+
+
+def read_log(filename: str) -> str:
+    """
+    Read the full contents of a log.
+
+    Logs ending in '.gz' or '.zst' are decompressed while reading. All other
+    logs are read as plain text.
+
+    Parameters
+    ----------
+    filename : string
+        A ``string`` of the full path to the log.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the contents of the log.
+    """
+    if filename.endswith(COMPRESSION_SUFFIXES['gzip']):
+        with gzip.open(filename, 'rt') as log:
+            return log.read()
+    if filename.endswith(COMPRESSION_SUFFIXES['zstd']):
+        zstandard = _zstandard()
+        with open(filename, 'rb') as raw:
+            # Every time a log is appended to a new frame is written
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True)
+            return reader.read().decode('utf-8')
+    with open(filename, 'r') as log:
+        return log.read()
+
+
+def read_log_lines(filename: str) -> Iterator[str]:
+    """
+    Read a log one line at a time.
+
+    Only a single line of the log is held in memory at a time, allowing logs
+    of any size to be read. Logs ending in '.gz' or '.zst' are decompressed
+    while reading. All other logs are read as plain text.
+
+    Parameters
+    ----------
+    filename : string
+        A ``string`` of the full path to the log.
+
+    Returns
+    -------
+    generator
+        Returns a ``generator`` of ``strings`` of every line in the log,
+        including the trailing newline.
+    """
+    if filename.endswith(COMPRESSION_SUFFIXES['gzip']):
+        with gzip.open(filename, 'rt') as log:
+            yield from log
+    elif filename.endswith(COMPRESSION_SUFFIXES['zstd']):
+        zstandard = _zstandard()
+        with open(filename, 'rb') as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True)
+            yield from io.TextIOWrapper(reader, encoding='utf-8')
+    else:
+        with open(filename, 'r') as log:
+            yield from log
+
+
+class LogSink:
+    """
+    Write the output of a test to one or more logs.
+
+    A single handle is kept open for every destination for as long as the sink
+    is open, instead of opening and closing the log for every chunk of output.
+    Output is written one full line at a time and the logs are flushed once
+    the requested number of lines have been written or the requested number of
+    seconds have passed since the last flush, whichever comes first. All
+    remaining output is written when the sink is closed.
+
+    The sink can be used as a context manager which closes the sink when the
+    context exits.
+
+    Parameters
+    ----------
+    filenames : list
+        A ``list`` of ``strings`` of the full paths to every log to write to,
+        excluding any suffix for the compression.
+    compression : string (Optional)
+        A ``string`` of the compression type, either 'gzip' or 'zstd'. The
+        logs are not compressed if `None`.
+    flush_lines : int
+        An ``int`` of the number of lines to write before flushing the logs.
+        A value of 1 flushes after every line. Defaults to 1000.
+    flush_interval : float
+        A ``float`` of the maximum number of seconds to wait between flushing
+        the logs. Defaults to 1.0.
+    listeners : list (Optional)
+        A ``list`` of objects with a ``write`` method which are passed every
+        line written to the logs as well, such as a ``ResultExtractor``.
+    """
+    def __init__(self, filenames: list, compression: Optional[str] = None,
+                 flush_lines: int = 1000, flush_interval: float = 1.0,
+                 listeners: Optional[list] = None) -> NoReturn:
+        self.filenames = [log_filename(filename, compression)
+                          for filename in filenames]
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self.listeners = listeners or []
+        self._handles = [_open_log(filename, compression)
+                         for filename in self.filenames]
+        self._partial = ''
+        self._pending = 0
+        self._last_flush = time()
+
+    def __enter__(self) -> 'LogSink':
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+    def write(self, text: str) -> NoReturn:
+        """
+        Write text to all logs.
+
+        Any text after the last newline is held back until the rest of the
+        line is written or the sink is closed.
+
+        Parameters
+        ----------
+        text : string
+            A ``string`` of the output to write.
+        """
+        text = self._partial + text
+        lines, newline, self._partial = text.rpartition('\n')
+        if not newline:
+            return
+        for handle in self._handles + self.listeners:
+            handle.write(lines + '\n')
+        self._pending += lines.count('\n') + 1
+        if self._pending >= self.flush_lines or \
+           time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> NoReturn:
+        """
+        Flush all written lines to disk.
+        """
+        for handle in self._handles:
+            handle.flush()
+        self._pending = 0
+        self._last_flush = time()
+
+    def close(self) -> NoReturn:
+        """
+        Write any remaining output and close all logs.
+        """
+        if self._partial:
+            for handle in self._handles + self.listeners:
+                handle.write(self._partial)
+        for handle in self._handles:
+            handle.close()
+        self._partial = ''
+        self._handles = []
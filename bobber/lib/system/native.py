@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: MIT
+import os
+import signal
+import subprocess
+from bobber.lib.system.execution import ExecutionBackend
+from typing import Callable, Iterator, NoReturn, Optional, Tuple
+
+
+# Number of bytes to read from the output of a command at a time
+READ_SIZE = 64 * 1024
+
+
+class NativeBackend(ExecutionBackend):
+    """
+    Execute commands directly on the host without a container.
+
+    The native backend runs the test scripts on hosts where the tools are
+    installed on bare metal, removing the overhead of starting and executing
+    commands in a container on hosts where a privileged container can't be
+    run. The host needs the same layout as the Bobber image, including the
+    test scripts in /tests, the benchmarks in their paths from the
+    Dockerfile, and SSH listening on port 2222 on every host.
+
+    Parameters
+    ----------
+    working_directory : string
+        A ``string`` of the directory to run commands from, matching the
+        working directory of the Bobber image. Defaults to '/'.
+    """
+    def __init__(self, working_directory: str = '/') -> NoReturn:
+        self.working_directory = working_directory
+
+    def _environment(self, environment: Optional[dict]) -> dict:
+        """
+        Returns a ``dictionary`` of the environment of Bobber updated with
+        the environment variables for a command.
+        """
+        full_environment = dict(os.environ)
+        for key, value in (environment or {}).items():
+            # Unset values are left out, matching Docker
+            if value is not None:
+                full_environment[key] = str(value)
+        return full_environment
+
+    def capture(self, command: str,
+                environment: Optional[dict] = None) -> Tuple[int, str]:
+        """
+        Execute a command on the host and capture output.
+
+        See `ExecutionBackend.capture` for a description of all parameters.
+        """
+        result = subprocess.run(['bash', '-c', command],
+                                cwd=self.working_directory,
+                                env=self._environment(environment),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        return result.returncode, result.stdout.decode('ascii',
+                                                       errors='replace')
+
+    def _start(self, command: str, environment: Optional[dict],
+               killable: bool, log_file: Optional[str]) -> \
+            Tuple[Iterator[bytes], Callable[[], NoReturn], Callable[[], int]]:
+        """
+        Start a command on the host.
+
+        Every command is started in a new session so the command and all of
+        its child processes, such as mpirun and ssh, can be killed at once.
+        See `ExecutionBackend._start` for a description of all parameters.
+        """
+        process = subprocess.Popen(['bash', '-c', command],
+                                   cwd=self.working_directory,
+                                   env=self._environment(environment),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT,
+                                   start_new_session=True)
+
+        def output() -> Iterator[bytes]:
+            while True:
+                chunk = os.read(process.stdout.fileno(), READ_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            process.stdout.close()
+            process.wait()
+
+        def kill() -> NoReturn:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        return output(), kill, lambda: process.returncode
@@ -0,0 +1,170 @@
+# SPDX-License-Identifier: MIT
+import re
+import sys
+from io import TextIOBase
+from threading import Event, Lock, Thread
+from time import time
+from typing import NoReturn, Optional
+
+
+# Lines which mark the start of a new phase of a test. When several patterns
+# match the same line, the last one wins.
+PHASE_PATTERNS = [
+    (re.compile(r'^\S*fio .*--rw=(\w+)'), lambda match:
+     f'fio {match.group(1)}'),
+    (re.compile(r'--create_only=1'), lambda match: 'fio layout'),
+    (re.compile(r'Starting Drop Caches'), lambda match: 'dropping caches'),
+    (re.compile(r'(jpg|tfrecord) dataset'), lambda match:
+     f'{match.group(1)} dataset'),
+    (re.compile(r'RUN 1/1'), lambda match: 'DALI pipeline'),
+    (re.compile(r'# nThread'), lambda match: 'NCCL all_reduce'),
+    (re.compile(r'^-- started'), lambda match: 'mdtest'),
+    (re.compile(r'^SUMMARY'), lambda match: 'mdtest summary'),
+    (re.compile(r'Cleaning workspace'), lambda match: 'cleaning up')
+]
+
+# Lines which contain a result. The result is displayed until it is replaced
+# by a newer one.
+RESULT_PATTERNS = [
+    (re.compile(r'(READ|WRITE): bw=\S+ \((\S+)\)'), lambda match:
+     f'{match.group(1)} {match.group(2)}'),
+    (re.compile(r'(read|write): IOPS=([^,]+),'), lambda match:
+     f'{match.group(1)} {match.group(2)} IOPS'),
+    (re.compile(r'^\s*(\d+)\s+\d+\s+float\s+sum\s+(\S+\s+){2}(\S+)'),
+     lambda match: f'busbw {match.group(3)} GB/s at {match.group(1)} B'),
+    (re.compile(r'speed: (\S+) \[img/s'), lambda match:
+     f'{match.group(1)} img/s'),
+    (re.compile(r'^\s*((File|Directory|Tree) \w+)\s*:\s*\S+\s+\S+\s+(\S+)'),
+     lambda match: f'{match.group(1)} {match.group(3)} ops/s')
+]
+
+
+def _elapsed(seconds: float) -> str:
+    """
+    Returns a ``string`` of the number of seconds formatted as HH:MM:SS.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}'
+
+
+class Progress:
+    """
+    Display a single live status line for a running test.
+
+    Instead of printing every chunk of output from a test to the terminal,
+    the output is scanned for the current phase of the test and the latest
+    bandwidth, IOPS, or img/s result, which are shown on a single line along
+    with the elapsed time. The line is redrawn in place every second and
+    whenever the phase changes. When the output isn't a terminal, a new line
+    is only printed whenever the phase changes.
+
+    The status can be used as a context manager which closes the status when
+    the context exits.
+
+    Parameters
+    ----------
+    label : string
+        A ``string`` of the name of the test to show at the start of the line,
+        such as 'stg_bw iteration 1, 4 systems'.
+    stream : TextIOBase (Optional)
+        The stream to display the status on. Defaults to STDOUT.
+    """
+    def __init__(self, label: str, stream: Optional[TextIOBase] = None) -> \
+            NoReturn:
+        self.label = label
+        self.phase = 'starting'
+        self.result = ''
+        self._stream = stream or sys.stdout
+        self._live = self._stream.isatty()
+        self._partial = ''
+        self._width = 0
+        self._lock = Lock()
+        self._done = Event()
+        self._start = time()
+        self._ticker = None
+        self._draw()
+        if self._live:
+            self._ticker = Thread(target=self._tick, daemon=True)
+            self._ticker.start()
+
+    def __enter__(self) -> 'Progress':
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+    def _tick(self) -> NoReturn:
+        """
+        Redraw the status every second to keep the elapsed time current.
+        """
+        while not self._done.wait(1):
+            self._draw()
+
+    def _draw(self) -> NoReturn:
+        """
+        Display the current status, replacing the previous one if live.
+        """
+        status = f'{self.label} | {self.phase} | ' \
+                 f'{_elapsed(time() - self._start)}'
+        if self.result:
+            status += f' | {self.result}'
+        with self._lock:
+            if self._live:
+                padding = ' ' * max(self._width - len(status), 0)
+                self._stream.write(f'\r{status}{padding}')
+                self._width = len(status)
+            else:
+                self._stream.write(f'{status}\n')
+            self._stream.flush()
+
+    def write(self, text: str) -> NoReturn:
+        """
+        Update the status from the latest output of the test.
+
+        Any text after the last newline is held back until the rest of the
+        line is written.
+
+        Parameters
+        ----------
+        text : string
+            A ``string`` of the output from the test.
+        """
+        text = self._partial + text
+        lines, _, self._partial = text.rpartition('\n')
+        phase = self.phase
+
+        for line in lines.splitlines():
+            for pattern, describe in PHASE_PATTERNS:
+                match = pattern.search(line)
+                if match:
+                    self.phase = describe(match)
+            for pattern, describe in RESULT_PATTERNS:
+                match = pattern.search(line)
+                if match:
+                    self.result = describe(match)
+        # The ticker redraws the latest result, so only redraw immediately
+        # for a new phase to keep the terminal output to a minimum
+        if self.phase != phase:
+            self._draw()
+
+    def close(self, phase: str = 'done') -> NoReturn:
+        """
+        Display the final status and stop updating it.
+
+        Parameters
+        ----------
+        phase : string
+            A ``string`` of the final phase to display. Defaults to 'done'.
+        """
+        if self._done.is_set():
+            return
+        self._done.set()
+        if self._ticker:
+            self._ticker.join()
+        self.write('\n')
+        self.phase = phase
+        self._draw()
+        if self._live:
+            self._stream.write('\n')
+            self._stream.flush()
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: MIT
+import os
+from bobber.lib.system.execution import ExecutionBackend
+from bobber.lib.system.log_sink import COMPRESSION_SUFFIXES, read_log
+from typing import Callable, Iterator, NoReturn, Optional, Tuple
+
+
+class ReplayBackend(ExecutionBackend):
+    """
+    Return recorded output instead of executing commands.
+
+    The replay backend allows the test orchestration to run without any
+    hardware, containers, or other hosts by replaying the logs from a previous
+    run. Whenever a command is executed with a log, the contents of the log
+    with the same name in the replay directory are returned as the output of
+    the command, line by line. Commands without a recorded log, such as
+    cleanup commands, produce no output, and every command succeeds.
+
+    Parameters
+    ----------
+    replay_path : string
+        A ``string`` of the path to the directory of logs to replay.
+    """
+    def __init__(self, replay_path: str) -> NoReturn:
+        self.replay_path = replay_path
+
+    def _recording(self, log_file: Optional[str]) -> Optional[str]:
+        """
+        Returns a ``string`` of the path to the recorded log for a log file,
+        with or without compression, or `None` if there isn't a recording.
+        """
+        if not log_file:
+            return None
+        name = os.path.basename(log_file)
+        for suffix in COMPRESSION_SUFFIXES.values():
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        for suffix in [''] + list(COMPRESSION_SUFFIXES.values()):
+            recording = os.path.join(self.replay_path, name + suffix)
+            if os.path.exists(recording):
+                return recording
+        return None
+
+    def capture(self, command: str,
+                environment: Optional[dict] = None) -> Tuple[int, str]:
+        """
+        Return a successful result without any output for a command.
+
+        See `ExecutionBackend.capture` for a description of all parameters.
+        """
+        return 0, ''
+
+    def _start(self, command: str, environment: Optional[dict],
+               killable: bool, log_file: Optional[str]) -> \
+            Tuple[Iterator[bytes], Callable[[], NoReturn], Callable[[], int]]:
+        """
+        Return the recorded output for a command, which always succeeds.
+
+        See `ExecutionBackend._start` for a description of all parameters.
+        """
+        recording = self._recording(log_file)
+
+        def output() -> Iterator[bytes]:
+            if not recording:
+                return
+            for line in read_log(recording).splitlines(keepends=True):
+                yield line.encode('ascii', errors='replace')
+
+        return output(), lambda: None, lambda: 0
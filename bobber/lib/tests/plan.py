@@ -0,0 +1,386 @@
+# SPDX-License-Identifier: MIT
+import os
+from argparse import Namespace
+from datetime import timedelta
+from statistics import median
+from bobber.lib.analysis.dali import _size_parsing
+from bobber.lib.analysis.parse_results import get_files
+from bobber.lib.constants import (
+    DALI_DEFAULT_GPUS,
+    DALI_EPOCHS,
+    DALI_IMAGES_PER_GPU,
+    DALI_PIPELINES,
+    DALI_RESOLUTIONS,
+    FIO_DEFAULT_THREADS,
+    FIO_FILE_SIZE,
+    FIO_PASSES,
+    FIO_RAMP_TIME,
+    FIO_RUNTIME,
+    FIO_START_DELAY,
+    PLAN_DEFAULT_SECONDS
+)
+from bobber.lib.system.journal import completed_entry, read_journal
+from bobber.lib.system.log_sink import read_log
+from bobber.lib.tests.run_tests import TESTS, sweep_schedule
+from typing import Callable, NoReturn, Tuple
+
+
+# The flag holding the thread count for each of the fio tests
+FIO_THREADS = {
+    'stg_bw': 'bw_threads',
+    'stg_125k': 'stg_125k_threads',
+    'stg_iops': 'iops_threads'
+}
+
+
+def _test_name(test: Callable[..., str]) -> str:
+    """
+    Returns a ``string`` of the name of a test function as used in the
+    journal, such as 'stg_bw'.
+    """
+    return test.__name__.replace('run_', '', 1)
+
+
+def knee_schedule(host_count: int) -> list:
+    """
+    Find the system counts tested while searching for the knee.
+
+    The system counts tested during a knee search depend on the results, so
+    the longest path is assumed where the full host count is tested first and
+    scaling holds at every midpoint of the bisection.
+
+    Parameters
+    ----------
+    host_count : int
+        An ``int`` of the total number of hosts passed by the user.
+
+    Returns
+    -------
+    list
+        Returns a ``list`` of ``ints`` of the system counts in the order they
+        would be tested.
+    """
+    schedule = [1]
+    low, high = 1, host_count
+
+    if high > low:
+        schedule.append(high)
+    while high - low > 1:
+        low = (low + high) // 2
+        schedule.append(low)
+    return schedule
+
+
+def planned_executions(args: Namespace) -> list:
+    """
+    List every test that will be run for the requested settings.
+
+    Follow the same order as `test_selector` to find every test, iteration,
+    and set of hosts that will be run. While using --target-ci, the maximum
+    number of iterations is assumed for every test.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+
+    Returns
+    -------
+    list
+        Returns a ``list`` of ``tuples`` of (``string``, ``int``, ``string``)
+        for the test name, iteration, and comma-separated hosts of each test.
+    """
+    hosts = args.hosts.split(',')
+    executions = []
+
+    if args.find_knee:
+        counts = knee_schedule(len(hosts))
+    elif args.sweep or args.sweep_steps:
+        counts = sweep_schedule(len(hosts), args.sweep_steps)
+    else:
+        counts = [len(hosts)]
+    for count in counts:
+        host_string = ','.join(hosts[:count])
+        if args.target_ci:
+            iterations = args.max_iterations or args.iterations
+            for test in TESTS[args.command]:
+                for iteration in range(1, iterations + 1):
+                    executions.append((_test_name(test), iteration,
+                                       host_string))
+            continue
+        for iteration in range(1, args.iterations + 1):
+            for test in TESTS[args.command]:
+                executions.append((_test_name(test), iteration, host_string))
+    return executions
+
+
+def load_history(log_paths: list) -> Tuple[dict, dict]:
+    """
+    Read durations and dataset sizes from previous runs.
+
+    The duration of every test recorded in the journal of the log paths is
+    captured for each test and system count. The size of the images generated
+    for the DALI tests is read from any DALI logs in the log paths.
+
+    Parameters
+    ----------
+    log_paths : list
+        A ``list`` of ``strings`` of the log directories of previous runs.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``dict``, ``dict``) where the first dictionary
+        maps (test, systems) to a ``list`` of durations in seconds and the
+        second maps each resolution, such as '800x600', to the size of a
+        single image in bytes.
+    """
+    durations = {}
+    image_sizes = {}
+
+    for log_path in log_paths:
+        for entry in read_journal(log_path):
+            systems = len(entry['hosts'].split(','))
+            key = (entry['test'], systems)
+            durations.setdefault(key, []).append(entry['end'] -
+                                                 entry['start'])
+        for log in get_files(log_path):
+            if not os.path.basename(log).startswith('dali_'):
+                continue
+            try:
+                sizes = _size_parsing(read_log(log))
+            except ValueError:
+                continue
+            for width, height in DALI_RESOLUTIONS:
+                resolution = f'{width}x{height}'
+                size = sizes[f'{resolution} standard jpg']['image size']
+                if size:
+                    image_sizes[resolution] = size
+    return durations, image_sizes
+
+
+def default_duration(args: Namespace, test: str, prepare: bool) -> float:
+    """
+    Estimate the duration of a test without any previous runs.
+
+    The fio tests use the fixed start delay, ramp time, and runtime of both
+    passes and the DALI tests use the fixed number of epochs for every
+    pipeline. All hardware-dependent parts of a test use a rough default. The
+    shortest possible wait is assumed while waiting for activity to settle.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    test : string
+        A ``string`` of the name of the test, such as 'stg_bw'.
+    prepare : bool
+        A ``boolean`` which evaluates to `True` when the test needs to lay out
+        the fio files or generate the DALI datasets first.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the estimated duration in seconds.
+    """
+    if test in FIO_THREADS:
+        duration = FIO_PASSES * (FIO_START_DELAY + FIO_RAMP_TIME +
+                                 FIO_RUNTIME)
+        if prepare:
+            duration += PLAN_DEFAULT_SECONDS['fio_layout']
+    elif test == 'dali':
+        duration = DALI_PIPELINES * DALI_EPOCHS * \
+            PLAN_DEFAULT_SECONDS['dali_epoch']
+        if prepare:
+            duration += PLAN_DEFAULT_SECONDS['dali_datasets']
+    else:
+        duration = PLAN_DEFAULT_SECONDS[test]
+    if args.quiesce:
+        return duration + args.quiesce_window
+    return duration + args.pause
+
+
+def estimate_duration(args: Namespace, test: str, systems: int,
+                      durations: dict, prepare: bool) -> Tuple[float, str]:
+    """
+    Estimate the duration of a single test.
+
+    Use the median duration of the same test with the same number of systems
+    from previous runs where available, falling back to the same test with any
+    number of systems, then to the default estimate.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    test : string
+        A ``string`` of the name of the test, such as 'stg_bw'.
+    systems : int
+        An ``int`` of the number of systems used during the test.
+    durations : dict
+        A ``dictionary`` mapping (test, systems) to a ``list`` of durations in
+        seconds from previous runs.
+    prepare : bool
+        A ``boolean`` which evaluates to `True` when the test needs to lay out
+        the fio files or generate the DALI datasets first.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``float``, ``string``) of the estimated
+        duration in seconds and the source of the estimate.
+    """
+    if (test, systems) in durations:
+        return median(durations[(test, systems)]), 'history'
+    previous = [duration for (name, _), values in durations.items()
+                if name == test for duration in values]
+    if previous:
+        return median(previous), 'history, other system count'
+    return default_duration(args, test, prepare), 'default'
+
+
+def fio_bytes(args: Namespace, test: str) -> int:
+    """
+    Returns an ``int`` of the bytes laid out by a fio test. Every system runs
+    its jobs against the same files in a single shared directory, so the
+    layout is one file per thread regardless of the number of systems.
+    """
+    threads = getattr(args, FIO_THREADS[test]) or FIO_DEFAULT_THREADS
+    return FIO_FILE_SIZE * threads
+
+
+def dataset_bytes(args: Namespace, image_sizes: dict) -> int:
+    """
+    Estimate the bytes written for the DALI datasets.
+
+    Every resolution is generated once as JPEGs and once as TFRecords holding
+    the same images. Without an image size from a previous run, the raw RGB
+    size is used as the randomly generated images barely compress.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    image_sizes : dict
+        A ``dictionary`` mapping each resolution to the size of a single image
+        in bytes from previous runs.
+
+    Returns
+    -------
+    int
+        Returns an ``int`` of the estimated size of all datasets in bytes.
+    """
+    images = (args.gpus or DALI_DEFAULT_GPUS) * DALI_IMAGES_PER_GPU
+    total = 0
+
+    for width, height in DALI_RESOLUTIONS:
+        size = image_sizes.get(f'{width}x{height}', width * height * 3)
+        total += 2 * images * size
+    return total
+
+
+def peak_bytes(args: Namespace, executions: list, image_sizes: dict) -> int:
+    """
+    Estimate the peak bytes written to the filesystem under test.
+
+    Cached DALI datasets and reused fio layouts stay on the filesystem until
+    all tests are complete, so they add up. Everything else is removed by the
+    test that created it, leaving only the largest of those at any one time.
+    The metadata test only creates small files and is ignored.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    executions : list
+        A ``list`` of ``tuples`` of the test name, iteration, and hosts of
+        every planned test.
+    image_sizes : dict
+        A ``dictionary`` mapping each resolution to the size of a single image
+        in bytes from previous runs.
+
+    Returns
+    -------
+    int
+        Returns an ``int`` of the estimated peak size in bytes.
+    """
+    layouts = {}
+    transient = 0
+    persistent = 0
+
+    for test, _, _ in executions:
+        if test in FIO_THREADS:
+            size = fio_bytes(args, test)
+            if args.no_layout_reuse:
+                transient = max(transient, size)
+            else:
+                # Layouts are shared by all tests with the same thread count
+                threads = getattr(args, FIO_THREADS[test])
+                layouts[threads] = max(layouts.get(threads, 0), size)
+        elif test == 'dali':
+            size = dataset_bytes(args, image_sizes)
+            if args.no_dataset_cache:
+                transient = max(transient, size)
+            else:
+                persistent = size
+    return persistent + sum(layouts.values()) + transient
+
+
+def print_plan(args: Namespace) -> NoReturn:
+    """
+    Display the planned tests along with time and capacity estimates.
+
+    List every test that would be run with the requested settings without
+    running anything, followed by the estimated total wall time and the peak
+    capacity used on the filesystem under test. Durations are refined with
+    the journals of previous runs in the log path and any --plan-history
+    directories. While resuming, tests already completed are skipped.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    """
+    history_paths = [args.log_path]
+    if args.plan_history:
+        history_paths += args.plan_history.split(',')
+    durations, image_sizes = load_history(history_paths)
+    executions = planned_executions(args)
+    prepared = set()
+    total = 0.0
+    skipped = 0
+
+    print(f'Planned tests for {args.command}:')
+    for test, iteration, hosts in executions:
+        systems = len(hosts.split(','))
+        if args.resume and completed_entry(args.log_path, test, iteration,
+                                           hosts):
+            print(f'    {test:<9} iteration {iteration:<3} {systems:>4} '
+                  'system(s)  already completed')
+            skipped += 1
+            continue
+        if test in FIO_THREADS:
+            key = getattr(args, FIO_THREADS[test])
+            prepare = args.no_layout_reuse or key not in prepared
+        else:
+            key = test
+            prepare = args.no_dataset_cache or key not in prepared
+        prepared.add(key)
+        duration, source = estimate_duration(args, test, systems, durations,
+                                             prepare)
+        total += duration
+        print(f'    {test:<9} iteration {iteration:<3} {systems:>4} '
+              f'system(s)  {timedelta(seconds=round(duration))} ({source})')
+
+    print(f'Total tests: {len(executions) - skipped}'
+          + (f' ({skipped} already completed)' if skipped else ''))
+    print(f'Estimated wall time: {timedelta(seconds=round(total))}')
+    peak = peak_bytes(args, executions, image_sizes)
+    print('Estimated peak capacity used on the filesystem under test: '
+          f'{round(peak / 1e9, 2)} GB')
+    if args.target_ci:
+        print('Note: Assumes every test runs the maximum number of iterations'
+              ' allowed by --target-ci.')
+    if args.find_knee:
+        print('Note: The system counts tested during a knee search depend on '
+              'the results. The longest search is assumed.')
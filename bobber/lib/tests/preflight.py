@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: MIT
+import sys
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from bobber.lib import backends
+from bobber.lib.exit_codes import PREFLIGHT_FAILURE
+from bobber.lib.tests.plan import load_history, peak_bytes, planned_executions
+from typing import NoReturn, Tuple
+
+
+def check_host(host: str, environment: dict) -> Tuple[str, int, list]:
+    """
+    Run all preflight checks against a single host.
+
+    Connect to the Bobber container on the host from the local container and
+    verify the container version, the filesystem under test, and the
+    configured network interfaces.
+
+    Parameters
+    ----------
+    host : string
+        A ``string`` of the hostname or IP address to check.
+    environment : dict
+        A ``dictionary`` of environment variables to pass to the checks.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of (``string``, ``int``, ``list``) of the host, the
+        exit code of the checks, and a ``list`` of ``strings`` of each line of
+        output from the checks.
+    """
+    environment = dict(environment, HOST=host)
+    exit_code, output = backends.capture('tests/preflight.sh',
+                                         environment=environment)
+    return host, exit_code, output.strip().splitlines()
+
+
+def preflight(args: Namespace, bobber_version: str) -> NoReturn:
+    """
+    Verify all hosts are ready before any tests are started.
+
+    Check every host concurrently and display a single report of all checks.
+    The free space on the filesystem under test is compared against the
+    estimated peak capacity of the planned tests. If any check fails on any
+    host, exit before running any tests.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    """
+    hosts = args.hosts.split(',')
+    _, image_sizes = load_history([args.log_path])
+    environment = {
+        'EXPECTED_VERSION': bobber_version,
+        'REQUIRED_BYTES': peak_bytes(args, planned_executions(args),
+                                     image_sizes),
+        'SSH_IFACE': args.ssh_iface,
+        'NCCL_IB_HCAS': args.nccl_ib_hcas
+    }
+
+    print(f'Running preflight checks on {len(hosts)} host(s)...')
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        results = executor.map(lambda host: check_host(host, environment),
+                               hosts)
+        failures = []
+        for host, exit_code, output in results:
+            print(f'{host}:')
+            for line in output:
+                print(f'    {line}')
+            if exit_code != 0:
+                failures.append(host)
+    if failures:
+        print(f'Preflight checks failed on {len(failures)} host(s): '
+              f'{", ".join(failures)}')
+        print('Resolve the failures above before running tests or skip the '
+              'checks with --skip-preflight.')
+        sys.exit(PREFLIGHT_FAILURE)
+    print('All preflight checks passed')
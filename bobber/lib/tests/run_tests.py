@@ -1,7 +1,23 @@
 # SPDX-License-Identifier: MIT
+import json
 import os
+import re
+import sys
 from argparse import Namespace
+from bobber.__version__ import __version__ as version
+from bobber.lib.analysis.metrics import (confidence_interval,
+                                         dali_metric,
+                                         fio_bw_metric,
+                                         fio_iops_metric,
+                                         meta_metric,
+                                         nccl_metric)
+from bobber.lib.analysis.cache import ParseCache
+from bobber.lib.analysis.catalog import LogCatalog
+from bobber.lib.analysis.common import manifest_filename, sidecar_filename
+from bobber.lib.analysis.parse_results import aggregate_systems, get_files
+from bobber.lib.analysis.streaming import ResultExtractor, valid_log
 from bobber.lib.constants import (
+    KNEE_METRICS,
     RUN_ALL,
     RUN_DALI,
     RUN_NCCL,
@@ -10,13 +26,222 @@ from bobber.lib.constants import (
     RUN_STG_125K,
     RUN_STG_META
 )
-from bobber.lib.docker import manager
-from time import sleep
-from typing import NoReturn
+from bobber.lib.exit_codes import MISSING_KNEE_RESULTS
+from bobber.lib import backends
+from bobber.lib.system.file_handler import create_directory, write_file
+from bobber.lib.system.journal import (COMPLETED,
+                                       TIMED_OUT,
+                                       completed_entry,
+                                       record_entry)
+from bobber.lib.system.log_sink import LogSink, log_filename
+from bobber.lib.system.progress import Progress
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import sleep, time
+from typing import Callable, NoReturn, Optional, Tuple
+
+
+def wait_for_quiescence(args: Namespace, hosts: str) -> NoReturn:
+    """
+    Wait until storage and network activity has settled on all hosts.
+
+    Instead of pausing for a fixed time, watch the block device, network, and
+    NFS and Lustre client counters on every host and continue once the
+    combined throughput stays below the threshold for the requested window,
+    or once the timeout is reached.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    hosts : string
+        A comma-separated list of hostnames to wait for, such as
+        'host1,host2,host3,host4'.
+    """
+    environment = {
+        'HOSTS': hosts,
+        'THRESHOLD': int(args.quiesce_threshold * 1e6),
+        'WINDOW': args.quiesce_window,
+        'TIMEOUT': args.quiesce_timeout
+    }
+    backends.execute('tests/quiesce.sh', environment=environment)
+
+
+def progress_label(log_file: str) -> str:
+    """
+    Returns a ``string`` of the name of a test to display in the progress
+    status based on its log file, such as 'stg_bw iteration 1, 4 systems'.
+    """
+    name = os.path.basename(log_file)
+    match = re.match(r'(.*?)_iteration_(\d+)_.*systems_(\d+)_', name)
+    if not match:
+        return name
+    test, iteration, systems = match.groups()
+    return f'{test} iteration {iteration}, {systems} systems'
+
+
+def write_manifest(filenames: list, test: str, iteration: int,
+                   command: str, environment: dict, start: float, end: float,
+                   exit_code: Optional[int], attempt: int = 1) -> NoReturn:
+    """
+    Write the manifest describing a test next to each of its logs.
+
+    The manifest records everything needed to identify the results of the
+    test without relying on the name of the log, allowing parse-results to
+    catalog every log in a single pass.
+
+    Parameters
+    ----------
+    filenames : list
+        A ``list`` of ``strings`` of the paths to every log that was written
+        for the test.
+    test : string
+        A ``string`` of the name of the test, such as 'nccl'.
+    iteration : int
+        An ``int`` of the local test number, starting at 1.
+    command : string
+        A ``string`` of the test script that was run inside the container.
+    environment : dict
+        A ``dictionary`` of the environment variables passed to the test.
+    start : float
+        A ``float`` of the time the test started in seconds since the epoch.
+    end : float
+        A ``float`` of the time the test ended in seconds since the epoch.
+    exit_code : int (Optional)
+        An ``int`` of the exit code of the test script, or `None` when the
+        test timed out and was killed.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, which is larger
+        than 1 when the iteration was retried. Defaults to 1.
+    """
+    hosts = environment['HOSTS'].split(',')
+    manifest = {
+        'test': test,
+        'iteration': iteration,
+        'command': command,
+        'parameters': environment,
+        'hosts': hosts,
+        'systems': len(hosts),
+        'version': version,
+        'start': start,
+        'end': end,
+        'status': COMPLETED if exit_code is not None else TIMED_OUT,
+        'exit_code': exit_code,
+        'attempts': attempt
+    }
+
+    for filename in filenames:
+        manifest['log'] = os.path.basename(filename)
+        write_file(manifest_filename(filename),
+                   json.dumps(manifest, indent=4))
+
+
+def test_status(log: str) -> str:
+    """
+    Returns a ``string`` of the status recorded in the manifest of a log,
+    either 'completed' or 'timed out'. Logs without a readable manifest are
+    considered completed.
+    """
+    try:
+        with open(manifest_filename(log), 'r') as manifest_file:
+            return json.load(manifest_file).get('status', COMPLETED)
+    except (OSError, ValueError):
+        return COMPLETED
+
+
+def execute_test(args: Namespace, command: str, environment: dict,
+                 log_file: str, test: str, iteration: int,
+                 attempt: int = 1) -> str:
+    """
+    Execute a test script inside the container.
+
+    Run the test script, saving all output to the log file and any mirrors,
+    and pause or wait for activity to settle afterwards if requested. A test
+    which times out is killed and the run continues with the next test. While
+    resuming an interrupted run, an existing log for a test that hasn't
+    completed is a partial log from the interrupted test and is removed first.
+    In progress mode, a single live status is shown for the test instead of
+    its full output. The results are extracted from the output as it is
+    written and saved as a JSON sidecar next to each log, along with a
+    manifest describing the test.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    command : string
+        A ``string`` of the test script to run inside the container.
+    environment : dict
+        A ``dictionary`` of environment variables to pass to the test.
+    log_file : string
+        A ``string`` of the path to the log file for the test, excluding any
+        suffix for the compression.
+    test : string
+        A ``string`` of the name of the test, such as 'nccl'.
+    iteration : int
+        An ``int`` of the local test number, starting at 1.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+        Recorded in the manifest and sidecar so retried iterations can be
+        identified while parsing. Defaults to 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file that was written,
+        including any suffix for the compression.
+    """
+    destinations = [log_file]
+    if args.log_mirror:
+        for directory in args.log_mirror.split(','):
+            create_directory(directory)
+            destinations.append(os.path.join(directory,
+                                             os.path.basename(log_file)))
+    if args.resume:
+        for destination in destinations:
+            leftovers = [sidecar_filename(destination),
+                         manifest_filename(destination)]
+            destination = log_filename(destination, args.log_compression)
+            if os.path.exists(destination):
+                print(f'Removing partial log {destination} from the '
+                      'interrupted run')
+                os.remove(destination)
+            for leftover in leftovers:
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    extractor = ResultExtractor(log_file)
+    progress = None
+    if args.progress:
+        progress = Progress(progress_label(log_file))
+    start = time()
+    with LogSink(destinations, args.log_compression, args.log_flush_lines,
+                 args.log_flush_interval, [extractor]) as sink:
+        exit_code = backends.execute(command,
+                                     environment=environment,
+                                     timeout=args.test_timeout,
+                                     idle_timeout=args.idle_timeout,
+                                     log_sink=sink,
+                                     progress=progress)
+    end = time()
+    completed = exit_code is not None
+    if progress:
+        progress.close('done' if completed else 'timed out')
+    extractor.save(sink.filenames, attempt)
+    write_manifest(sink.filenames, test, iteration, command, environment,
+                   start, end, exit_code, attempt)
+    if not completed:
+        print(f'Test timed out, continuing with the next test. See '
+              f'{sink.filenames[0]} for details.')
+
+    if args.quiesce:
+        wait_for_quiescence(args, environment['HOSTS'])
+    elif args.pause > 0:
+        sleep(args.pause)
+    return sink.filenames[0]
 
 
 def run_dali(args: Namespace, bobber_version: str, iteration: int,
-             hosts: str) -> NoReturn:
+             hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node DALI tests.
 
@@ -35,6 +260,13 @@ def run_dali(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     dali_log = os.path.join(args.log_path,
                             f'dali_iteration_{iteration}_'
@@ -46,20 +278,17 @@ def run_dali(args: Namespace, bobber_version: str, iteration: int,
     environment = {
         'BATCH_SIZE_LG': args.batch_size_lg,
         'BATCH_SIZE_SM': args.batch_size_sm,
+        'DATASET_CACHE': int(not args.no_dataset_cache),
         'GPUS': args.gpus,
         'HOSTS': hosts,
         'SSH_IFACE': args.ssh_iface
     }
-    manager.execute('tests/dali_multi.sh',
-                    environment=environment,
-                    log_file=dali_log)
-
-    if args.pause > 0:
-        sleep(args.pause)
+    return execute_test(args, 'tests/dali_multi.sh', environment, dali_log,
+                        'dali', iteration, attempt)
 
 
 def run_stg_bw(args: Namespace, bobber_version: str, iteration: int,
-               hosts: str) -> NoReturn:
+               hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node storage bandwidth tests with FIO.
 
@@ -78,6 +307,13 @@ def run_stg_bw(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     stg_bw_log = os.path.join(args.log_path,
                               f'stg_bw_iteration_{iteration}_'
@@ -92,21 +328,18 @@ def run_stg_bw(args: Namespace, bobber_version: str, iteration: int,
         'EXTRA_FLAGS': args.stg_extra_flags,
         'IO_DEPTH': args.io_depth,
         'DIRECTIO': args.direct,
+        'REUSE_LAYOUT': int(not args.no_layout_reuse),
         'THREADS': args.bw_threads,
         'READ_PATTERN': args.read_pattern,
         'WRITE_PATTERN': args.write_pattern,
         'HOSTS': hosts
     }
-    manager.execute('tests/fio_multi.sh',
-                    environment=environment,
-                    log_file=stg_bw_log)
-
-    if args.pause > 0:
-        sleep(args.pause)
+    return execute_test(args, 'tests/fio_multi.sh', environment, stg_bw_log,
+                        'stg_bw', iteration, attempt)
 
 
 def run_stg_125k(args: Namespace, bobber_version: str, iteration: int,
-                 hosts: str) -> NoReturn:
+                 hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node storage 125KB IO size tests with FIO.
 
@@ -125,6 +358,13 @@ def run_stg_125k(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     stg_125k_log = os.path.join(args.log_path,
                                 f'stg_125k_iteration_{iteration}_'
@@ -138,21 +378,18 @@ def run_stg_125k(args: Namespace, bobber_version: str, iteration: int,
         'IO_DEPTH': args.io_depth,
         'IOSIZE': 125,
         'DIRECTIO': args.direct,
+        'REUSE_LAYOUT': int(not args.no_layout_reuse),
         'THREADS': args.stg_125k_threads,
         'READ_PATTERN': args.read_pattern,
         'WRITE_PATTERN': args.write_pattern,
         'HOSTS': hosts
     }
-    manager.execute('tests/fio_multi.sh',
-                    environment=environment,
-                    log_file=stg_125k_log)
-
-    if args.pause > 0:
-        sleep(args.pause)
+    return execute_test(args, 'tests/fio_multi.sh', environment, stg_125k_log,
+                        'stg_125k', iteration, attempt)
 
 
 def run_stg_iops(args: Namespace, bobber_version: str, iteration: int,
-                 hosts: str) -> NoReturn:
+                 hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node storage IOPS tests with FIO.
 
@@ -171,6 +408,13 @@ def run_stg_iops(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     stg_iops_log = os.path.join(args.log_path,
                                 f'stg_iops_iteration_{iteration}_'
@@ -185,22 +429,19 @@ def run_stg_iops(args: Namespace, bobber_version: str, iteration: int,
         'EXTRA_FLAGS': args.stg_extra_flags,
         'IO_DEPTH': args.io_depth,
         'DIRECTIO': args.direct,
+        'REUSE_LAYOUT': int(not args.no_layout_reuse),
         'THREADS': args.iops_threads,
         'IOSIZE': 4,
         'READ_PATTERN': args.read_pattern,
         'WRITE_PATTERN': args.write_pattern,
         'HOSTS': hosts
     }
-    manager.execute('tests/fio_multi.sh',
-                    environment=environment,
-                    log_file=stg_iops_log)
-
-    if args.pause > 0:
-        sleep(args.pause)
+    return execute_test(args, 'tests/fio_multi.sh', environment, stg_iops_log,
+                        'stg_iops', iteration, attempt)
 
 
 def run_stg_meta(args: Namespace, bobber_version: str, iteration: int,
-                 hosts: str) -> NoReturn:
+                 hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node storage metadata test with FIO.
 
@@ -218,6 +459,13 @@ def run_stg_meta(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     stg_meta_log = os.path.join(args.log_path,
                                 f'stg_meta_iteration_{iteration}_'
@@ -228,16 +476,12 @@ def run_stg_meta(args: Namespace, bobber_version: str, iteration: int,
         'SSH_IFACE': args.ssh_iface,
         'NCCL_IB_HCAS': args.nccl_ib_hcas
     }
-    manager.execute('tests/mdtest_multi.sh',
-                    environment=environment,
-                    log_file=stg_meta_log)
-
-    if args.pause > 0:
-        sleep(args.pause)
+    return execute_test(args, 'tests/mdtest_multi.sh', environment,
+                        stg_meta_log, 'stg_meta', iteration, attempt)
 
 
 def run_nccl(args: Namespace, bobber_version: str, iteration: int,
-             hosts: str) -> NoReturn:
+             hosts: str, attempt: int = 1) -> str:
     """
     Run single or multi-node NCCL test.
 
@@ -255,6 +499,13 @@ def run_nccl(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    attempt : int
+        An ``int`` of the attempt number of the iteration, starting at 1.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
     """
     nccl_log = os.path.join(args.log_path,
                             f'nccl_iteration_{iteration}_'
@@ -273,20 +524,290 @@ def run_nccl(args: Namespace, bobber_version: str, iteration: int,
         'SSH_IFACE': args.ssh_iface,
         'NCCL_IB_HCAS': args.nccl_ib_hcas
     }
-    manager.execute('tests/nccl_multi.sh',
-                    environment=environment,
-                    log_file=nccl_log)
+    return execute_test(args, 'tests/nccl_multi.sh', environment, nccl_log,
+                        'nccl', iteration, attempt)
 
-    if args.pause > 0:
-        sleep(args.pause)
+
+# The tests run by each command in the order they are executed
+TESTS = {
+    RUN_DALI: [run_dali],
+    RUN_NCCL: [run_nccl],
+    RUN_STG_BW: [run_stg_bw],
+    RUN_STG_IOPS: [run_stg_iops],
+    RUN_STG_125K: [run_stg_125k],
+    RUN_STG_META: [run_stg_meta],
+    RUN_ALL: [run_nccl, run_stg_meta, run_stg_bw, run_dali, run_stg_iops,
+              run_stg_125k]
+}
+
+# The function which parses the main metric from a single log for each test
+TEST_METRICS = {
+    run_dali: dali_metric,
+    run_nccl: nccl_metric,
+    run_stg_bw: fio_bw_metric,
+    run_stg_iops: fio_iops_metric,
+    run_stg_125k: fio_bw_metric,
+    run_stg_meta: meta_metric
+}
+
+
+# Tests which don't touch the filesystem under test and can run while the
+# storage is being prepared for later tests
+STORAGE_FREE_TESTS = [run_nccl]
+
+
+def prepare_storage(args: Namespace, hosts: str) -> NoReturn:
+    """
+    Prepare the filesystem under test for the storage tests.
+
+    Generate the DALI datasets and lay out the fio files for every thread count
+    used by the storage tests ahead of time. Anything which is already prepared
+    is reused as-is. Since nothing is measured, all output is saved to a
+    separate file in the log directory instead of being displayed.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    hosts : string
+        A comma-separated list of hostnames to test against, such as
+        'host1,host2,host3,host4'.
+    """
+    log = os.path.join(args.log_path, 'preparation_systems_'
+                       f'{len(hosts.split(","))}.out')
+
+    if not args.no_dataset_cache:
+        backends.execute('tests/dali_dataset.sh prepare',
+                         environment={'GPUS': args.gpus},
+                         log_file=log,
+                         quiet=True)
+    if args.no_layout_reuse:
+        return
+    # Layouts are shared by all tests with the same number of threads
+    for threads in {args.bw_threads, args.stg_125k_threads,
+                    args.iops_threads}:
+        environment = {
+            'IO_DEPTH': args.io_depth,
+            'DIRECTIO': args.direct,
+            'PREPARE_ONLY': 1,
+            'REUSE_LAYOUT': 1,
+            'THREADS': threads,
+            'HOSTS': hosts
+        }
+        backends.execute('tests/fio_multi.sh',
+                         environment=environment,
+                         log_file=log,
+                         quiet=True)
+
+
+def start_preparation(args: Namespace, hosts: str) -> Optional[Future]:
+    """
+    Start preparing the storage in the background if possible.
+
+    While running all tests, the storage preparation runs at the same time as
+    the tests which don't touch the filesystem under test. Any error raised
+    while preparing the storage, including exits, is raised again when the
+    result of the preparation is read.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    hosts : string
+        A comma-separated list of hostnames to test against, such as
+        'host1,host2,host3,host4'.
+
+    Returns
+    -------
+    Future
+        Returns the ``Future`` of the preparation, or `None` if nothing is
+        being prepared.
+    """
+    if args.command != RUN_ALL or args.no_overlap:
+        return None
+    if args.no_dataset_cache and args.no_layout_reuse:
+        return None
+    executor = ThreadPoolExecutor(max_workers=1)
+    preparation = executor.submit(prepare_storage, args, hosts)
+    # The preparation keeps running in the background
+    executor.shutdown(wait=False)
+    return preparation
+
+
+def cleanup_datasets() -> NoReturn:
+    """
+    Remove all cached DALI datasets.
+
+    The synthetic datasets used by the DALI tests are generated once and reused
+    for every iteration and system count in a run. Once all tests are
+    complete, the datasets are removed from the filesystem under test.
+    """
+    backends.execute('tests/dali_dataset.sh clean')
+
+
+def cleanup_fio_layouts() -> NoReturn:
+    """
+    Remove all fio file layouts kept between tests.
+
+    The files laid out by fio prior to the storage tests are reused by every
+    test with the same thread count and file size. Once all tests are
+    complete, the layouts are removed from the filesystem under test.
+    """
+    backends.execute('tests/fio_cleanup.sh')
+
+
+def sweep_schedule(host_count: int, steps: Optional[str] = None) -> list:
+    """
+    Find the system counts to test during a sweep.
+
+    By default, a sweep adds a single system at a time until all hosts are
+    tested. If sweep steps were requested, only the listed system counts are
+    tested, or for a geometric rule such as 'geometric:2', the system count is
+    multiplied by the ratio for every step. The total number of hosts is always
+    included in a geometric sweep, while a list only includes the listed
+    system counts.
+
+    Parameters
+    ----------
+    host_count : int
+        An ``int`` of the total number of hosts passed by the user.
+    steps : string (Optional)
+        A ``string`` of the requested sweep steps, such as '1,2,4,8' or
+        'geometric:2'.
+
+    Returns
+    -------
+    list
+        Returns a sorted ``list`` of ``ints`` of the system counts to test.
+
+    Raises
+    ------
+    ValueError
+        Raises a ``ValueError`` if a requested system count is larger than the
+        number of hosts.
+    """
+    if not steps:
+        return list(range(1, host_count + 1))
+    if steps.startswith('geometric'):
+        ratio = int(steps.split(':')[1]) if ':' in steps else 2
+        schedule = []
+        count = 1
+        while count < host_count:
+            schedule.append(count)
+            count *= ratio
+        return schedule + [host_count]
+    schedule = sorted(int(step) for step in steps.split(','))
+    if schedule[-1] > host_count:
+        raise ValueError(f'Error: Cannot sweep to {schedule[-1]} systems with '
+                         f'only {host_count} hosts specified.')
+    return schedule
+
+
+def discard_log(args: Namespace, log: str, attempt: int) -> NoReturn:
+    """
+    Set aside an invalid log before the test is run again.
+
+    The log and all of its mirrors are renamed with the attempt number, such
+    as 'nccl_..._version_6_1_1.log.attempt_1', which keeps them for
+    troubleshooting while excluding them from the parsed results. Their
+    sidecars and manifests are removed.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    log : string
+        A ``string`` of the path to the invalid log.
+    attempt : int
+        An ``int`` of the attempt which produced the log, starting at 1.
+    """
+    logs = [log]
+
+    if args.log_mirror:
+        for directory in args.log_mirror.split(','):
+            logs.append(os.path.join(directory, os.path.basename(log)))
+    for log_file in logs:
+        if os.path.exists(log_file):
+            os.replace(log_file, f'{log_file}.attempt_{attempt}')
+        for leftover in [sidecar_filename(log_file),
+                         manifest_filename(log_file)]:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def run_test(args: Namespace, bobber_version: str, test: Callable[..., str],
+             iteration: int, hosts: str) -> str:
+    """
+    Run a single iteration of a test and record it in the journal.
+
+    Every test is appended to the journal in the log directory along with
+    whether it completed or timed out. When resuming an interrupted run,
+    tests which are already recorded as completed in the journal are
+    skipped. A test whose log doesn't contain a complete set of
+    results is run again up to the requested number of retries, and the
+    number of attempts is recorded in the journal. A warning is printed for
+    a log which is still invalid once every attempt is used up, as it is
+    skipped while parsing results.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    test : function
+        The function which runs a single iteration of the test, such as
+        `run_nccl`.
+    iteration : int
+        An ``int`` of the local test number, starting at 1.
+    hosts : string
+        A comma-separated list of hostnames to test against, such as
+        'host1,host2,host3,host4'.
+
+    Returns
+    -------
+    str
+        Returns a ``string`` of the path to the log file for the test.
+    """
+    name = test.__name__.replace('run_', '', 1)
+
+    if args.resume:
+        entry = completed_entry(args.log_path, name, iteration, hosts)
+        if entry:
+            print(f'Skipping {name} iteration {iteration} on {hosts}, '
+                  'already completed')
+            return entry['log']
+    start = time()
+    log = test(args, bobber_version, iteration, hosts)
+    attempts = 1
+    valid = valid_log(log)
+
+    while attempts <= args.retries and not valid:
+        print(f'Invalid results found in {log}. Retrying {name} iteration '
+              f'{iteration} (attempt {attempts + 1} of {args.retries + 1})')
+        discard_log(args, log, attempts)
+        attempts += 1
+        start = time()
+        log = test(args, bobber_version, iteration, hosts, attempts)
+        valid = valid_log(log)
+    if not valid:
+        print(f'Warning: {name} iteration {iteration} on {hosts} still has '
+              f'invalid results after {attempts} attempt(s). It will be '
+              f'skipped while parsing results. See {log} for details.')
+    record_entry(args.log_path, name, iteration, hosts, start, time(), log,
+                 attempts, test_status(log))
+    return log
 
 
 def kickoff_test(args: Namespace, bobber_version: str, iteration: int,
-                 hosts: str) -> NoReturn:
+                 hosts: str, preparation: Optional[Future] = None) -> \
+        NoReturn:
     """
     Start a specified test.
 
-    Launch a test as requested from the CLI for the given iteration.
+    Launch a test as requested from the CLI for the given iteration. If the
+    storage is being prepared in the background, the storage tests wait for
+    the preparation to finish first.
 
     Parameters
     ----------
@@ -299,26 +820,249 @@ def kickoff_test(args: Namespace, bobber_version: str, iteration: int,
     hosts : string
         A comma-separated list of hostnames to test against, such as
         'host1,host2,host3,host4'.
+    preparation : Future (Optional)
+        The ``Future`` of the storage preparation running in the background,
+        if any.
+    """
+    for test in TESTS[args.command]:
+        # Storage tests wait for the preparation to finish first
+        if preparation and test not in STORAGE_FREE_TESTS:
+            preparation.result()
+            preparation = None
+        run_test(args, bobber_version, test, iteration, hosts)
+    if preparation:
+        preparation.result()
+
+
+def run_until_stable(args: Namespace, bobber_version: str,
+                     test: Callable[..., str], hosts: str) -> NoReturn:
+    """
+    Run a test until the result is stable.
+
+    Run iterations of a single test and parse the log after each iteration to
+    find the main metric for the test. Once at least the minimum number of
+    valid results have been collected, stop as soon as the 95% confidence
+    interval of the metric is within the target percentage of the mean, or
+    once the maximum number of iterations is reached. Iterations with invalid
+    logs do not count towards the confidence interval.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    test : function
+        The function which runs a single iteration of the test, such as
+        `run_nccl`.
+    hosts : string
+        A comma-separated list of hostnames to test against, such as
+        'host1,host2,host3,host4'.
+    """
+    systems = len(hosts.split(','))
+    max_iterations = args.max_iterations or args.iterations
+    values = []
+
+    for iteration in range(1, max_iterations + 1):
+        log = run_test(args, bobber_version, test, iteration, hosts)
+        try:
+            value = TEST_METRICS[test](log, systems)
+        # The parsers raise a variety of errors for incomplete logs.
+        except (IndexError, KeyError, ValueError):
+            value = None
+        if value is None:
+            print(f'No valid result found in {log}, ignoring iteration')
+            continue
+        values.append(value)
+        interval = confidence_interval(values)
+        print(f'{test.__name__} iteration {iteration}: 95% confidence '
+              f'interval is +/-{round(interval, 2)}% after {len(values)} '
+              'valid result(s)')
+        if len(values) >= args.min_iterations and \
+           interval <= args.target_ci:
+            print(f'{test.__name__} is stable after {iteration} iteration(s)')
+            return
+    print(f'{test.__name__} did not reach a {args.target_ci}% confidence '
+          f'interval in {max_iterations} iteration(s)')
+
+
+def run_system_count(args: Namespace, bobber_version: str, hosts: list,
+                     count: int) -> NoReturn:
+    """
+    Run all iterations of the requested tests for N-systems.
+
+    If a target confidence interval was requested, each test is run until its
+    result is stable instead of for a fixed number of iterations. While
+    running all tests, the storage is prepared once for the system count at
+    the same time as the tests which don't use the storage.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    hosts : list
+        A ``list`` of all hostnames passed by the user, such as
+        ['host1', 'host2', 'host3', 'host4'].
+    count : int
+        An ``int`` of the number of systems to test, starting with the first
+        host in the list.
     """
-    if args.command == RUN_DALI:
-        run_dali(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_NCCL:
-        run_nccl(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_STG_BW:
-        run_stg_bw(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_STG_IOPS:
-        run_stg_iops(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_STG_125K:
-        run_stg_125k(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_STG_META:
-        run_stg_meta(args, bobber_version, iteration, hosts)
-    elif args.command == RUN_ALL:
-        run_nccl(args, bobber_version, iteration, hosts)
-        run_stg_meta(args, bobber_version, iteration, hosts)
-        run_stg_bw(args, bobber_version, iteration, hosts)
-        run_dali(args, bobber_version, iteration, hosts)
-        run_stg_iops(args, bobber_version, iteration, hosts)
-        run_stg_125k(args, bobber_version, iteration, hosts)
+    host_string = ','.join(hosts[:count])
+    preparation = start_preparation(args, host_string)
+
+    if args.target_ci:
+        for test in TESTS[args.command]:
+            if preparation and test not in STORAGE_FREE_TESTS:
+                preparation.result()
+                preparation = None
+            run_until_stable(args, bobber_version, test, host_string)
+        if preparation:
+            preparation.result()
+        return
+    for iteration in range(1, args.iterations + 1):
+        kickoff_test(args, bobber_version, iteration, host_string,
+                     preparation)
+        # Only the first iteration waits for the preparation
+        preparation = None
+
+
+def knee_metric(log_path: str, metric: str, systems: int,
+                cache: Optional[ParseCache] = None) -> float:
+    """
+    Find the aggregate value of a metric for N-systems.
+
+    Parse all logs in the log directory and pull the requested metric from the
+    aggregate results for the given system count. With a cache, only the logs
+    written since the previous call are parsed.
+
+    Parameters
+    ----------
+    log_path : string
+        A ``string`` of the directory where the logs are saved.
+    metric : string
+        A ``string`` of the metric to find, such as 'fio-read-bw'.
+    systems : int
+        An ``int`` of the number of systems to find the metric for.
+    cache : ParseCache (Optional)
+        A ``ParseCache`` of the results parsed from the log directory.
+
+    Returns
+    -------
+    float
+        Returns a ``float`` of the aggregate value of the metric for all
+        iterations. Defaults to 0.0 if no results were found.
+    """
+    aggregates = aggregate_systems(LogCatalog(get_files(log_path)),
+                                   cache=cache)
+    if systems not in aggregates:
+        return 0.0
+    value = aggregates[systems].json
+    for key in KNEE_METRICS[metric]:
+        value = value.get(key, {})
+    return float(value or 0.0)
+
+
+def bisect_knee(args: Namespace, bobber_version: str,
+                cache: ParseCache) -> Tuple[dict, int, int]:
+    """
+    Bisect the hosts list to find the knee of the requested metric.
+
+    See `find_knee` for a description of the search.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    cache : ParseCache
+        A ``ParseCache`` of the results parsed from the log directory.
+
+    Returns
+    -------
+    tuple
+        Returns a ``tuple`` of a ``dictionary`` of the per-system efficiency
+        of every measured system count, and the ``ints`` of the largest system
+        count at or above the threshold and the smallest system count below
+        it.
+    """
+    hosts = args.hosts.split(',')
+    threshold = args.knee_threshold / 100.0
+
+    run_system_count(args, bobber_version, hosts, 1)
+    baseline = knee_metric(args.log_path, args.find_knee, 1, cache)
+    if baseline <= 0:
+        print(f'Error: No {args.find_knee} results found for a single system.'
+              ' Ensure the requested tests produce the selected metric.')
+        sys.exit(MISSING_KNEE_RESULTS)
+    efficiency = {1: 1.0}
+    low, high = 1, len(hosts)
+
+    # Only bisect if scaling has already broken down at the full host count.
+    if high > low:
+        run_system_count(args, bobber_version, hosts, high)
+        value = knee_metric(args.log_path, args.find_knee, high, cache)
+        efficiency[high] = value / high / baseline
+        if efficiency[high] >= threshold:
+            low = high
+    while high - low > 1:
+        mid = (low + high) // 2
+        run_system_count(args, bobber_version, hosts, mid)
+        value = knee_metric(args.log_path, args.find_knee, mid, cache)
+        efficiency[mid] = value / mid / baseline
+        if efficiency[mid] >= threshold:
+            low = mid
+        else:
+            high = mid
+    return efficiency, low, high
+
+
+def find_knee(args: Namespace, bobber_version: str) -> NoReturn:
+    """
+    Find the system count where scaling breaks down.
+
+    Rather than running every system count in a sweep, bisect the hosts list
+    to find the last system count where the per-system efficiency of the
+    requested metric stays at or above the threshold. The efficiency is the
+    per-system value of the metric for N-systems relative to the
+    single-system result. Assuming efficiency drops as systems are added, the
+    knee is found in roughly log2(N) steps instead of N. A summary of all
+    measured system counts is saved as "knee.json" in the log directory. The
+    parsed results are cached in the log directory so every step only parses
+    the new logs. Exits if there are no single-system results for the metric.
+
+    Parameters
+    ----------
+    args : Namespace
+        A ``Namespace`` of all settings specified by the user for the test.
+    bobber_version : string
+        A ``string`` of the local version of Bobber, such as '5.0.0'.
+    """
+    with ParseCache(args.log_path) as cache:
+        efficiency, low, high = bisect_knee(args, bobber_version, cache)
+    hosts = args.hosts.split(',')
+
+    print(f'Per-system {args.find_knee} efficiency:')
+    for systems, value in sorted(efficiency.items()):
+        print(f'    {systems} system(s): {round(value * 100, 2)}%')
+    if low == len(hosts):
+        print(f'Efficiency stays at or above {args.knee_threshold}% for all '
+              f'{low} system(s)')
+        knee = None
+    else:
+        print(f'Efficiency drops below {args.knee_threshold}% at {high} '
+              f'system(s) and holds through {low} system(s)')
+        knee = high
+    summary = {
+        'metric': args.find_knee,
+        'threshold': args.knee_threshold,
+        'efficiency': efficiency,
+        'last_scaling_systems': low,
+        'knee_systems': knee
+    }
+    write_file(os.path.join(args.log_path, 'knee.json'), json.dumps(summary))
 
 
 def test_selector(args: Namespace, bobber_version: str) -> NoReturn:
@@ -328,8 +1072,12 @@ def test_selector(args: Namespace, bobber_version: str) -> NoReturn:
     If the user requested to run a sweep of the hosts, the tests will begin
     with the first node in the hosts list for a single-node test, then
     progressively add the next host in the list until all nodes are tested
-    together. During each iteration, one run of each requested test will be
-    executed before going to the next iteration.
+    together. If sweep steps were specified, only those system counts are
+    tested, using the first N hosts in the list. If a knee search was
+    requested, the hosts list is bisected instead. During each iteration, one
+    run of each requested test will be executed before going to the next
+    iteration. Any data that is cached between tests is removed once all tests
+    are complete.
 
     Parameters
     ----------
@@ -338,14 +1086,18 @@ def test_selector(args: Namespace, bobber_version: str) -> NoReturn:
     bobber_version : string
         A ``string`` of the local version of Bobber, such as '5.0.0'.
     """
-    if args.sweep:
-        hosts = []
+    hosts = args.hosts.split(',')
 
-        for host in args.hosts.split(','):
-            hosts.append(host)
-            for iteration in range(1, args.iterations + 1):
-                host_string = ','.join(hosts)
-                kickoff_test(args, bobber_version, iteration, host_string)
+    if args.find_knee:
+        find_knee(args, bobber_version)
+    elif args.sweep or args.sweep_steps:
+        for count in sweep_schedule(len(hosts), args.sweep_steps):
+            run_system_count(args, bobber_version, hosts, count)
     else:
-        for iteration in range(1, args.iterations + 1):
-            kickoff_test(args, bobber_version, iteration, args.hosts)
+        run_system_count(args, bobber_version, hosts, len(hosts))
+
+    if args.command in [RUN_ALL, RUN_DALI] and not args.no_dataset_cache:
+        cleanup_datasets()
+    if args.command in [RUN_ALL, RUN_STG_BW, RUN_STG_125K, RUN_STG_IOPS] and \
+       not args.no_layout_reuse:
+        cleanup_fio_layouts()
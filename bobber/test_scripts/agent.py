@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: MIT
+"""
+Long-running agent inside the Bobber container on every host.
+
+The agent is started by "bobber cast" and handles the small, frequent
+operations of every test without starting a new SSH session, MPI job, or
+Docker exec for each one:
+
+* drop_caches: Drop the page cache on the host.
+* fio_start / fio_stop: Start or stop the fio server on the host.
+* telemetry: Sample the storage and network counters of the host.
+* version: Return the version of Bobber in the image.
+* run: Run a command, streaming its output back.
+
+The agent listens on a Unix socket, which is shared with the host so Bobber on
+the head node can send commands without a Docker exec. When an interface is
+given with AGENT_INTERFACE, the agent also listens on a TCP port on the address
+of that interface for requests from the agents and test scripts on other
+hosts. TCP requests must include the token "bobber cast" shares with every
+host, and can only run the fixed operations above; arbitrary commands are only
+accepted over the Unix socket.
+
+Every request is a single line of JSON. Every response is one or more lines of
+JSON, ending with a line containing the exit code of the request.
+
+Usage:
+    agent.py serve
+    agent.py call <operation> <host> [<host> ...]
+
+"agent.py call" prints the output of every host to stderr and the name of
+every host where the request failed to stdout, one per line, so test scripts
+can fall back to SSH for only those hosts.
+"""
+import argparse
+import fcntl
+import hmac
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Unix socket for requests from the local host
+AGENT_SOCKET = os.environ.get('AGENT_SOCKET', '/run/bobber/agent.sock')
+# TCP port for requests from other hosts
+AGENT_PORT = int(os.environ.get('AGENT_PORT', 2223))
+# Network interface to listen on for requests from other hosts, if any
+AGENT_INTERFACE = os.environ.get('AGENT_INTERFACE', '')
+# Shared secret generated by "bobber cast" and shared with the host
+TOKEN_FILE = os.environ.get('AGENT_TOKEN_FILE', '/run/bobber/agent_token')
+# The fio binary started by the fio_start operation
+FIOBIN = os.environ.get('FIOBIN', 'fio')
+# Number of bytes to read from the output of a command at a time
+READ_SIZE = 64 * 1024
+# Hosts which are reached over the Unix socket instead of TCP
+LOCAL_HOSTS = ['localhost', '127.0.0.1']
+
+
+def read_token():
+    """
+    Returns the shared token for TCP requests, or an empty string if the
+    token file is missing.
+    """
+    try:
+        with open(TOKEN_FILE, 'r') as token_file:
+            return token_file.read().strip()
+    except OSError:
+        return ''
+
+
+def interface_address(interface):
+    """
+    Returns the IPv4 address of a network interface.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # SIOCGIFADDR
+        packed = fcntl.ioctl(sock.fileno(), 0x8915,
+                             struct.pack('256s', interface[:15].encode()))
+    return socket.inet_ntoa(packed[20:24])
+
+
+def drop_caches():
+    """
+    Flush dirty pages and drop the page cache, dentries, and inodes.
+    """
+    os.sync()
+    with open('/proc/sys/vm/drop_caches', 'w') as caches:
+        caches.write('3\n')
+    return 0, 'Dropped caches\n'
+
+
+def fio_start():
+    """
+    Start the fio server in the background.
+    """
+    result = subprocess.run([FIOBIN, '--server',
+                             '--daemonize=/tmp/bobber_fio.pid'],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return result.returncode, result.stdout.decode('utf-8', errors='replace')
+
+
+def fio_stop():
+    """
+    Stop every fio process on the host.
+    """
+    subprocess.run(['killall', 'fio'], stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+    return 0, 'Stopped fio\n'
+
+
+def _sum_file(filename, parse):
+    """
+    Returns the total of all values parsed from a file, or 0 if the file
+    can't be read.
+    """
+    try:
+        with open(filename, 'r') as counters:
+            return sum(parse(line.split()) for line in counters)
+    except OSError:
+        return 0
+
+
+def telemetry():
+    """
+    Sample the cumulative byte counters of the block devices, network
+    interfaces, and NFS clients along with the load average of the host.
+    """
+    devices = [device for device in os.listdir('/sys/block')
+               if not device.startswith(('loop', 'ram'))]
+    # Only whole devices are counted to avoid counting partitions twice
+    disk = _sum_file('/proc/diskstats', lambda fields:
+                     (int(fields[5]) + int(fields[9])) * 512
+                     if len(fields) > 9 and fields[2] in devices else 0)
+    network = _sum_file('/proc/net/dev', lambda fields:
+                        int(fields[1]) + int(fields[9])
+                        if len(fields) > 9 and fields[0].endswith(':') and
+                        fields[0] != 'lo:' else 0)
+    nfs = _sum_file('/proc/self/mountstats', lambda fields:
+                    sum(int(value) for value in fields[1:5])
+                    if fields[:1] == ['bytes:'] else 0)
+    sample = {
+        'time': time.time(),
+        'disk_bytes': disk,
+        'network_bytes': network,
+        'nfs_bytes': nfs,
+        'load': os.getloadavg()[0]
+    }
+    return 0, json.dumps(sample) + '\n'
+
+
+def version():
+    """
+    Returns the version of Bobber the image was built for.
+    """
+    with open('/etc/bobber_version', 'r') as version_file:
+        return 0, version_file.read()
+
+
+OPERATIONS = {
+    'drop_caches': drop_caches,
+    'fio_start': fio_start,
+    'fio_stop': fio_stop,
+    'telemetry': telemetry,
+    'version': version
+}
+
+
+class AgentHandler(socketserver.StreamRequestHandler):
+    """
+    Handle a single request from a client.
+    """
+    def send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            self.send({'error': 'Invalid request', 'exit_code': 1})
+            return
+        if self.server.token is not None and not hmac.compare_digest(
+                str(request.get('token', '')), self.server.token):
+            self.send({'error': 'Invalid token', 'exit_code': 1})
+            return
+        operation = request.get('operation')
+        try:
+            # Arbitrary commands are only accepted from the local host
+            if operation == 'run' and self.server.token is None:
+                exit_code = self.run(request.get('command', ''),
+                                     request.get('environment') or {})
+            elif operation in OPERATIONS:
+                exit_code, output = OPERATIONS[operation]()
+                self.send({'output': output})
+            elif operation == 'run':
+                self.send({'error': 'Commands are only accepted from the '
+                           'local host', 'exit_code': 1})
+                return
+            else:
+                self.send({'error': f'Unknown operation {operation}',
+                           'exit_code': 1})
+                return
+            self.send({'exit_code': exit_code})
+        # The client has disconnected or the operation failed on the host
+        except OSError as e:
+            try:
+                self.send({'error': str(e), 'exit_code': 1})
+            except OSError:
+                pass
+
+    def run(self, command, environment):
+        """
+        Run a command in a new session, streaming its output to the client.
+        The command and all of its child processes are killed if the client
+        disconnects before the command finishes.
+        """
+        env = dict(os.environ)
+        env.update({key: str(value) for key, value in environment.items()
+                    if value is not None})
+        process = subprocess.Popen(['bash', '-c', command], cwd='/', env=env,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT,
+                                   start_new_session=True)
+
+        def kill_on_disconnect():
+            # The client never sends anything after the request, so any
+            # return from recv means the client has disconnected
+            try:
+                self.request.recv(1)
+            except OSError:
+                pass
+            if process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        threading.Thread(target=kill_on_disconnect, daemon=True).start()
+        while True:
+            chunk = os.read(process.stdout.fileno(), READ_SIZE)
+            if not chunk:
+                break
+            try:
+                self.send({'output': chunk.decode('utf-8',
+                                                  errors='replace')})
+            except OSError:
+                break
+        process.stdout.close()
+        return process.wait()
+
+
+class UnixAgentServer(socketserver.ThreadingMixIn,
+                      socketserver.UnixStreamServer):
+    daemon_threads = True
+    token = None
+
+
+class TCPAgentServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, token):
+        self.token = token
+        super().__init__(address, AgentHandler)
+
+
+def serve():
+    """
+    Listen for requests on the Unix socket and, if an interface and token are
+    available, the TCP port until killed.
+    """
+    token = read_token()
+    os.makedirs(os.path.dirname(AGENT_SOCKET), exist_ok=True)
+    if os.path.exists(AGENT_SOCKET):
+        os.remove(AGENT_SOCKET)
+    servers = [UnixAgentServer(AGENT_SOCKET, AgentHandler)]
+    os.chmod(AGENT_SOCKET, 0o600)
+    address = None
+    # Without a token, anyone on the network could send requests
+    if not AGENT_INTERFACE:
+        print('AGENT_INTERFACE not set, only listening on the Unix socket')
+    elif not token:
+        print(f'{TOKEN_FILE} not found, only listening on the Unix socket')
+    else:
+        try:
+            address = interface_address(AGENT_INTERFACE)
+            servers.append(TCPAgentServer((address, AGENT_PORT), token))
+        except OSError as e:
+            print(f'Unable to listen on {AGENT_INTERFACE}: {e}')
+            address = None
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'Bobber agent listening on {AGENT_SOCKET}' +
+          (f' and {address}:{AGENT_PORT}' if address else ''))
+    sys.stdout.flush()
+    servers[0].serve_forever()
+
+
+def connect(host, timeout=None):
+    """
+    Returns a socket connected to the agent on a host.
+    """
+    if host in LOCAL_HOSTS and os.path.exists(AGENT_SOCKET):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(AGENT_SOCKET)
+        return connection
+    return socket.create_connection((host, AGENT_PORT), timeout=timeout)
+
+
+def request(host, operation, timeout=60):
+    """
+    Send a request to the agent on a host and return a tuple of the exit
+    code and all output.
+    """
+    message = {'operation': operation, 'token': read_token()}
+    output = []
+    exit_code = 1
+    try:
+        with connect(host, timeout) as connection:
+            connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            for line in connection.makefile('rb'):
+                response = json.loads(line)
+                output.append(response.get('output', ''))
+                if 'error' in response:
+                    output.append(response['error'] + '\n')
+                if 'exit_code' in response:
+                    exit_code = response['exit_code']
+                    break
+    except (OSError, ValueError) as e:
+        return 1, f'Unable to reach the Bobber agent: {e}\n'
+    return exit_code, ''.join(output)
+
+
+def call(operation, hosts):
+    """
+    Send a request to the agent on every host in parallel, printing the
+    output from each host to stderr and every host where the request failed
+    to stdout. Returns 0 if the request succeeded on every host.
+    """
+    with ThreadPoolExecutor(max_workers=max(len(hosts), 1)) as executor:
+        results = list(executor.map(
+            lambda host: request(host, operation), hosts))
+    failed = []
+    for host, (exit_code, output) in zip(hosts, results):
+        for line in output.splitlines():
+            print(f'{host}: {line}', file=sys.stderr)
+        if exit_code != 0:
+            failed.append(host)
+    for host in failed:
+        print(host)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser('Bobber agent')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    commands.add_parser('serve', help='Start the agent')
+    caller = commands.add_parser('call', help='Send a request to the agent on '
+                                 'one or more hosts')
+    caller.add_argument('operation', choices=OPERATIONS.keys())
+    caller.add_argument('hosts', nargs='+')
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve()
+    else:
+        sys.exit(call(args.operation, args.hosts))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/bin/bash
+# SPDX-License-Identifier: MIT
+# Manage the synthetic Imageinary datasets used by the DALI tests.
+#
+# Every dataset lives in its own directory under $CACHE_DIR which is keyed by
+# the resolution, image count, GPU count, and format. A manifest is written
+# once a dataset has been completely generated and is validated against the
+# files on disk before the dataset is reused, allowing every iteration and
+# system count in a campaign to share the same data.
+#
+# This file is sourced by dali_multi.sh. It can also be executed directly with
+# "prepare" as the only argument to generate any missing datasets ahead of the
+# DALI tests, or with "clean" to remove all cached datasets.
+
+if [ "x$GPUS" = "x" ]; then
+	GPUS=8
+fi
+
+CACHE_DIR=/mnt/fs_under_test/imageinary_data
+IMAGE_COUNT=$(($GPUS*1000))
+IMAGES_PER_RECORD=1000
+# One TFRecord (and one index) is created per 1000 images, ie. one per GPU
+RECORD_COUNT=$(($IMAGE_COUNT/$IMAGES_PER_RECORD))
+
+dataset_dir () {
+	# $1: resolution, $2: format
+	echo "$CACHE_DIR/$1/${2}_images_${IMAGE_COUNT}_gpus_${GPUS}"
+}
+
+write_manifest () {
+	# $1: dataset directory, $2: resolution, $3: format, $4: file count
+	cat > $1/manifest <<EOF
+resolution=$2
+format=$3
+images=$IMAGE_COUNT
+gpus=$GPUS
+files=$4
+EOF
+}
+
+valid_dataset () {
+	# $1: dataset directory, $2: expected file count
+	if [ ! -f $1/manifest ] || [ ! -f $1/generation.log ]; then
+		return 1
+	fi
+	if ! grep -q "^files=$2$" $1/manifest; then
+		return 1
+	fi
+	# Only the generated data lives below the top level of the dataset
+	if [ $(find $1 -mindepth 2 -type f | wc -l) -ne $2 ]; then
+		return 1
+	fi
+	if [ $(find $1 -mindepth 2 -type f -empty | wc -l) -ne 0 ]; then
+		return 1
+	fi
+	return 0
+}
+
+create_images () {
+	# $1: width, $2: height, $3: image prefix
+	RESOLUTION=${1}x${2}
+	DIR=$(dataset_dir $RESOLUTION jpg)
+
+	if valid_dataset $DIR $IMAGE_COUNT; then
+		echo "Reusing cached $RESOLUTION jpg dataset at $DIR"
+		# Replay the original output as the parser reads the image sizes from
+		# the log
+		cat $DIR/generation.log
+		return 0
+	fi
+	rm -rf $DIR
+	mkdir -p $DIR/file_read_pipeline_images/images
+
+	imagine create-images --width $1 --height $2 --count $IMAGE_COUNT --size $DIR/file_read_pipeline_images/images $3 jpg | tee $DIR/generation.log
+	if [ ${PIPESTATUS[0]} -ne 0 ]; then
+		echo "ERROR: Unable to create $RESOLUTION jpg dataset"
+		return 1
+	fi
+	write_manifest $DIR $RESOLUTION jpg $IMAGE_COUNT
+}
+
+create_tfrecords () {
+	# $1: resolution
+	SOURCE=$(dataset_dir $1 jpg)
+	DIR=$(dataset_dir $1 tfrecord)
+
+	# Each TFRecord has a matching index file
+	if valid_dataset $DIR $(($RECORD_COUNT*2)); then
+		echo "Reusing cached $1 tfrecord dataset at $DIR"
+		cat $DIR/generation.log
+		return 0
+	fi
+	rm -rf $DIR
+	mkdir -p $DIR/tfrecord_pipeline
+	mkdir -p $DIR/tfrecord_pipeline.idx
+
+	imagine create-tfrecord --img-per-file $IMAGES_PER_RECORD $SOURCE/file_read_pipeline_images/images $DIR/tfrecord_pipeline tfrecord- | tee $DIR/generation.log
+	if [ ${PIPESTATUS[0]} -ne 0 ]; then
+		echo "ERROR: Unable to create $1 tfrecord dataset"
+		return 1
+	fi
+
+	# The indices are independent of each other and can be built in parallel
+	declare -a pidlist
+	unset pidlist
+	for i in $(seq 0 $(($RECORD_COUNT-1))); do
+		/dali/tools/tfrecord2idx $DIR/tfrecord_pipeline/tfrecord-$i $DIR/tfrecord_pipeline.idx/tfrecord-$i &
+		pidlist=(${pidlist[@]} $!)
+	done
+	for p in ${pidlist[@]}; do
+		if ! wait $p; then
+			echo "ERROR: Unable to index $1 tfrecord dataset"
+			return 1
+		fi
+	done
+	write_manifest $DIR $1 tfrecord $(($RECORD_COUNT*2))
+}
+
+create_datasets () {
+	# Generated in the same order as the original uncached pipeline to keep
+	# the log output consistent
+	create_images 3840 2160 4k_image_ || return 1
+	create_images 800 600 small_image_ || return 1
+	create_tfrecords 3840x2160 || return 1
+	create_tfrecords 800x600 || return 1
+
+	LG_IMAGES=$(dataset_dir 3840x2160 jpg)/file_read_pipeline_images
+	SM_IMAGES=$(dataset_dir 800x600 jpg)/file_read_pipeline_images
+	LG_TFRECORDS=$(dataset_dir 3840x2160 tfrecord)/tfrecord_pipeline
+	SM_TFRECORDS=$(dataset_dir 800x600 tfrecord)/tfrecord_pipeline
+}
+
+clean_datasets () {
+	echo "Removing DALI datasets from $CACHE_DIR"
+	rm -rf $CACHE_DIR
+}
+
+if [ "${BASH_SOURCE[0]}" == "$0" ]; then
+	case $1 in
+		prepare)
+			create_datasets
+			;;
+		clean)
+			clean_datasets
+			;;
+		*)
+			echo "Usage: $0 prepare|clean"
+			exit 1
+			;;
+	esac
+fi
@@ -32,32 +32,51 @@ for i in ${HOST_ARRAY[@]}; do
 	HOST_STRING+="$i:$GPUS,"
 done
 
-mkdir -p /mnt/fs_under_test/imageinary_data/3840x2160/file_read_pipeline_images/images
-mkdir -p /mnt/fs_under_test/imageinary_data/800x600/file_read_pipeline_images/images
-mkdir -p /mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline
-mkdir -p /mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline
-mkdir -p /mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline.idx
-mkdir -p /mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline.idx
-
-imagine create-images --width 3840 --height 2160 --count $(($GPUS*1000)) --size /mnt/fs_under_test/imageinary_data/3840x2160/file_read_pipeline_images/images 4k_image_ jpg
-imagine create-images --width 800 --height 600 --count $(($GPUS*1000)) --size /mnt/fs_under_test/imageinary_data/800x600/file_read_pipeline_images/images small_image_ jpg
+if [ "x$DATASET_CACHE" = "x" ]; then
+	DATASET_CACHE=0
+fi
 
-imagine create-tfrecord --img-per-file 1000 /mnt/fs_under_test/imageinary_data/3840x2160/file_read_pipeline_images/images /mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline tfrecord-
-imagine create-tfrecord --img-per-file 1000 /mnt/fs_under_test/imageinary_data/800x600/file_read_pipeline_images/images /mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline tfrecord-
+source /tests/dali_dataset.sh
+
+drop_caches () {
+	# Use the Bobber agent on every host instead of starting a new MPI job,
+	# falling back to MPI on only the hosts where the agent can't be reached
+	local FAILED
+	if FAILED=$(python3 /tests/agent.py call drop_caches ${HOST_ARRAY[@]} 2> /dev/null); then
+		return
+	fi
+	local FAILED_STRING=$HOST_STRING
+	if [ -n "$FAILED" ]; then
+		FAILED_STRING=""
+		for i in $FAILED; do
+			FAILED_STRING+="$i:$GPUS,"
+		done
+	fi
+	mpirun --allow-run-as-root -H ${FAILED_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE sysctl vm.drop_caches=3
+}
+
+# Without the cache, always start from freshly generated data
+if [ "$DATASET_CACHE" != "1" ]; then
+	clean_datasets
+fi
 
-for i in $(seq 0 $GPUS_ZERO_BASE); do /dali/tools/tfrecord2idx /mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline/tfrecord-$i /mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline.idx/tfrecord-$i; done
-for i in $(seq 0 $GPUS_ZERO_BASE); do /dali/tools/tfrecord2idx /mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline/tfrecord-$i /mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline.idx/tfrecord-$i; done
+if ! create_datasets; then
+	exit 1
+fi
 
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_SM /mnt/fs_under_test/imageinary_data/800x600/file_read_pipeline_images $GPUS
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE sysctl vm.drop_caches=3
+mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_SM $SM_IMAGES $GPUS
+drop_caches
 
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_LG /mnt/fs_under_test/imageinary_data/3840x2160/file_read_pipeline_images $GPUS
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE sysctl vm.drop_caches=3
+mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_LG $LG_IMAGES $GPUS
+drop_caches
 
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_SM "/mnt/fs_under_test/imageinary_data/800x600/tfrecord_pipeline/tfrecord-*" $GPUS
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE sysctl vm.drop_caches=3
+mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_SM "$SM_TFRECORDS/tfrecord-*" $GPUS
+drop_caches
 
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_LG "/mnt/fs_under_test/imageinary_data/3840x2160/tfrecord_pipeline/tfrecord-*" $GPUS
-mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE sysctl vm.drop_caches=3
+mpirun --allow-run-as-root -H ${HOST_STRING%?} -bind-to none -map-by ppr:1:node --mca plm_rsh_agent ssh -mca plm_rsh_args "-p 2222" -mca btl_tcp_if_include $SSH_IFACE /tests/call_dali_multi.sh $BATCH_SIZE_LG "$LG_TFRECORDS/tfrecord-*" $GPUS
+drop_caches
 
-rm -r /mnt/fs_under_test/imageinary_data
+# Cached datasets are removed once the campaign finishes
+if [ "$DATASET_CACHE" != "1" ]; then
+	clean_datasets
+fi
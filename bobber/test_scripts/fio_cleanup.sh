@@ -0,0 +1,8 @@
+#!/bin/bash
+# SPDX-License-Identifier: MIT
+# Remove the fio file layouts which were kept for reuse between tests
+
+FSDIR=/mnt/fs_under_test
+
+echo "Removing fio file layouts from $FSDIR"
+rm -rf $FSDIR/fiodir.layout_*
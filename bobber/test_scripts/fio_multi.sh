@@ -50,7 +50,24 @@ CREATEOPTS="--invalidate=${INVALIDATE} --blocksize=${CREATE_IOSIZE}k --size=${SI
 # List of commands
 ## Run create only first as it has been said it improves performance
 ## Run create with a large blocksize, because using a smaller blocksize will take an inordinate amount of time
-launch_fio --create_only=1 --rw=write ${IOSETTINGS} ${STDOPTS} ${CREATEOPTS}
+## Reuse the layout from a previous test instead, if it is still intact
+if [ x"$REUSE_LAYOUT" == x"1" ] && layout_ready; then
+        echo "Reusing existing file layout in $WORKDIR"
+else
+        if [ x"$REUSE_LAYOUT" == x"1" ]; then
+                rm -rf $WORKDIR
+                mkdir -p $WORKDIR
+        fi
+        launch_fio --create_only=1 --rw=write ${IOSETTINGS} ${STDOPTS} ${CREATEOPTS}
+fi
+
+## Only lay out the files for a later test, keeping them in place
+if [ x"$PREPARE_ONLY" == x"1" ]; then
+        stop_servers
+        rm -f $JOBFN
+        echo "Done Preparing FIO File Layout"
+        exit 0
+fi
 
 launch_fio --rw=${WRITE_PATTERN} ${IOSETTINGS} ${STDOPTS} ${RUNOPTS} ${EXTRA_FLAGS}
 drop_caches
@@ -63,7 +80,9 @@ stop_servers
 
 echo "Cleaning workspace"
 rm -f $JOBFN
-if [ "x$NORMDATA" == "x" ]; then
+if [ x"$REUSE_LAYOUT" == x"1" ]; then
+        echo "Keeping file layout in $WORKDIR for later tests"
+elif [ "x$NORMDATA" == "x" ]; then
         rm -rf $WORKDIR
 fi
 
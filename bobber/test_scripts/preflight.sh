@@ -0,0 +1,72 @@
+#!/bin/bash
+# SPDX-License-Identifier: MIT
+# Verify a single host is ready to run tests.
+#
+# When run without arguments, connects to $HOST on port 2222, which is only
+# reachable while the Bobber container is running on that host, and runs the
+# checks below inside the remote container. Every check prints a single line
+# starting with PASS or FAIL and the script exits non-zero if any check fails.
+
+FSDIR=/mnt/fs_under_test
+
+if [ "x$REQUIRED_BYTES" = "x" ]; then
+	REQUIRED_BYTES=0
+fi
+
+check () {
+	# $1: result (0 for success), $2: check name, $3: message
+	if [ $1 -eq 0 ]; then
+		echo "PASS $2: $3"
+	else
+		echo "FAIL $2: $3"
+		FAILED=1
+	fi
+}
+
+remote_checks () {
+	FAILED=0
+
+	VERSION=$(cat /etc/bobber_version 2> /dev/null)
+	[ "$VERSION" = "$EXPECTED_VERSION" ]
+	check $? version "container version is ${VERSION:-unknown}, expected $EXPECTED_VERSION"
+
+	PROBE=$FSDIR/.bobber_preflight_$(hostname)
+	touch $PROBE 2> /dev/null && rm -f $PROBE
+	check $? filesystem "$FSDIR is writable"
+
+	AVAILABLE=$(df -B1 --output=avail $FSDIR 2> /dev/null | tail -1)
+	[ ${AVAILABLE:-0} -ge $REQUIRED_BYTES ]
+	check $? capacity "${AVAILABLE:-0} bytes free on $FSDIR, need $REQUIRED_BYTES"
+
+	if [ "x$SSH_IFACE" != "x" ]; then
+		# Some interfaces always report an unknown state, so only reject down
+		STATE=$(cat /sys/class/net/$SSH_IFACE/operstate 2> /dev/null)
+		[ "x$STATE" != "x" ] && [ "$STATE" != "down" ]
+		check $? ssh_iface "$SSH_IFACE state is ${STATE:-missing}"
+	fi
+
+	# NCCL accepts HCAs in the form of mlx5_0:1 and an optional ^ or = prefix
+	for HCA in $(echo ${NCCL_IB_HCAS#[=^]} | sed "s/,/ /g"); do
+		[ -d /sys/class/infiniband/${HCA%%:*} ]
+		check $? nccl_ib_hcas "$HCA is present"
+	done
+	return $FAILED
+}
+
+if [ "$1" = "remote" ]; then
+	remote_checks
+	exit $?
+fi
+
+if ! ssh -p 2222 -o ConnectTimeout=10 -o BatchMode=yes $HOST true > /dev/null 2>&1; then
+	echo "FAIL ssh: unable to connect to $HOST on port 2222, ensure the Bobber container is running"
+	exit 1
+fi
+echo "PASS ssh: connected to $HOST on port 2222"
+
+ssh -p 2222 -o ConnectTimeout=10 -o BatchMode=yes $HOST \
+	EXPECTED_VERSION="'$EXPECTED_VERSION'" \
+	REQUIRED_BYTES="'$REQUIRED_BYTES'" \
+	SSH_IFACE="'$SSH_IFACE'" \
+	NCCL_IB_HCAS="'$NCCL_IB_HCAS'" \
+	bash -s -- remote < /tests/preflight.sh
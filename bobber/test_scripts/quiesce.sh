@@ -0,0 +1,78 @@
+#!/bin/bash
+# SPDX-License-Identifier: MIT
+# Wait until storage and network activity has settled on every host.
+#
+# When run without arguments, connects to every host in $HOSTS in parallel and
+# runs the wait below on each one. A host has settled once the combined
+# throughput of its block devices, network interfaces, and NFS and Lustre
+# clients stays at or below $THRESHOLD bytes/second for $WINDOW consecutive
+# seconds. Waiting stops after $TIMEOUT seconds regardless.
+
+if [ "x$THRESHOLD" = "x" ]; then
+	THRESHOLD=10000000
+fi
+
+if [ "x$WINDOW" = "x" ]; then
+	WINDOW=10
+fi
+
+if [ "x$TIMEOUT" = "x" ]; then
+	TIMEOUT=300
+fi
+
+if [ "x$HOSTS" = "x" ]; then
+	HOSTS=localhost
+fi
+
+counters () {
+	# Only whole devices are counted to avoid counting partitions twice
+	DISK=$(awk 'NR==FNR {devices[$1]; next} ($3 in devices) {total += ($6 + $10) * 512} END {printf "%d", total}' <(ls /sys/block | grep -v -e '^loop' -e '^ram') /proc/diskstats)
+	NET=$(sed 's/:/ /' /proc/net/dev | awk 'NR > 2 && $1 != "lo" {total += $2 + $10} END {printf "%d", total}')
+	# Normal and direct read and write bytes for every NFS mount
+	NFS=$(awk '$1 == "bytes:" {total += $2 + $3 + $4 + $5} END {printf "%d", total}' /proc/self/mountstats 2> /dev/null)
+	LUSTRE=$(cat /proc/fs/lustre/llite/*/stats 2> /dev/null | awk '$1 == "read_bytes" || $1 == "write_bytes" {total += $7} END {printf "%d", total}')
+	echo $(( ${DISK:-0} + ${NET:-0} + ${NFS:-0} + ${LUSTRE:-0} ))
+}
+
+wait_for_quiescence () {
+	START=$(date +%s)
+	QUIET=0
+	LAST=$(counters)
+
+	while true; do
+		sleep 1
+		NOW=$(counters)
+		RATE=$(( NOW - LAST ))
+		LAST=$NOW
+		ELAPSED=$(( $(date +%s) - START ))
+		if [ $RATE -le $THRESHOLD ]; then
+			QUIET=$(( QUIET + 1 ))
+		else
+			QUIET=0
+		fi
+		if [ $QUIET -ge $WINDOW ]; then
+			echo "$(hostname): settled after ${ELAPSED}s"
+			return 0
+		fi
+		if [ $ELAPSED -ge $TIMEOUT ]; then
+			echo "$(hostname): still at $RATE bytes/s after ${TIMEOUT}s, continuing anyway"
+			return 1
+		fi
+	done
+}
+
+if [ "$1" = "remote" ]; then
+	wait_for_quiescence
+	exit $?
+fi
+
+echo "Waiting for activity below $THRESHOLD bytes/s for ${WINDOW}s (timeout ${TIMEOUT}s)"
+declare -a pidlist
+unset pidlist
+for HOST in $(echo $HOSTS | sed "s/,/ /g"); do
+	ssh -p 2222 -o BatchMode=yes $HOST \
+		THRESHOLD=$THRESHOLD WINDOW=$WINDOW TIMEOUT=$TIMEOUT \
+		bash -s -- remote < /tests/quiesce.sh &
+	pidlist=(${pidlist[@]} $!)
+done
+wait ${pidlist[@]}
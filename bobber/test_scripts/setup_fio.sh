@@ -1,3 +1,20 @@
+agent_failed_nodes () {
+
+    # Send a request to the Bobber agent on every node at once instead of
+    # connecting to each node with SSH, printing the nodes where the request
+    # failed so only those fall back to SSH. Every node is printed if the
+    # agent can't be called at all.
+    local FAILED
+    if FAILED=$(python3 /tests/agent.py call "$@" 2> /dev/null); then
+        return
+    fi
+    if [ -z "$FAILED" ]; then
+        shift
+        FAILED="$@"
+    fi
+    echo $FAILED
+}
+
 drop_caches () {
 
 	DC=0
@@ -15,9 +32,10 @@ drop_caches () {
         esac
 	if [ $DC -eq 1 ]; then
 		echo "Starting Drop Caches: $(date)"
+		# Fall back to SSH on any node where the Bobber agent isn't running
 		declare -a pidlist
 		unset pidlist
-		for N in ${FIO_NODELIST}; do
+		for N in $(agent_failed_nodes drop_caches ${FIO_NODELIST}); do
             ssh $N $SSHOPTS /sbin/sysctl vm.drop_caches=3 &
 		    p=$!
 		    pidlist=(${pidlist[@]} $p)
@@ -31,7 +49,7 @@ stop_servers () {
 
     declare -a pidlist
     pidlist=""
-    for N in $FIO_NODELIST; do
+    for N in $(agent_failed_nodes fio_stop $FIO_NODELIST); do
         echo "Killing Server on $N"
 
 	    if [ "$N" == "localhost" ]; then
@@ -48,9 +66,15 @@ stop_servers () {
 start_servers () {
 
     if [ x"$NO_FIO_SERVER" != x"1" ]; then
+        # The agent only starts the fio binary from the image
+        if [ "$FIOBIN" == "$(command -v fio)" ]; then
+            SERVER_NODES=$(agent_failed_nodes fio_start $FIO_NODELIST)
+        else
+            SERVER_NODES=$FIO_NODELIST
+        fi
         declare -a pidlist
         pidlist=""
-        for N in $FIO_NODELIST; do
+        for N in $SERVER_NODES; do
             echo "Launching Server on $N"
 
         	if [ "$N" == "localhost" ]; then
@@ -67,6 +91,16 @@ start_servers () {
     fi
 }
 
+layout_ready () {
+
+    # An existing layout is only reused if it contains exactly one file of the
+    # expected size for every job
+    LAYOUT_FILES=$(find $WORKDIR -maxdepth 1 -type f -name "${NAME}.*" | wc -l)
+    LAYOUT_SIZED=$(find $WORKDIR -maxdepth 1 -type f -name "${NAME}.*" -size $(( SIZE * 1024 ))c | wc -l)
+    echo "Found $LAYOUT_SIZED of $LAYOUT_FILES files with expected size in $WORKDIR, need $NJOBS"
+    [ $LAYOUT_FILES -eq $NJOBS ] && [ $LAYOUT_SIZED -eq $NJOBS ]
+}
+
 create_jobfile () {
 
     # Write job to stdout
@@ -95,13 +129,13 @@ launch_fio () {
         rm -f $MFILE
         echo $FIO_NODELIST | tr ' ' '\n' > $MFILE
 
-        $FIOBIN --client=$MFILE $JOBFN
+        $FIOBIN --client=$MFILE --output-format=$OUTPUT_FORMAT $JOBFN
 
         # Cleanup job file
         rm -rf $JOBFN
         rm -f $MFILE
     else
-	    taskset -c 0-23,48-71 $FIOBIN $JOBFN
+	    taskset -c 0-23,48-71 $FIOBIN --output-format=$OUTPUT_FORMAT $JOBFN
     fi
 }
 
@@ -129,6 +163,8 @@ export SSHOPTS=${SSHOPTS:-"-o StrictHostKeyChecking=no"}
 export EXTRA_FLAGS=${EXTRA_FLAGS:-""}
 # Set JobName
 export NAME=${NAME:-iotest}
+# Print the JSON results after the human-readable results for the parser
+export OUTPUT_FORMAT=${OUTPUT_FORMAT:-normal,json}
 # Set DirectIO settings if needed, allow for IOENGINE flexibility
 export IOENGINE=${IOENGINE:-posixaio}
 IOSETTINGS=""
@@ -167,7 +203,7 @@ DATETAG=$(date +%Y%m%d%H%M%S)
 export STDOPTS="--create_serialize=0 --fallocate=none --group_reporting=1 --disable_lat=1 --disable_clat=1 --disable_slat=1 --startdelay=5 --ramp_time=3 --runtime=180 --time_based=1"
 
 echo "IOTEST Settings:"
-for E in FSDIR FSTYPE NJOBS SIZE IOSIZE NRFILES DIRECTIO MMAPIO IOSETTINGS INVALIDATE FSYNC STDOPTS FIOBIN DATETAG SSHOPTS RUNTIME EXTRA_FLAGS; do
+for E in FSDIR FSTYPE NJOBS SIZE IOSIZE NRFILES DIRECTIO MMAPIO IOSETTINGS INVALIDATE FSYNC STDOPTS FIOBIN DATETAG SSHOPTS RUNTIME EXTRA_FLAGS OUTPUT_FORMAT; do
         eval V=\$$E
         echo $E | awk '{printf("%-12s: ", $1);}'
         echo $V
@@ -175,9 +211,15 @@ done
 echo ""
 
 ########## Create
-WORKDIR=$FSDIR/fiodir.$DATETAG
+if [ x"$REUSE_LAYOUT" == x"1" ]; then
+    # Every job writes a single file, so the layout is shared by all tests
+    # using the same number of jobs and file size
+    WORKDIR=$FSDIR/fiodir.layout_threads_${NJOBS}_size_${SIZE}k
+else
+    WORKDIR=$FSDIR/fiodir.$DATETAG
+fi
 echo "Creating output directory $WORKDIR"
-mkdir $WORKDIR
+mkdir -p $WORKDIR
 
 ########## Use nodelist from Bobber
 FIO_NODELIST=$HOSTS_WITH_SPACES
@@ -18,12 +18,17 @@ setup(
               'bobber/lib/tests'],
     include_package_data=True,
     package_data={'': ['lib/docker/Dockerfile',
+                       'test_scripts/agent.py',
                        'test_scripts/call_dali_multi.sh',
+                       'test_scripts/dali_dataset.sh',
                        'test_scripts/dali_multi.sh',
+                       'test_scripts/fio_cleanup.sh',
                        'test_scripts/fio_fill_single.sh',
                        'test_scripts/fio_multi.sh',
                        'test_scripts/mdtest_multi.sh',
                        'test_scripts/nccl_multi.sh',
+                       'test_scripts/preflight.sh',
+                       'test_scripts/quiesce.sh',
                        'test_scripts/setup_fio.sh']},
     license='MIT',
     python_requires='>=3.6',
@@ -36,5 +41,8 @@ setup(
         'pyyaml >= 5.4.0',
         'tabulate >= 0.8.7',
         'six>=1.15.0'
-    ]
+    ],
+    extras_require={
+        'zstd': ['zstandard >= 0.15.0']
+    }
 )
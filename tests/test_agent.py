@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: MIT
+"""
+Send requests to the Bobber agent over a temporary Unix socket and TCP port.
+"""
+import importlib.util
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from contextlib import redirect_stderr, redirect_stdout
+
+AGENT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'bobber', 'test_scripts', 'agent.py')
+TOKEN = 'f3b1c0ffee'
+
+# The agent is a standalone script in the image rather than part of the
+# package, so it is loaded from its path
+spec = importlib.util.spec_from_file_location('agent', AGENT_SCRIPT)
+agent = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(agent)
+
+
+def succeed():
+    return 0, 'done\n'
+
+
+def fail():
+    raise OSError('Operation failed on the host')
+
+
+class AgentTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        socket_path = os.path.join(self.directory.name, 'agent.sock')
+        token_file = os.path.join(self.directory.name, 'agent_token')
+        with open(token_file, 'w') as token:
+            token.write(TOKEN)
+
+        self.servers = [agent.UnixAgentServer(socket_path,
+                                              agent.AgentHandler),
+                        agent.TCPAgentServer(('127.0.0.1', 0), TOKEN)]
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.port = self.servers[1].server_address[1]
+        patches = [
+            unittest.mock.patch.object(agent, 'AGENT_SOCKET', socket_path),
+            unittest.mock.patch.object(agent, 'AGENT_PORT', self.port),
+            unittest.mock.patch.object(agent, 'TOKEN_FILE', token_file),
+            unittest.mock.patch.dict(agent.OPERATIONS, {'succeed': succeed,
+                                                        'fail': fail})
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.directory.cleanup()
+
+    def send(self, message, tcp=False):
+        """
+        Send a single request and return every response.
+        """
+        if tcp:
+            connection = socket.create_connection(('127.0.0.1', self.port),
+                                                  timeout=10)
+        else:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(10)
+            connection.connect(agent.AGENT_SOCKET)
+        with connection:
+            connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            return [json.loads(line) for line in connection.makefile('rb')]
+
+    def call(self, operation, hosts):
+        with redirect_stdout(io.StringIO()) as failed, \
+                redirect_stderr(io.StringIO()) as output:
+            exit_code = agent.call(operation, hosts)
+        return exit_code, failed.getvalue(), output.getvalue()
+
+    def test_call(self):
+        self.assertEqual(self.call('succeed', ['localhost']),
+                         (0, '', 'localhost: done\n'))
+
+    def test_call_failure(self):
+        exit_code, failed, output = self.call('fail', ['localhost'])
+        self.assertEqual((exit_code, failed), (1, 'localhost\n'))
+        self.assertIn('Operation failed on the host', output)
+
+    def test_call_unreachable(self):
+        # Only the hosts without a reachable agent are reported
+        exit_code, failed, _ = self.call('succeed', ['localhost',
+                                                     'unreachable.invalid'])
+        self.assertEqual((exit_code, failed), (1, 'unreachable.invalid\n'))
+
+    def test_run(self):
+        responses = self.send({'operation': 'run',
+                               'command': 'echo $MESSAGE',
+                               'environment': {'MESSAGE': 'hello'}})
+        self.assertEqual(''.join(response.get('output', '')
+                                 for response in responses), 'hello\n')
+        self.assertEqual(responses[-1], {'exit_code': 0})
+
+    def test_tcp_request(self):
+        # Requests to a remote host go over TCP with the shared token
+        with unittest.mock.patch.object(agent, 'LOCAL_HOSTS', []):
+            self.assertEqual(agent.request('127.0.0.1', 'succeed'),
+                             (0, 'done\n'))
+
+    def test_tcp_invalid_token(self):
+        for token in [None, '', 'invalid']:
+            message = {'operation': 'succeed'}
+            if token is not None:
+                message['token'] = token
+            with self.subTest(token=token):
+                self.assertEqual(self.send(message, tcp=True),
+                                 [{'error': 'Invalid token', 'exit_code': 1}])
+
+    def test_tcp_run_refused(self):
+        marker = os.path.join(self.directory.name, 'marker')
+        responses = self.send({'operation': 'run', 'token': TOKEN,
+                               'command': f'touch {marker}'}, tcp=True)
+        self.assertEqual(responses, [{'error': 'Commands are only accepted '
+                                      'from the local host', 'exit_code': 1}])
+        self.assertFalse(os.path.exists(marker))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: MIT
+"""
+Stream the output of commands through an execution backend.
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+from bobber.lib.system.execution import ExecutionBackend
+
+
+class StreamBackend(ExecutionBackend):
+    """
+    Stream a fixed list of chunks, optionally failing after the last one.
+    """
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.killed = False
+
+    def _start(self, command, environment, killable, log_file):
+        def stream():
+            yield from self.chunks
+            if self.error:
+                raise self.error
+
+        def kill():
+            self.killed = True
+
+        return stream(), kill, lambda: 0
+
+
+class ExecuteTest(unittest.TestCase):
+    def execute(self, backend, **kwargs):
+        with redirect_stdout(io.StringIO()) as output:
+            exit_code = backend.execute('test', **kwargs)
+        return exit_code, output.getvalue()
+
+    def test_output(self):
+        backend = StreamBackend([b'first\n', b'second\n'])
+        self.assertEqual(self.execute(backend, timeout=10),
+                         (0, 'first\nsecond\n'))
+
+    def test_stream_error(self):
+        # The error is raised in the caller instead of waiting on a timeout
+        backend = StreamBackend([b'first\n'], ConnectionError('Lost agent'))
+        with self.assertRaisesRegex(ConnectionError, 'Lost agent'):
+            self.execute(backend)
+        self.assertFalse(backend.killed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: MIT
+"""
+Distribute an image with "load-all" against a mocked transport.
+"""
+import io
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from contextlib import redirect_stdout
+from bobber.lib.docker.archive import manifest_filename
+from bobber.lib.exit_codes import FANOUT_FAILURE
+from bobber.lib.system import fanout
+
+HOSTS = [f'host{number}' for number in range(1, 8)]
+
+
+class FakeTransport:
+    """
+    Record every copy and command instead of connecting to any host.
+    """
+    def __init__(self, failures=()):
+        self.failures = failures
+        self.lock = threading.Lock()
+        self.copies = []
+        self.received = set()
+        self.loaded = set()
+
+    def copy_to_host(self, source, target, filenames):
+        with self.lock:
+            # A source must have received the image before copying it
+            source_ready = source is None or source in self.received
+            self.copies.append((source, target, list(filenames),
+                                source_ready))
+            if target in self.failures:
+                return 1, 'scp: connection refused'
+            self.received.add(target)
+        return 0, ''
+
+    def run_on_host(self, host, command):
+        with self.lock:
+            self.loaded.add(host)
+        return 0, ''
+
+
+class LoadAllTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.image = os.path.join(self.directory.name, 'bobber.tar.gz')
+        with open(self.image, 'wb') as image:
+            image.write(b'image')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load_all(self, transport):
+        with unittest.mock.patch.object(fanout, 'copy_to_host',
+                                        transport.copy_to_host), \
+                unittest.mock.patch.object(fanout, 'run_on_host',
+                                           transport.run_on_host), \
+                unittest.mock.patch.object(fanout, 'report',
+                                           wraps=fanout.report) as report, \
+                redirect_stdout(io.StringIO()):
+            try:
+                fanout.load_all(','.join(HOSTS), self.image, 'bobber')
+                exit_code = None
+            except SystemExit as e:
+                exit_code = e.code
+        return report.call_args[0][0], exit_code
+
+    def test_every_host_reached(self):
+        transport = FakeTransport()
+        results, exit_code = self.load_all(transport)
+
+        self.assertIsNone(exit_code)
+        self.assertEqual(sorted(target for _, target, _, _ in
+                                transport.copies), sorted(HOSTS))
+        self.assertEqual(transport.loaded, set(HOSTS))
+        self.assertEqual(list(results), HOSTS)
+
+    def test_sources_received_image(self):
+        transport = FakeTransport()
+        self.load_all(transport)
+
+        self.assertTrue(all(ready for _, _, _, ready in transport.copies))
+        # Hosts which received the image copy it on to other hosts
+        self.assertTrue(any(source is not None
+                            for source, _, _, _ in transport.copies))
+
+    def test_failed_copy(self):
+        transport = FakeTransport(failures=['host3'])
+        results, exit_code = self.load_all(transport)
+
+        self.assertEqual(exit_code, FANOUT_FAILURE)
+        self.assertNotEqual(results['host3'][0], 0)
+        self.assertNotIn('host3', transport.loaded)
+        self.assertFalse(any(source == 'host3'
+                             for source, _, _, _ in transport.copies))
+        self.assertEqual(set(results) - {'host3'}, transport.loaded)
+
+    def test_manifest_copied(self):
+        transport = FakeTransport()
+        self.load_all(transport)
+        self.assertTrue(all(filenames == [self.image]
+                            for _, _, filenames, _ in transport.copies))
+
+        with open(manifest_filename(self.image), 'w') as manifest:
+            manifest.write('{}')
+        transport = FakeTransport()
+        self.load_all(transport)
+        self.assertTrue(all(filenames == [self.image,
+                                          manifest_filename(self.image)]
+                            for _, _, filenames, _ in transport.copies))
+
+
+if __name__ == '__main__':
+    unittest.main()
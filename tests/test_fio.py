@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+"""
+Compare the fio results parsed from the JSON and human-readable output.
+"""
+import os
+import unittest
+from bobber.lib.analysis.fio import (ALL_CLIENTS,
+                                     fio_json_outputs,
+                                     parse_fio_bw_log,
+                                     parse_fio_iops_log)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+# The client/server output of fio run with '--output-format=normal,json' for
+# each test on 2 systems
+LOGS = {
+    'stg_bw': ('stg_bw_iteration_1_threads_80_direct_0_depth_16_read_'
+               'pattern_read_write_pattern_write_systems_2_version_6_3_1.log'),
+    'stg_iops': ('stg_iops_iteration_1_threads_200_direct_0_depth_16_read_'
+                 'pattern_randread_write_pattern_randwrite_systems_2_version_'
+                 '6_3_1.log')
+}
+# The human-readable output is rounded to 3 or 4 significant digits
+TOLERANCE = 0.005
+
+
+def read_log(test):
+    with open(os.path.join(FIXTURES, LOGS[test]), 'r') as log:
+        return log.read()
+
+
+def without_json(log_contents):
+    """
+    Returns the log as printed by fio with '--output-format=normal'.
+    """
+    lines = []
+    in_json = False
+
+    for line in log_contents.split('\n'):
+        if line == '{':
+            in_json = True
+        if not in_json:
+            lines.append(line)
+        if line == '}':
+            in_json = False
+    return '\n'.join(lines)
+
+
+class FioJsonTest(unittest.TestCase):
+    def assertResultsMatch(self, json_results, text_results):
+        for direction in ['read', 'write']:
+            self.assertEqual(len(json_results[direction]), 2)
+            self.assertEqual(len(text_results[direction]), 2)
+            for json_value, text_value in zip(json_results[direction],
+                                              text_results[direction]):
+                self.assertAlmostEqual(json_value, text_value,
+                                       delta=json_value * TOLERANCE)
+        self.assertEqual(json_results['read params'],
+                         text_results['read params'])
+        self.assertEqual(json_results['write params'],
+                         text_results['write params'])
+
+    def test_all_clients(self):
+        for test in LOGS:
+            with self.subTest(test=test):
+                outputs = fio_json_outputs(read_log(test))
+                # The layout, write, and read runs
+                self.assertEqual(len(outputs), 3)
+                for output in outputs[1:]:
+                    self.assertEqual(output['client_stats'][-1]['jobname'],
+                                     ALL_CLIENTS)
+
+    def test_bandwidth(self):
+        for test in LOGS:
+            with self.subTest(test=test):
+                log_contents = read_log(test)
+                self.assertResultsMatch(
+                    parse_fio_bw_log(log_contents, 2),
+                    parse_fio_bw_log(without_json(log_contents), 2))
+
+    def test_iops(self):
+        for test in LOGS:
+            with self.subTest(test=test):
+                log_contents = read_log(test)
+                self.assertResultsMatch(
+                    parse_fio_iops_log(log_contents, 2),
+                    parse_fio_iops_log(without_json(log_contents), 2))
+
+    def test_exact_results(self):
+        results = parse_fio_iops_log(read_log('stg_iops'), 2)
+        self.assertEqual(results['read'], [1174889.081, 1147159.529])
+        self.assertEqual(results['write'], [125084.394, 121768.904])
+
+
+if __name__ == '__main__':
+    unittest.main()
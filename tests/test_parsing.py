@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: MIT
+"""
+Parse logs line by line and compare with parsing the full contents.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from bobber.lib.analysis.common import parse_log
+from bobber.lib.analysis.dali import parse_dali_log
+from bobber.lib.analysis.fio import parse_fio_bw_log, parse_fio_iops_log
+from bobber.lib.analysis.meta import parse_meta_log
+from bobber.lib.analysis.nccl import parse_nccl_log
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+# The parser for the logs of each test
+PARSERS = {
+    'stg_bw': parse_fio_bw_log,
+    'stg_iops': parse_fio_iops_log,
+    'stg_meta': parse_meta_log,
+    'nccl': parse_nccl_log,
+    'dali': parse_dali_log
+}
+
+
+def fixture(prefix):
+    """
+    Returns the path to the fixture log for a test.
+    """
+    for log in sorted(os.listdir(FIXTURES)):
+        if log.startswith(prefix):
+            return os.path.join(FIXTURES, log)
+
+
+class ParseLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def parse(self, log, parser):
+        # Copy the log so no sidecar is read or left next to the fixture
+        copy = os.path.join(self.directory.name, os.path.basename(log))
+        shutil.copyfile(log, copy)
+        with open(copy, 'r') as log_file:
+            expected = parser(log_file.read(), 2)
+        return parse_log(copy, parser, 2), expected
+
+    def test_fixtures(self):
+        for prefix, parser in PARSERS.items():
+            with self.subTest(test=prefix):
+                results, expected = self.parse(fixture(prefix), parser)
+                self.assertEqual(results, expected)
+                self.assertTrue(results)
+
+    def test_fio_json_filtered(self):
+        results, expected = self.parse(fixture('stg_bw'), parse_fio_bw_log)
+        self.assertEqual(results['write'], [20512345678.0, 19874512345.0])
+        self.assertEqual(results['read'], [27123456789.0, 26511223344.0])
+
+    def test_fio_interrupted(self):
+        # Cut the log off partway through the JSON output of the read run
+        log = os.path.join(self.directory.name, 'interrupted')
+        with open(fixture('stg_bw'), 'r') as log_file:
+            lines = log_file.readlines()
+        last_json = max(number for number, line in enumerate(lines)
+                        if line == '{\n')
+        os.makedirs(log)
+        log = os.path.join(log, os.path.basename(fixture('stg_bw')))
+        with open(log, 'w') as log_file:
+            log_file.writelines(lines[:last_json + 40])
+
+        results, expected = self.parse(log, parse_fio_bw_log)
+        self.assertEqual(results, expected)
+        self.assertEqual(results['read'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
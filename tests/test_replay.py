@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: MIT
+"""
+Run Bobber end-to-end with the replay backend against recorded logs.
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from contextlib import redirect_stdout
+from bobber import bobber
+from bobber.lib.analysis.catalog import LogCatalog
+from bobber.lib.analysis.common import manifest_filename
+from bobber.lib.analysis.parse_results import aggregate_systems, get_files
+
+LOG = ('stg_bw_iteration_1_threads_16_direct_1_depth_16_read_pattern_read_'
+       'write_pattern_write_systems_2_version_6_3_1.log')
+RECORDING = """Command:
+/usr/bin/fio --rw=write --bs=1m --numjobs=80
+  WRITE: bw=38.2GiB/s (41.0GB/s), 38.2GiB/s-38.2GiB/s (41.0GB/s-41.0GB/s)
+  WRITE: bw=38.2GiB/s (40.0GB/s), 38.2GiB/s-38.2GiB/s (41.0GB/s-41.0GB/s)
+Command:
+/usr/bin/fio --rw=read --bs=1m --numjobs=80
+   READ: bw=50GiB/s (53.7GB/s), 50GiB/s-50GiB/s (53.7GB/s-53.7GB/s)
+   READ: bw=50GiB/s (52.5GB/s), 50GiB/s-50GiB/s (52.5GB/s-52.5GB/s)
+"""
+# A config saved before any of the newer flags, such as --backend, existed
+OLD_CONFIG = {
+    'command': 'run-stg-bw',
+    'hosts': 'host1,host2',
+    'config_path': None,
+    'gpus': 8,
+    'iterations': 1,
+    'batch_size_sm': 512,
+    'batch_size_lg': 256,
+    'bw_threads': 16,
+    'iops_threads': 200,
+    'io_depth': 16,
+    'read_pattern': 'read',
+    'write_pattern': 'write',
+    'nccl_max': 1,
+    'nccl_tc': None,
+    'nccl_ib_hcas': '',
+    'ssh_iface': 'enp2s0f0',
+    'stg_extra_flags': None,
+    'compute_gid': 0,
+    'pause': 0,
+    'sweep': False,
+    'system': 'dgx-a100-single',
+    'no_direct': False,
+    'direct': 1
+}
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.recordings = os.path.join(self.directory.name, 'recordings')
+        self.log_path = os.path.join(self.directory.name, 'logs')
+        os.makedirs(self.recordings)
+        os.makedirs(self.log_path)
+        with open(os.path.join(self.recordings, LOG), 'w') as recording:
+            recording.write(RECORDING)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_bobber(self, *flags):
+        argv = ['bobber', 'run-stg-bw', self.log_path, 'host1,host2',
+                '--backend', 'replay', '--replay-path', self.recordings,
+                '--skip-preflight'] + list(flags)
+        with unittest.mock.patch.object(sys, 'argv', argv), \
+                redirect_stdout(io.StringIO()):
+            bobber.main()
+
+    def check_results(self):
+        log = os.path.join(self.log_path, LOG)
+        with open(log, 'r') as log_file:
+            self.assertEqual(log_file.read(), RECORDING)
+        with open(manifest_filename(log), 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest['status'], 'completed')
+        self.assertEqual(manifest['exit_code'], 0)
+        results = aggregate_systems(LogCatalog(get_files(self.log_path)))
+        bandwidth = results[2].json['bandwidth']
+        self.assertEqual(bandwidth['read'], 106200000000.0)
+        self.assertEqual(bandwidth['write'], 81000000000.0)
+
+    def test_replay(self):
+        self.run_bobber('--iterations', '1', '--system', 'dgx-a100-single')
+        self.check_results()
+
+    def test_replay_old_config(self):
+        config = os.path.join(self.directory.name, 'config.json')
+        with open(config, 'w') as config_file:
+            json.dump(dict(OLD_CONFIG, log_path=self.log_path), config_file)
+        self.run_bobber('--config-path', config)
+        self.check_results()
+
+    def test_saved_config(self):
+        config = os.path.join(self.log_path, 'command_parameters.json')
+        self.run_bobber('--iterations', '1', '--system', 'dgx-a100-single',
+                        '--retries', '2', '--resume')
+        with open(config, 'r') as config_file:
+            settings = json.load(config_file)
+        self.assertNotIn('resume', settings)
+        self.assertNotIn('plan', settings)
+        self.assertEqual(settings['retries'], 2)
+
+        # Flags passed on top of the config only apply to that invocation
+        saved = os.path.join(self.directory.name, 'config.json')
+        os.rename(config, saved)
+        self.run_bobber('--config-path', saved, '--retries', '3', '--resume')
+        with open(config, 'r') as config_file:
+            self.assertEqual(json.load(config_file), settings)
+
+
+if __name__ == '__main__':
+    unittest.main()
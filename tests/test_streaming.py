@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: MIT
+"""
+Extract results from the output of a test as it is written.
+"""
+import json
+import os
+import tempfile
+import unittest
+from bobber.lib.analysis.common import sidecar_filename
+from bobber.lib.analysis.fio import parse_fio_bw_log
+from bobber.lib.analysis.streaming import ResultExtractor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+
+# The number of lines written to the extractor at a time, similar to the
+# chunks of output read from a running test
+CHUNK_LINES = 50
+
+
+class ResultExtractorTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def extract(self, log, lines, attempt=1):
+        """
+        Write the lines to an extractor for the log and return the contents
+        of the sidecar, or `None` if no sidecar was saved.
+        """
+        log = os.path.join(self.directory.name, os.path.basename(log))
+        extractor = ResultExtractor(log)
+        for start in range(0, len(lines), CHUNK_LINES):
+            extractor.write(''.join(lines[start:start + CHUNK_LINES]))
+        extractor.save([log], attempt)
+        try:
+            with open(sidecar_filename(log), 'r') as sidecar:
+                return json.load(sidecar)
+        except FileNotFoundError:
+            return None
+
+    def fixture(self, prefix):
+        """
+        Returns the path to the fixture log for a test and its lines.
+        """
+        log = [os.path.join(FIXTURES, log) for log in os.listdir(FIXTURES)
+               if log.startswith(prefix)][0]
+        with open(log, 'r') as log_file:
+            return log, log_file.readlines()
+
+    def test_complete(self):
+        log, lines = self.fixture('stg_bw')
+        sidecar = self.extract(log, lines, attempt=2)
+
+        self.assertEqual(sidecar, {
+            'parser': 'parse_fio_bw_log',
+            'attempts': 2,
+            'results': parse_fio_bw_log(''.join(lines), 2)
+        })
+        self.assertEqual(sidecar['results']['write'],
+                         [20512345678.0, 19874512345.0])
+
+    def test_partial(self):
+        # Stop partway through the read run
+        log, lines = self.fixture('stg_bw')
+        read_command = max(number for number, line in enumerate(lines)
+                           if line.startswith('/usr/bin/fio --rw=read'))
+        sidecar = self.extract(log, lines[:read_command + 100])
+
+        self.assertEqual(sidecar['parser'], 'parse_fio_bw_log')
+        self.assertEqual(sidecar['results']['write'],
+                         [20512345678.0, 19874512345.0])
+        self.assertEqual(sidecar['results']['read'], [])
+
+    def test_unparseable(self):
+        # DALI output missing the later runs can't be parsed at all
+        log, lines = self.fixture('dali')
+        self.assertIsNone(self.extract(log, lines[:3]))
+
+    def test_missing_json_result(self):
+        # JSON output missing a result raises a KeyError in the parser
+        log, lines = self.fixture('stg_bw')
+        lines = [line for line in lines if '"bw_bytes"' not in line]
+        self.assertIsNone(self.extract(log, lines))
+
+
+if __name__ == '__main__':
+    unittest.main()